@@ -0,0 +1,79 @@
+import asyncio
+import argparse
+import time
+from playwright.async_api import async_playwright
+from head_extract import EXTRACTION_MODES
+
+# head 추출 방식별 마이크로 벤치마크
+# 사용법: python bench_head_extraction.py --meta 80 --repeat 20
+
+
+class RoundTripCounter:
+    # page / element handle 의 비동기 메서드 호출(= 드라이버와의 IPC 왕복)을 센다
+    def __init__(self, target, counter=None):
+        self._target = target
+        self._counter = counter if counter is not None else {"calls": 0}
+
+    @property
+    def calls(self):
+        return self._counter["calls"]
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        async def wrapper(*args, **kwargs):
+            self._counter["calls"] += 1
+            value = await attr(*args, **kwargs)
+            if isinstance(value, list):
+                return [RoundTripCounter(v, self._counter) for v in value]
+            return value
+
+        return wrapper
+
+
+def build_fixture_html(meta_count, link_count):
+    head = ["<title>Sign in to your account</title>"]
+    for i in range(meta_count):
+        head.append(f'<meta name="m{i}" content="value {i}" data-i="{i}">')
+    for i in range(link_count):
+        head.append(f'<link rel="preload" href="/static/{i}.css" as="style">')
+    head.append("<script>var x = 1;</script><style>body{}</style>")
+    return f"<html><head>{''.join(head)}</head><body><form></form></body></html>"
+
+
+async def run(meta_count, link_count, repeat):
+    html = build_fixture_html(meta_count, link_count)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(html)
+
+        reference = None
+        for mode, extractor in EXTRACTION_MODES.items():
+            counted = RoundTripCounter(page)
+            elements = await extractor(counted)
+            round_trips = counted.calls
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await extractor(page)
+            per_page_ms = (time.perf_counter() - start) / repeat * 1000
+
+            if reference is None:
+                reference = elements
+            same = "yes" if elements == reference else "NO"
+            print(f"{mode:<12} elements={len(elements):<4} round_trips={round_trips:<5} "
+                  f"{per_page_ms:8.2f} ms/page  same_output={same}")
+
+        await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark head extraction modes.")
+    parser.add_argument('--meta', type=int, default=60, help='Number of <meta> tags in the fixture head')
+    parser.add_argument('--links', type=int, default=20, help='Number of <link> tags in the fixture head')
+    parser.add_argument('--repeat', type=int, default=20, help='Extractions per mode')
+    args = parser.parse_args()
+    asyncio.run(run(args.meta, args.links, args.repeat))
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import glob
+import os
+import re
+import statistics
+import time
+from html_analysis import HEAD_SCAN_BYTES, HtmlAnalyzer, find_meta_refresh
+
+# meta refresh 검출: 기존 정규식 vs html_analysis (head 만 읽는 토크나이저)
+# 사용법: python bench_html_analysis.py --repeat 5 [--corpus data/html_samples]
+# 1) 페이지별 처리 시간과 검출 결과 (expected 가 있는 fixture 는 정답과 비교)
+# 2) 이벤트 루프 지연: 1ms 마다 깨어나는 하트비트 태스크의 최대 지연 (inline / thread / process)
+
+# 기존 코드가 page.content() 전체에 대해 쓰던 패턴 그대로
+LEGACY_PATTERN = r'<meta[^>]+http-equiv=["\']refresh["\'][^>]+content=["\']\s*\d+\s*;\s*url=([^"\']+)["\']'
+
+
+def legacy_meta_refresh(html):
+    match = re.search(LEGACY_PATTERN, html, re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def build_corpus(body_kb, pathological_runs):
+    head = "<title>Sign in</title>" + "".join(f'<meta name="m{i}" content="v{i}">' for i in range(30))
+    body = "<body>" + "<div class=row><p>lorem ipsum dolor sit amet</p></div>" * (body_kb * 1024 // 50) + "</body></html>"
+    # (이름, html, 정답 URL)
+    return [
+        ("quoted", f'<html><head>{head}<meta http-equiv="refresh" content="0; url=https://a.test/x"></head>{body}',
+         "https://a.test/x"),
+        ("unquoted", f"<html><head>{head}<meta http-equiv=refresh content=0;url=https://a.test/y></head>{body}",
+         "https://a.test/y"),
+        ("reordered", f'<html><head>{head}<meta content="3;URL=\'https://a.test/z\'" HTTP-EQUIV="Refresh"></head>{body}',
+         "https://a.test/z"),
+        ("no_url_keyword", f'<html><head>{head}<meta http-equiv="refresh" content="0,https://a.test/w"></head>{body}',
+         "https://a.test/w"),
+        ("no_refresh", f"<html><head>{head}</head>{body}", None),
+        ("huge_inline_script", f"<html><head>{head}<script>{'var a=1;' * (body_kb * 16)}</script>"
+                               f'<meta http-equiv="refresh" content="0;url=https://a.test/s"></head>{body}',
+         "https://a.test/s"),
+        # 닫히지 않는 <meta 가 이어지는 페이지: 정규식의 [^>]+ 가 시작 위치마다 끝까지 훑는다
+        ("pathological_attrs", "<html><head>" + '<meta data-x="y" ' * pathological_runs + body, None),
+    ]
+
+
+def load_corpus_dir(path):
+    pages = []
+    for file in sorted(glob.glob(os.path.join(path, "*.htm*"))):
+        with open(file, encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(file), f.read(), ...))   # 정답 없음 (두 방식의 결과만 비교)
+    return pages
+
+
+def time_call(func, html, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func(html)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), value
+
+
+async def heartbeat(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def loop_lag(kind, pages, concurrency):
+    # 동시에 concurrency 개 페이지를 분석하는 동안 이벤트 루프가 얼마나 멈추는지
+    analyzer = HtmlAnalyzer(kind, workers=4)
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(lags, stop))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(html):
+        async with sem:
+            return await analyzer.meta_refresh(html)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(html) for _, html, _ in pages))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    analyzer.close()
+    return elapsed, max(lags), statistics.quantiles(lags, n=100)[98] if len(lags) > 1 else lags[0]
+
+
+async def run(args):
+    pages = build_corpus(args.body_kb, args.pathological_runs)
+    if args.corpus:
+        pages += load_corpus_dir(args.corpus)
+
+    print(f"{'page':<22} {'KB':>7} {'regex ms':>10} {'tokenizer ms':>13}  regex / tokenizer")
+    totals = {"regex": 0.0, "tokenizer": 0.0}
+    correct = {"regex": 0, "tokenizer": 0}
+    labelled = 0
+    for name, html, expected in pages:
+        regex_sec, regex_url = time_call(legacy_meta_refresh, html, args.repeat)
+        tok_sec, tok_url = time_call(lambda h: find_meta_refresh(h, HEAD_SCAN_BYTES), html, args.repeat)
+        totals["regex"] += regex_sec
+        totals["tokenizer"] += tok_sec
+        mark = ""
+        if expected is not ...:
+            labelled += 1
+            correct["regex"] += regex_url == expected
+            correct["tokenizer"] += tok_url == expected
+            mark = f"{'✅' if regex_url == expected else '❌'} / {'✅' if tok_url == expected else '❌'}"
+        else:
+            mark = "same" if regex_url == tok_url else f"{regex_url!r} / {tok_url!r}"
+        print(f"{name[:22]:<22} {len(html) / 1024:>7.0f} {regex_sec * 1000:>10.2f} {tok_sec * 1000:>13.2f}  {mark}")
+    print(f"\nTotal: regex {totals['regex'] * 1000:.1f} ms, tokenizer {totals['tokenizer'] * 1000:.1f} ms")
+    if labelled:
+        print(f"Correct: regex {correct['regex']}/{labelled}, tokenizer {correct['tokenizer']}/{labelled}")
+
+    # 실제 수집처럼 같은 페이지들이 여러 번 들어오는 상황
+    workload = pages * args.copies
+    print(f"\nEvent loop lag while analysing {len(workload)} pages ({args.concurrency} at a time):")
+    print(f"{'pool':<8} {'total s':>8} {'max lag ms':>11} {'p99 lag ms':>11}")
+    for kind in (None, "thread", "process"):
+        elapsed, max_lag, p99_lag = await loop_lag(kind, workload, args.concurrency)
+        print(f"{kind or 'inline':<8} {elapsed:>8.2f} {max_lag * 1000:>11.1f} {p99_lag * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--body-kb", type=int, default=2048, help="Body size of the generated fixture pages")
+    parser.add_argument("--pathological-runs", type=int, default=4000, help="Unclosed <meta tags in the pathological page")
+    parser.add_argument("--corpus", default=None, help="Directory of saved .html pages to add to the corpus")
+    parser.add_argument("--copies", type=int, default=5, help="Times each page is analysed in the event loop test")
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
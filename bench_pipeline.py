@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from crawler import BrowserTier, Crawler, CrawlSettings, StaticTier, quiet_log
+from fixture_server import DEFAULT_MIX, READY_LINE, parse_mix, traffic
+from static_fetch import TIER_BROWSER
+from work_queue import Job
+
+# 수집 파이프라인 벤치마크 (로컬 fixture 서버, 네트워크 / 실제 사이트 불필요)
+# 사용법: python bench_pipeline.py --requests 2000 --concurrency 200 --label "before"
+#         python bench_pipeline.py --compare 10
+# - fixture_server.py 를 별도 프로세스로 띄운다 (서버가 측정 대상 이벤트 루프 / RSS 에 섞이지 않도록)
+# - 같은 seed 면 같은 URL 목록 → 코드 변경 전후를 같은 부하로 비교
+# - crawler.Crawler.fetch 를 그대로 쓴다: 정적 단계 → (--browser) 브라우저 단계 (캐시 / DNS 선행 해석은 끔)
+# - 결과는 data/bench/pipeline_results.jsonl 에 한 줄씩 추가 (git 커밋, 설정, 요약)
+
+RESULTS_FILE = "data/bench/pipeline_results.jsonl"
+
+# 종류별로 기대하는 결과 분류 (브라우저 단계를 켠 경우는 escalated 대신 browser)
+EXPECTED_OUTCOME = {
+    "ok": "ok", "redirect": "ok", "meta_refresh": "ok", "slow": "ok", "slow_body": "ok",
+    "huge_head": "ok", "status": "ok", "js_redirect": "escalated", "empty_head": "escalated",
+    "hang": "timeout", "reset": "error",
+}
+
+# 같은 부하인지 판단하는 설정 (--compare 에서 이전 실행과 비교할 때)
+WORKLOAD_KEYS = ("requests", "seed", "mix", "hosts", "concurrency", "browser", "body_kb", "hang_sec")
+
+
+def rss_mb():
+    # 현재 RSS (psutil 이 없으면 /proc, 둘 다 없으면 None)
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def git_revision():
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10, cwd=cwd)
+        dirty = subprocess.run(["git", "status", "--porcelain", "-uno"], capture_output=True, text=True, timeout=30, cwd=cwd)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if commit.returncode != 0:
+        return None
+    return commit.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": round(cuts[49], 3), "p90": round(cuts[89], 3), "p99": round(cuts[98], 3), "max": round(max(values), 3)}
+
+
+def classify(result, reason):
+    # 반환: (분류, 세부 종류) — 분류는 ok / escalated / browser / timeout / error
+    if result.get("timeout"):
+        return "timeout", "timeout"
+    if reason is not None:
+        if reason.startswith("static_error:"):
+            return "error", reason.split(":", 1)[1]
+        return "escalated", reason
+    if result.get("final_url") is None:
+        # 브라우저 단계는 예외 대신 error_message 만 남긴다
+        return "error", "browser_error" if result.get("fetch_tier") == TIER_BROWSER else "connect_error"
+    if result.get("fetch_tier") == TIER_BROWSER:
+        return "browser", "browser"
+    return "ok", "ok"
+
+
+def check(kind, expect, result, outcome, browser):
+    # fixture 가 정한 정답과 비교 (분류 + 종류별 세부 값)
+    expected = EXPECTED_OUTCOME[kind]
+    if browser and expected == "escalated":
+        expected = "browser"
+    if outcome != expected:
+        return False
+    if outcome not in ("ok", "browser"):
+        return True
+    final_url = result.get("final_url") or ""
+    if kind == "redirect":
+        return result.get("redirect_count") == expect["redirects"] and final_url.endswith(expect["final_path"])
+    if kind == "meta_refresh":
+        return bool(result.get("has_meta_refresh")) and (result.get("meta_refresh_url") or "").endswith(expect["final_path"])
+    if kind == "empty_head":
+        return not result.get("head_elements")
+    return final_url.endswith(expect["final_path"]) and bool(result.get("head_elements"))
+
+
+async def start_fixture(args):
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixture_server.py"),
+        "--port", str(args.port), "--hosts", str(args.hosts),
+        "--body-kb", str(args.body_kb), "--hang-sec", str(args.hang_sec),
+    ]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    try:
+        line = await asyncio.wait_for(process.stdout.readline(), timeout=30)
+    except asyncio.TimeoutError:
+        line = b""
+    if not line.decode().startswith(READY_LINE):
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"Fixture server did not start (port {args.port}, {args.hosts} hosts)")
+    print(f"🧪 {line.decode().strip()}")
+    return process
+
+
+class RecordingStaticTier(StaticTier):
+    # 정적 단계의 escalation reason 을 남긴다 (정적 단계만 쓸 때는 Crawler 가 reason 을 버리므로)
+    def __init__(self):
+        super().__init__()
+        self.reasons = {}
+
+    async def fetch(self, crawler, job, url, retry=False, capture=None, shot=None):
+        result, reason = await super().fetch(crawler, job, url, retry, capture, shot)
+        self.reasons[job.url_index] = reason
+        if reason is not None and crawler.tiers[-1] is self:
+            crawler.metrics.inc("escalations_total", reason)
+        return result, reason
+
+
+def bench_settings(args):
+    # 측정에 섞이면 안 되는 것(캐시, DNS 선행 해석, stats.json, 알림)은 끈다
+    return CrawlSettings(
+        enable_cache=False,
+        enable_dns_prefetch=False,
+        stats_file=None,
+        static_max_concurrent=args.concurrency,
+        max_concurrent=args.browser_concurrency,
+        browser_pool_size=args.browser_pool,
+        max_per_host=args.max_per_host,
+        host_rate_per_sec=args.host_rate or None,
+        host_burst=args.host_burst,
+        adaptive_timeout=not args.fixed_timeouts,
+        retry_timeouts=args.retry_timeouts,
+        html_analysis_pool=args.analysis_pool if args.analysis_pool != "inline" else None,
+        html_analysis_workers=args.analysis_workers,
+    )
+
+
+async def run_pipeline(args, items):
+    static = RecordingStaticTier()
+    browser = BrowserTier() if args.browser else None
+    crawler = Crawler(bench_settings(args), tiers=[static] + ([browser] if browser else []), log=quiet_log)
+    metrics = crawler.metrics
+    records = [None] * len(items)
+    peak = {"rss_mb": rss_mb(), "browser_mb": None}
+    stop = asyncio.Event()
+
+    async def sample_memory():
+        while not stop.is_set():
+            current = rss_mb()
+            if current is not None:
+                peak["rss_mb"] = max(peak["rss_mb"] or 0, current)
+            if browser is not None and browser.pool is not None:
+                browser_mb = browser.pool.memory_mb()
+                if browser_mb is not None:
+                    peak["browser_mb"] = max(peak["browser_mb"] or 0, browser_mb)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.25)
+            except asyncio.TimeoutError:
+                pass
+
+    async def handle(job, retry=False):
+        kind, _, expect = items[job.url_index]
+        started = time.perf_counter()
+        with metrics.track():
+            result = await crawler.fetch(job, retry, defer=args.retry_timeouts, slot_held=not retry)
+            if result is None:
+                # 재시도 레인으로 미뤄짐: 첫 시도의 지연 시간은 남겨 두고 재시도 때 합산한다
+                records[job.url_index] = {"latency": time.perf_counter() - started}
+                return
+            metrics.record_result(result)
+        outcome, detail = classify(result, None if browser is not None else static.reasons.get(job.url_index))
+        if outcome == "error":
+            metrics.inc("errors_total", detail)
+        latency = time.perf_counter() - started
+        if retry:
+            latency += records[job.url_index]["latency"] if records[job.url_index] else 0
+        records[job.url_index] = {
+            "kind": kind,
+            "latency": latency,
+            "outcome": outcome,
+            "detail": detail,
+            "correct": check(kind, expect, result, outcome, browser is not None),
+        }
+
+    jobs = [Job(1, i, len(items), url, i) for i, (_, url, _) in enumerate(items)]
+    sampler = asyncio.ensure_future(sample_memory())
+    started = time.perf_counter()
+    try:
+        async with crawler:
+            await crawler.run_jobs(jobs, handle, workers=args.concurrency)
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+    return records, elapsed, metrics, crawler.timeouts, crawler.html_analyzer, peak
+
+
+def summarize(items, records, elapsed, metrics, timeouts, analyzer, peak):
+    done = [r for r in records if r and "kind" in r]
+    latencies = [r["latency"] for r in done]
+    by_kind = {}
+    for kind in sorted({r["kind"] for r in done}):
+        rows = [r for r in done if r["kind"] == kind]
+        by_kind[kind] = {
+            "count": len(rows),
+            "correct": sum(r["correct"] for r in rows),
+            "outcomes": dict(Counter(r["outcome"] for r in rows)),
+            "latency_sec": percentiles([r["latency"] for r in rows]),
+        }
+    snapshot = metrics.snapshot()
+    try:
+        import resource
+        # ru_maxrss: Linux 는 KB, macOS 는 byte
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    except ImportError:
+        max_rss = None
+    return {
+        "completed": len(done),
+        "missing": len(items) - len(done),
+        "elapsed_sec": round(elapsed, 2),
+        "urls_per_sec": round(len(done) / elapsed, 2) if elapsed else None,
+        "latency_sec": percentiles(latencies),
+        "correct": sum(r["correct"] for r in done),
+        "outcomes": dict(Counter(r["outcome"] for r in done)),
+        "errors": dict(Counter(r["detail"] for r in done if r["outcome"] == "error")),
+        "escalations": snapshot["counters"].get("escalations_total", {}),
+        "by_kind": by_kind,
+        "stages": {name: {k: s[k] for k in ("count", "mean_sec", "p50_sec", "p95_sec")}
+                   for name, s in snapshot["stages"].items()},
+        "timeouts": {stage: {"deadline_sec": s["deadline_sec"], "timeouts": s["timeouts"]}
+                     for stage, s in timeouts.stats().items()},
+        "html_analysis": analyzer.stats(),
+        "peak_rss_mb": round(max_rss, 1) if max_rss else (round(peak["rss_mb"], 1) if peak["rss_mb"] else None),
+        "sampled_peak_rss_mb": round(peak["rss_mb"], 1) if peak["rss_mb"] else None,
+        "peak_browser_mb": peak["browser_mb"],
+    }
+
+
+def print_summary(summary):
+    lat = summary["latency_sec"]
+    print(f"\n📊 {summary['completed']} URLs in {summary['elapsed_sec']}s → {summary['urls_per_sec']} URLs/sec")
+    print(f"⏱️ Latency p50 {lat['p50']}s, p90 {lat['p90']}s, p99 {lat['p99']}s, max {lat['max']}s")
+    print(f"🧠 Peak RSS {summary['peak_rss_mb']} MB (sampled {summary['sampled_peak_rss_mb']} MB), "
+          f"browsers {summary['peak_browser_mb']} MB")
+    print(f"✅ Correct {summary['correct']}/{summary['completed']}, outcomes {summary['outcomes']}")
+    if summary["errors"]:
+        print(f"❌ Errors: {summary['errors']}")
+    if summary["escalations"]:
+        print(f"↗️ Escalations: {summary['escalations']}")
+    if summary["missing"]:
+        print(f"⚠️ {summary['missing']} URLs produced no result")
+    print(f"\n{'kind':<13} {'count':>6} {'correct':>8} {'p50 s':>7} {'p99 s':>7}  outcomes")
+    for kind, s in summary["by_kind"].items():
+        print(f"{kind:<13} {s['count']:>6} {s['correct']:>8} {s['latency_sec']['p50']:>7} "
+              f"{s['latency_sec']['p99']:>7}  {s['outcomes']}")
+
+
+def load_runs(path):
+    if not os.path.exists(path):
+        return []
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                runs.append(json.loads(line))
+    return runs
+
+
+def save_run(path, run):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run, ensure_ascii=False) + "\n")
+
+
+def workload(run):
+    return tuple(json.dumps(run["params"].get(key), sort_keys=True) for key in WORKLOAD_KEYS)
+
+
+def print_runs(runs):
+    print(f"\n{'when':<17} {'label':<14} {'commit':<14} {'conc':>5} {'URLs/s':>8} {'p50 s':>7} "
+          f"{'p99 s':>7} {'RSS MB':>7} {'errors':>7} {'correct':>8}")
+    for run in runs:
+        s, p = run["summary"], run["params"]
+        errors = sum(s["errors"].values())
+        print(f"{run['started_at'][:16]:<17} {(run.get('label') or '-')[:14]:<14} {(run.get('commit') or '-')[:14]:<14} "
+              f"{p['concurrency']:>5} {s['urls_per_sec']:>8} {s['latency_sec']['p50']!s:>7} "
+              f"{s['latency_sec']['p99']!s:>7} {s['peak_rss_mb']!s:>7} {errors:>7} "
+              f"{s['correct'] / max(s['completed'], 1):>8.1%}")
+
+
+def print_delta(run, runs):
+    # 같은 부하의 바로 이전 실행과 비교
+    previous = [r for r in runs if workload(r) == workload(run) and r is not run]
+    if not previous:
+        print("\nℹ️ No earlier run with the same workload to compare against")
+        return
+    before, after = previous[-1]["summary"], run["summary"]
+
+    def change(a, b):
+        return f"{(b - a) / a:+.1%}" if a and b is not None else "n/a"
+
+    print(f"\n🔍 vs {previous[-1]['started_at'][:16]} ({previous[-1].get('label') or previous[-1].get('commit')}):")
+    print(f"   URLs/sec {before['urls_per_sec']} → {after['urls_per_sec']} ({change(before['urls_per_sec'], after['urls_per_sec'])})")
+    for q in ("p50", "p99"):
+        a, b = before["latency_sec"][q], after["latency_sec"][q]
+        print(f"   {q} {a}s → {b}s ({change(a, b)})")
+    print(f"   Peak RSS {before['peak_rss_mb']} → {after['peak_rss_mb']} MB ({change(before['peak_rss_mb'], after['peak_rss_mb'])})")
+    print(f"   Correct {before['correct']} → {after['correct']}")
+
+
+async def run(args):
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    items = traffic(args.requests, args.port, mix, args.hosts, args.seed)
+    params = {key: getattr(args, key) for key in (
+        "requests", "seed", "hosts", "concurrency", "browser", "body_kb", "hang_sec", "max_per_host",
+        "host_rate", "host_burst", "fixed_timeouts", "retry_timeouts", "analysis_pool", "analysis_workers",
+        "browser_pool", "browser_concurrency",
+    )}
+    params["mix"] = mix
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    print(f"🚀 {len(items)} URLs, concurrency {args.concurrency}, mix {dict(Counter(kind for kind, _, _ in items))}")
+    server = await start_fixture(args)
+    try:
+        records, elapsed, metrics, timeouts, analyzer, peak = await run_pipeline(args, items)
+    finally:
+        server.terminate()
+        await server.wait()
+    summary = summarize(items, records, elapsed, metrics, timeouts, analyzer, peak)
+    print_summary(summary)
+
+    result = {
+        "started_at": started_at,
+        "label": args.label,
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "summary": summary,
+    }
+    runs = load_runs(args.results)
+    runs.append(result)
+    print_delta(result, runs)
+    if not args.no_save:
+        save_run(args.results, result)
+        print(f"💾 Saved to {args.results}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="Queue workers (STATIC_MAX_CONCURRENT)")
+    parser.add_argument("--seed", type=int, default=1, help="Same seed = same URL list")
+    parser.add_argument("--mix", default=None, help="e.g. 'ok=40,redirect=15,hang=2' (default: fixture_server.DEFAULT_MIX)")
+    parser.add_argument("--hosts", type=int, default=32, help="Spread URLs over 127.0.0.1 .. 127.0.0.N")
+    parser.add_argument("--port", type=int, default=8740)
+    parser.add_argument("--body-kb", type=int, default=20)
+    parser.add_argument("--hang-sec", type=float, default=60)
+    parser.add_argument("--max-per-host", type=int, default=2)
+    parser.add_argument("--host-rate", type=float, default=0, help="Requests/sec per host (0 = off, 1.0 = production)")
+    parser.add_argument("--host-burst", type=int, default=3)
+    parser.add_argument("--fixed-timeouts", action="store_true", help="Disable adaptive timeouts")
+    parser.add_argument("--retry-timeouts", action="store_true", help="Retry timed-out URLs in the retry lane")
+    parser.add_argument("--analysis-pool", choices=("thread", "process", "inline"), default="process")
+    parser.add_argument("--analysis-workers", type=int, default=4)
+    parser.add_argument("--browser", action="store_true", help="Escalate to the Playwright tier (needs Chromium)")
+    parser.add_argument("--browser-pool", type=int, default=2)
+    parser.add_argument("--browser-concurrency", type=int, default=8)
+    parser.add_argument("--label", default="", help="Name shown in --compare")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", type=int, default=0, metavar="N", help="Only print the last N saved runs")
+    args = parser.parse_args()
+    if args.compare:
+        print_runs(load_runs(args.results)[-args.compare:])
+    else:
+        asyncio.run(run(args))
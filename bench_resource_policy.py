@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import statistics
+import time
+from aiohttp import web
+from playwright.async_api import async_playwright
+from resource_policy import DEFAULT_BLOCKED_TYPES, TRACKER_HOSTS, ResourcePolicy
+
+# 리소스 차단 정책 벤치마크 (로컬 fixture 서버)
+# 사용법: python bench_resource_policy.py --images 20 --delay-ms 150 --repeat 10
+# /start 는 302 로 / 에 리다이렉트하므로 차단 중에도 리다이렉트 체인이 기록되는지 함께 확인한다.
+
+TRACKER_HOST = "tracker.localhost"  # Chromium 은 *.localhost 를 루프백으로 해석한다
+
+
+def build_app(images, stylesheets, image_kb, delay_ms):
+    counters = {"bytes": 0, "requests": 0}
+    image_body = b"\x89PNG" + b"\0" * (image_kb * 1024)
+    font_body = b"\0" * (64 * 1024)
+
+    @web.middleware
+    async def count_bytes(request, handler):
+        response = await handler(request)
+        counters["requests"] += 1
+        counters["bytes"] += len(response.body or b"")
+        return response
+
+    async def slow(body, content_type):
+        await asyncio.sleep(delay_ms / 1000)
+        return web.Response(body=body, content_type=content_type)
+
+    async def start(request):
+        raise web.HTTPFound("/")
+
+    async def index(request):
+        port = request.url.port
+        head = ["<title>Fixture</title>", '<meta name="description" content="resource policy fixture">']
+        head += [f'<link rel="stylesheet" href="/css/{i}.css">' for i in range(stylesheets)]
+        head.append(f'<script src="http://{TRACKER_HOST}:{port}/analytics.js"></script>')
+        body = "".join(f'<img src="/img/{i}.png">' for i in range(images))
+        html = f"<html><head>{''.join(head)}</head><body><p>fixture</p>{body}</body></html>"
+        return web.Response(text=html, content_type="text/html")
+
+    async def css(request):
+        rule = "@font-face{font-family:F;src:url(/font.woff2)} body{font-family:F}"
+        return await slow((rule + " .x{color:red}" * 2000).encode(), "text/css")
+
+    async def image(request):
+        return await slow(image_body, "image/png")
+
+    async def font(request):
+        return await slow(font_body, "font/woff2")
+
+    async def analytics(request):
+        return await slow(b"var _tracked = true;" * 2000, "application/javascript")
+
+    app = web.Application(middlewares=[count_bytes])
+    app.router.add_get("/start", start)
+    app.router.add_get("/", index)
+    app.router.add_get("/css/{i}.css", css)
+    app.router.add_get("/img/{i}.png", image)
+    app.router.add_get("/font.woff2", font)
+    app.router.add_get("/analytics.js", analytics)
+    return app, counters
+
+
+async def load_once(browser, url, policy):
+    context = await browser.new_context()
+    try:
+        if policy is not None:
+            await policy.install(context)
+        page = await context.new_page()
+        redirect_chain = []
+        page.on("response", lambda response: (
+            redirect_chain.append(response.url) if response.status in [301, 302, 303, 307, 308] else None
+        ))
+        start = time.perf_counter()
+        await page.goto(url, timeout=30000, wait_until="domcontentloaded")
+        dcl = time.perf_counter() - start
+        await page.wait_for_load_state("load")
+        load = time.perf_counter() - start
+        head_count = await page.evaluate("document.head.children.length")
+        return dcl, load, len(redirect_chain), head_count
+    finally:
+        await context.close()
+
+
+async def run(args):
+    app, counters = build_app(args.images, args.stylesheets, args.image_kb, args.delay_ms)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    url = f"http://127.0.0.1:{args.port}/start"
+
+    modes = {
+        "no_policy": None,
+        "block": ResourcePolicy(DEFAULT_BLOCKED_TYPES, TRACKER_HOSTS + (TRACKER_HOST,)),
+    }
+    summary = {}
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            for name, policy in modes.items():
+                await load_once(browser, url, policy)  # 워밍업
+                counters["bytes"] = counters["requests"] = 0
+                dcls, loads, redirects, heads = [], [], set(), set()
+                for _ in range(args.repeat):
+                    dcl, load, redirect_count, head_count = await load_once(browser, url, policy)
+                    dcls.append(dcl)
+                    loads.append(load)
+                    redirects.add(redirect_count)
+                    heads.add(head_count)
+                summary[name] = {
+                    "dcl_ms": statistics.median(dcls) * 1000,
+                    "load_ms": statistics.median(loads) * 1000,
+                    "kb_per_page": counters["bytes"] / args.repeat / 1024,
+                    "requests_per_page": counters["requests"] / args.repeat,
+                    "redirects": sorted(redirects),
+                    "head_children": sorted(heads),
+                }
+                if policy is not None:
+                    print(f"🚧 {name}: {policy.stats()}")
+            await browser.close()
+    finally:
+        await runner.cleanup()
+
+    print(f"\n{'mode':<10} {'DCL ms':>8} {'load ms':>8} {'KB/page':>9} {'req/page':>9}  redirects  head")
+    for name, s in summary.items():
+        print(f"{name:<10} {s['dcl_ms']:>8.0f} {s['load_ms']:>8.0f} {s['kb_per_page']:>9.1f} "
+              f"{s['requests_per_page']:>9.1f}  {s['redirects']!s:<9}  {s['head_children']}")
+    base, blocked = summary["no_policy"], summary["block"]
+    print(f"\n💡 Saved per page: {base['kb_per_page'] - blocked['kb_per_page']:.1f} KB, "
+          f"{base['dcl_ms'] - blocked['dcl_ms']:.0f} ms to DOMContentLoaded, "
+          f"{base['load_ms'] - blocked['load_ms']:.0f} ms to load")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--stylesheets", type=int, default=3)
+    parser.add_argument("--image-kb", type=int, default=100)
+    parser.add_argument("--delay-ms", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8731)
+    asyncio.run(run(parser.parse_args()))
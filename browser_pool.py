@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+try:
+    import psutil  # 메모리 감시용 (없으면 메모리 기반 재시작은 비활성, 풀을 만들 때 경고)
+except ImportError:
+    psutil = None
+
+log = logging.getLogger(__name__)
+
+
+class _BrowserSlot:
+    def __init__(self, slot_id):
+        self.slot_id = slot_id
+        self.browser = None
+        self.pid = None
+        self.active = 0           # 현재 열려 있는 컨텍스트 수
+        self.pages_served = 0     # 이번 브라우저 프로세스가 처리한 페이지 수
+        self.retiring = False     # True면 새 컨텍스트를 받지 않고 비워지면 재시작
+        self.relaunching = False
+        self.launches = 0
+        self.launch_error = None
+        self.launch_failures = 0  # 연속 실행 실패 횟수 (재시도 간격 계산용)
+
+    @property
+    def healthy(self):
+        return (
+            self.browser is not None
+            and self.browser.is_connected()
+            and not self.retiring
+            and not self.relaunching
+        )
+
+
+class BrowserPool:
+    """
+    오래 유지되는 Chromium 프로세스 몇 개를 돌려 쓰면서 URL마다 격리된 컨텍스트를 내어주는 풀.
+    - max_pages_per_browser 페이지를 처리하면 브라우저를 재시작
+    - max_memory_mb 를 넘으면 재시작 (psutil 이 있을 때만)
+    - 브라우저가 죽으면(disconnected) 자동으로 다시 띄움
+    - 다시 띄우기에 실패한 슬롯은 relaunch_backoff_sec 부터 두 배씩 (최대 max_relaunch_backoff_sec) 기다렸다가 재시도
+    """
+
+    def __init__(self, size=4, max_pages_per_browser=200, max_memory_mb=1500,
+                 memory_check_every=20, launch_options=None,
+                 relaunch_backoff_sec=1.0, max_relaunch_backoff_sec=60.0):
+        self.size = size
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_every = memory_check_every
+        self.relaunch_backoff_sec = relaunch_backoff_sec
+        self.max_relaunch_backoff_sec = max_relaunch_backoff_sec
+        if psutil is None and max_memory_mb:
+            log.warning("psutil is not installed: memory-based browser recycling "
+                        "(max_memory_mb=%s) is disabled, only max_pages_per_browser applies", max_memory_mb)
+        self.launch_options = launch_options or {"headless": True}
+        self._slots = [_BrowserSlot(i) for i in range(size)]
+        self._playwright = None
+        self._cond = None
+        self._launch_lock = None
+        self._tasks = set()
+        self._closed = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        self._cond = asyncio.Condition()
+        self._launch_lock = asyncio.Lock()
+        self._playwright = await async_playwright().start()
+        await asyncio.gather(*(self._launch(slot) for slot in self._slots))
+
+    async def close(self):
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()   # 재시도 대기 중인 relaunch 는 기다리지 않는다
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for slot in self._slots:
+            await self._close_browser(slot)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self):
+        return [
+            {
+                "slot": s.slot_id,
+                "active": s.active,
+                "pages_served": s.pages_served,
+                "launches": s.launches,
+                "launch_failures": s.launch_failures,
+                "connected": bool(s.browser and s.browser.is_connected()),
+                "rss_mb": self._browser_rss_mb(s),
+            }
+            for s in self._slots
+        ]
+
+    def memory_mb(self):
+        # 모든 브라우저 프로세스 트리의 RSS 합 (psutil 이 없으면 None)
+        values = [self._browser_rss_mb(s) for s in self._slots]
+        values = [v for v in values if v is not None]
+        return round(sum(values), 1) if values else None
+
+    @asynccontextmanager
+    async def new_context(self, **context_options):
+        # 브라우저가 acquire 직후에 죽은 경우에 대비해 다른 슬롯으로 한 번 더 시도
+        last_error = None
+        for _ in range(2):
+            slot = await self._acquire_slot()
+            try:
+                context = await slot.browser.new_context(**context_options)
+            except Exception as e:
+                last_error = e
+                slot.retiring = True
+                await self._release_slot(slot)
+                continue
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+                await self._release_slot(slot)
+            return
+        raise last_error
+
+    # ---------------- 내부 처리 ----------------
+    async def _acquire_slot(self):
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("BrowserPool is closed")
+                candidates = [s for s in self._slots if s.healthy]
+                if candidates:
+                    slot = min(candidates, key=lambda s: s.active)
+                    slot.active += 1
+                    slot.pages_served += 1
+                    if slot.pages_served >= self.max_pages_per_browser:
+                        slot.retiring = True
+                    return slot
+                failed = [s for s in self._slots if s.browser is None and s.launch_error]
+                if len(failed) == len(self._slots):
+                    # 모든 브라우저가 다시 뜨지 못함 → 무한 대기 대신 에러 (재시도는 뒤에서 계속된다)
+                    raise failed[0].launch_error
+                for s in self._slots:
+                    self._schedule_relaunch_if_idle(s)
+                await self._cond.wait()
+
+    async def _release_slot(self, slot):
+        if (not slot.retiring and self.max_memory_mb and self.memory_check_every
+                and slot.pages_served % self.memory_check_every == 0):
+            rss_mb = self._browser_rss_mb(slot)
+            if rss_mb is not None and rss_mb > self.max_memory_mb:
+                slot.retiring = True
+        async with self._cond:
+            slot.active -= 1
+            self._schedule_relaunch_if_idle(slot)
+            self._cond.notify_all()
+
+    def _schedule_relaunch_if_idle(self, slot):
+        needs_restart = slot.retiring or slot.browser is None or not slot.browser.is_connected()
+        if slot.active == 0 and needs_restart and not slot.relaunching and not self._closed:
+            slot.relaunching = True
+            task = asyncio.ensure_future(self._relaunch(slot, self._relaunch_delay(slot)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _relaunch_delay(self, slot):
+        if not slot.launch_failures:
+            return 0
+        return min(self.max_relaunch_backoff_sec, self.relaunch_backoff_sec * 2 ** (slot.launch_failures - 1))
+
+    async def _relaunch(self, slot, delay=0):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            await self._close_browser(slot)
+            if not self._closed:
+                await self._launch(slot)
+        except Exception as e:
+            slot.launch_error = e
+            slot.launch_failures += 1
+            log.warning("Browser slot %s failed to launch (attempt %s): %s: %s",
+                        slot.slot_id, slot.launch_failures, type(e).__name__, e)
+        finally:
+            async with self._cond:
+                slot.relaunching = False
+                # 실패한 슬롯은 간격을 늘려 가며 다시 시도 (풀이 영구히 줄어들지 않도록)
+                if slot.launch_error is not None:
+                    self._schedule_relaunch_if_idle(slot)
+                self._cond.notify_all()
+
+    async def _launch(self, slot):
+        # 동시에 띄우면 어떤 PID가 어느 브라우저인지 구분할 수 없으므로 직렬화
+        async with self._launch_lock:
+            before = self._chrome_pids()
+            browser = await self._playwright.chromium.launch(**self.launch_options)
+            new_pids = self._chrome_pids() - before
+        slot.browser = browser
+        slot.pid = self._root_pid(new_pids)
+        slot.pages_served = 0
+        slot.retiring = False
+        slot.launch_error = None
+        slot.launch_failures = 0
+        slot.launches += 1
+
+        def on_disconnected(_browser, slot=slot):
+            # 크래시: 열린 컨텍스트가 다 끝나면 재시작
+            if slot.browser is _browser and not self._closed:
+                slot.retiring = True
+                self._schedule_relaunch_if_idle(slot)
+
+        browser.on("disconnected", on_disconnected)
+
+    async def _close_browser(self, slot):
+        browser, slot.browser, slot.pid = slot.browser, None, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _chrome_pids():
+        if psutil is None:
+            return set()
+        pids = set()
+        for child in psutil.Process(os.getpid()).children(recursive=True):
+            try:
+                if "chrom" in child.name().lower():
+                    pids.add(child.pid)
+            except psutil.Error:
+                continue
+        return pids
+
+    @staticmethod
+    def _root_pid(pids):
+        if psutil is None or not pids:
+            return None
+        for pid in pids:
+            try:
+                if psutil.Process(pid).ppid() not in pids:
+                    return pid
+            except psutil.Error:
+                continue
+        return None
+
+    def _browser_rss_mb(self, slot):
+        if psutil is None or slot.pid is None:
+            return None
+        try:
+            root = psutil.Process(slot.pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import zstandard
+from html_analysis import scan_head
+
+# 수집 원본 보관소 (WARC 와 비슷하게 "응답 메타데이터 + 본문" 을 레코드로 남긴다)
+# {root}/index.sqlite        captures: URL 별 상태 코드, 응답 헤더, 리다이렉트 체인, 본문 해시
+#                            blobs:    본문 해시 -> pack 파일 위치
+# {root}/bodies-00001.pack   zstd 프레임을 이어 붙인 append-only 파일 (본문 하나 = 프레임 하나, 임의 접근 가능)
+# 본문은 sha256 으로 한 번만 저장한다 (같은 피싱 킷이 수많은 URL 에 그대로 올라가 있다)
+# 본문 종류: raw = 정적 단계에서 받은 응답 바이트 / dom = 브라우저 단계의 page.content()
+#
+# 재수집 없이 새 특성을 뽑기 (네트워크 없이 디스크 속도로):
+#   python capture_archive.py replay --archive data/archive --output data/results/replay.csv
+#   python capture_archive.py replay --archive data/archive --extractor my_features:extract
+#   (extract(html, record) -> dict: 결과 행에 컬럼으로 추가된다)
+#   python capture_archive.py stats --archive data/archive
+
+PACK_MAX_BYTES = 1024 ** 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256   TEXT PRIMARY KEY,
+    pack     INTEGER NOT NULL,
+    offset   INTEGER NOT NULL,
+    length   INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS captures (
+    url_index      INTEGER PRIMARY KEY,
+    original_url   TEXT,
+    final_url      TEXT,
+    status         INTEGER,
+    headers        TEXT,
+    redirect_chain TEXT,
+    charset        TEXT,
+    body_kind      TEXT,
+    body_sha256    TEXT,
+    fetch_tier     TEXT,
+    captured_at    REAL
+);
+"""
+
+
+def pack_path(root, pack):
+    return os.path.join(root, f"bodies-{pack:05d}.pack")
+
+
+class CaptureArchive:
+    def __init__(self, root, level=10, pack_max_bytes=PACK_MAX_BYTES):
+        self.root = root
+        self.level = level
+        self.pack_max_bytes = pack_max_bytes
+        self.stored = 0        # 새로 저장한 본문 수
+        self.deduplicated = 0  # 이미 있던 본문이라 레코드만 남긴 수
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pack = self.conn.execute("SELECT COALESCE(MAX(pack), 1) FROM blobs").fetchone()[0]
+        self._pack_file = open(pack_path(root, self._pack), "ab")
+
+    def close(self):
+        with self._lock:
+            self._pack_file.close()
+            self.conn.commit()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _compressor(self):
+        # ZstdCompressor 는 스레드 간에 공유할 수 없다
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def _has_blob(self, sha):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha,)).fetchone() is not None
+
+    def _append_blob(self, sha, frame, raw_size):
+        # self._lock 안에서 호출
+        if self._pack_file.tell() + len(frame) > self.pack_max_bytes and self._pack_file.tell() > 0:
+            self._pack_file.close()
+            self._pack += 1
+            self._pack_file = open(pack_path(self.root, self._pack), "ab")
+        offset = self._pack_file.tell()
+        self._pack_file.write(frame)
+        self._pack_file.flush()
+        self.conn.execute(
+            "INSERT INTO blobs (sha256, pack, offset, length, raw_size) VALUES (?, ?, ?, ?, ?)",
+            (sha, self._pack, offset, len(frame), raw_size),
+        )
+
+    def put(self, url_index, result, capture):
+        """
+        result: 수집 결과 행 (original_url, final_url, redirect_chain 을 가져온다)
+        capture: {"body": bytes, "status", "headers": [[name, value], ...], "charset", "kind", "tier"}
+        같은 url_index 를 다시 넣으면 (재시도 등) 레코드를 덮어쓴다. 반환: 본문 sha256
+        """
+        body = capture["body"]
+        sha = hashlib.sha256(body).hexdigest()
+        frame = None
+        if not self._has_blob(sha):
+            frame = self._compressor().compress(body)   # 압축은 잠금 밖에서
+        with self._lock:
+            if frame is not None and self.conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha,)).fetchone() is None:
+                self._append_blob(sha, frame, len(body))
+                self.stored += 1
+                self.stored_bytes += len(frame)
+            else:
+                self.deduplicated += 1
+            self.raw_bytes += len(body)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO captures (url_index, original_url, final_url, status, headers, redirect_chain, "
+                "charset, body_kind, body_sha256, fetch_tier, captured_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url_index,
+                    result.get("original_url"),
+                    result.get("final_url"),
+                    capture.get("status"),
+                    json.dumps(capture.get("headers") or [], ensure_ascii=False),
+                    result.get("redirect_chain"),
+                    capture.get("charset"),
+                    capture.get("kind"),
+                    sha,
+                    capture.get("tier"),
+                    time.time(),
+                ),
+            )
+            self.conn.commit()
+        return sha
+
+    async def put_async(self, url_index, result, capture):
+        # 해시 / 압축 / 디스크 쓰기를 이벤트 루프 밖에서
+        return await asyncio.to_thread(self.put, url_index, result, capture)
+
+    def stats(self):
+        ratio = self.stored_bytes / self.raw_bytes if self.raw_bytes else None
+        return {
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "raw_mb": round(self.raw_bytes / 1024 / 1024, 1),
+            "stored_mb": round(self.stored_bytes / 1024 / 1024, 1),
+            "ratio": round(ratio, 3) if ratio is not None else None,
+        }
+
+
+# ---------------- 읽기 / replay ----------------
+_READERS = {}       # (root, pack) -> 열린 파일 (프로세스마다)
+_EXTRACTORS = {}    # "module:function" -> 함수
+_decompressor = None
+
+
+def read_blob(root, pack, offset, length):
+    global _decompressor
+    f = _READERS.get((root, pack))
+    if f is None:
+        f = _READERS[(root, pack)] = open(pack_path(root, pack), "rb")
+    f.seek(offset)
+    frame = f.read(length)
+    if _decompressor is None:
+        _decompressor = zstandard.ZstdDecompressor()
+    return _decompressor.decompress(frame)
+
+
+def load_extractor(spec):
+    # "my_features:extract" -> my_features.extract
+    if spec not in _EXTRACTORS:
+        module_name, _, func_name = spec.partition(":")
+        _EXTRACTORS[spec] = getattr(importlib.import_module(module_name), func_name or "extract")
+    return _EXTRACTORS[spec]
+
+
+def decode_body(body, charset):
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def iter_records(root, chunk_size=2000):
+    # captures 를 url_index 순서로, 본문 위치와 함께 chunk 단위로 낸다
+    conn = sqlite3.connect(f"file:{os.path.join(root, 'index.sqlite')}?mode=ro", uri=True)
+    try:
+        last = -1
+        while True:
+            rows = conn.execute(
+                "SELECT c.url_index, c.original_url, c.final_url, c.status, c.headers, c.redirect_chain, c.charset, "
+                "c.body_kind, c.body_sha256, c.fetch_tier, b.pack, b.offset, b.length "
+                "FROM captures c JOIN blobs b ON b.sha256 = c.body_sha256 "
+                "WHERE c.url_index > ? ORDER BY c.url_index LIMIT ?",
+                (last, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [
+                {
+                    "root": root, "url_index": r[0], "original_url": r[1], "final_url": r[2], "status": r[3],
+                    "headers": json.loads(r[4]) if r[4] else [], "redirect_chain": r[5], "charset": r[6],
+                    "body_kind": r[7], "body_sha256": r[8], "fetch_tier": r[9],
+                    "pack": r[10], "offset": r[11], "length": r[12],
+                }
+                for r in rows
+            ]
+    finally:
+        conn.close()
+
+
+def replay_chunk(records, extractor_spec=None):
+    """
+    capture 레코드 묶음에 추출 코드를 실행한다 (프로세스 풀에서 실행).
+    같은 본문은 한 번만 풀고 head 분석도 한 번만 한다.
+    """
+    extractor = load_extractor(extractor_spec) if extractor_spec else None
+    analysed = {}
+    rows = []
+    for record in records:
+        key = (record["body_sha256"], record["charset"])
+        if key not in analysed:
+            html = decode_body(read_blob(record["root"], record["pack"], record["offset"], record["length"]), record["charset"])
+            analysed[key] = (html, scan_head(html))
+        html, (elements, refresh_url) = analysed[key]
+        redirect_chain = record["redirect_chain"]
+        row = {
+            "url_index": record["url_index"],
+            "original_url": record["original_url"],
+            "final_url": record["final_url"],
+            "redirect_chain": redirect_chain,
+            "redirect_count": len(json.loads(redirect_chain)) if redirect_chain else 0,
+            "head_elements": elements or None,
+            "has_meta_refresh": refresh_url is not None,
+            "meta_refresh_url": refresh_url,
+            "status": record["status"],
+            "fetch_tier": record["fetch_tier"],
+            "body_kind": record["body_kind"],
+            "body_sha256": record["body_sha256"],
+        }
+        if extractor is not None:
+            row.update(extractor(html, record))
+        rows.append(row)
+    return rows
+
+
+def replay(archive_dirs, output, extractor=None, workers=None, chunk_size=2000, na_rep="null"):
+    """
+    archive_dirs: 보관소 경로 목록 (shard 별 보관소를 함께 넘길 수 있다)
+    workers: 0 이면 현재 프로세스에서 실행
+    반환: 출력한 행 수
+    """
+    import pandas as pd   # 재추출할 때만 필요 (stats 등은 pandas 없이 시작)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    chunks = (chunk for root in archive_dirs for chunk in iter_records(root, chunk_size))
+    written = 0
+    header = True
+    started = time.time()
+
+    def write(rows):
+        nonlocal written, header
+        pd.DataFrame(rows).to_csv(output, mode="w" if header else "a", header=header, index=False, na_rep=na_rep)
+        header = False
+        written += len(rows)
+        print(f"\r🔁 Replayed {written} captures ({written / max(time.time() - started, 1e-6):.0f}/s)", end="", flush=True)
+
+    if workers == 0:
+        for chunk in chunks:
+            write(replay_chunk(chunk, extractor))
+    else:
+        # 결과 순서를 유지하면서 동시에 처리 중인 chunk 수를 제한 (메모리가 보관소 크기와 무관하도록)
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(replay_chunk, chunk, extractor))
+                if len(in_flight) >= workers * 2:
+                    write(in_flight.popleft().result())
+            while in_flight:
+                write(in_flight.popleft().result())
+    print()
+    return written
+
+
+def archive_stats(root):
+    conn = sqlite3.connect(f"file:{os.path.join(root, 'index.sqlite')}?mode=ro", uri=True)
+    try:
+        captures, unique = conn.execute("SELECT COUNT(*), COUNT(DISTINCT body_sha256) FROM captures").fetchone()
+        raw, stored = conn.execute("SELECT COALESCE(SUM(raw_size), 0), COALESCE(SUM(length), 0) FROM blobs").fetchone()
+        by_kind = dict(conn.execute("SELECT body_kind, COUNT(*) FROM captures GROUP BY body_kind"))
+    finally:
+        conn.close()
+    return {
+        "captures": captures,
+        "unique_bodies": unique,
+        "by_kind": by_kind,
+        "unique_raw_mb": round(raw / 1024 / 1024, 1),
+        "stored_mb": round(stored / 1024 / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture archive tools (replay extraction offline, show stats).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_replay = sub.add_parser("replay", help="Run the extraction code over archived captures")
+    p_replay.add_argument("--archive", nargs="+", default=["data/archive"], help="Archive directories (e.g. one per shard)")
+    p_replay.add_argument("--output", default="data/results/replay_results.csv")
+    p_replay.add_argument("--extractor", default=None, help="Extra features: 'module:function', called as f(html, record) -> dict")
+    p_replay.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count, 0: in-process)")
+    p_replay.add_argument("--chunk-size", type=int, default=2000)
+
+    p_stats = sub.add_parser("stats", help="Show archive size and deduplication")
+    p_stats.add_argument("--archive", nargs="+", default=["data/archive"])
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        count = replay(args.archive, args.output, args.extractor, args.workers, args.chunk_size)
+        print(f"🎉 {count} rows written to '{args.output}'")
+    else:
+        for root in args.archive:
+            print(f"📦 {root}: {archive_stats(root)}")
@@ -0,0 +1,335 @@
+import argparse
+import ast
+import asyncio
+import json
+import os
+import sys
+
+# 수집 명령행 (main.py / batch_fetch.py / restart_batch_fetch.py / batch_counter.py 를 하나로)
+#   python cli.py test   [--input data/test/test_url_data.csv] [--limit 20]    앞의 몇 개만 한 파일로
+#   python cli.py batch  [--batch-size 1000] [--shard 0/4]                     처음부터 (저널에 있는 URL 은 건너뜀)
+#   python cli.py resume [--start 15] [--retry-failed] [--shard 0/4]           이어서 (batch_{n}.csv 가 있는 배치는 건너뜀)
+#   python cli.py merge  [--full]                                              batch_{n}.csv → 통합 CSV
+#   python cli.py report                                                       빠진 batch / URL 범위
+#   python cli.py stats                                                        저널 / 캐시 / 보관소 / 마지막 메트릭
+# 설정 기본값은 crawler.DEFAULT_SETTINGS + PRESETS[명령], 나머지는 --set name=value 로 (여러 번 가능)
+# report / stats 가 바로 뜨도록 무거운 모듈(aiohttp, pandas, playwright)은 명령 안에서 import 한다
+
+
+def parse_value(text):
+    # --set 값: 파이썬 리터럴이면 그 값 (10, 0.5, None, True, ('csv', 'parquet')), 아니면 문자열
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def build_settings(preset, args):
+    from crawler import CrawlSettings
+    overrides = {}
+    for item in args.set or ():
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects name=value, got {item!r}")
+        overrides[name.strip()] = parse_value(value.strip())
+    flags = {
+        "exec_file": args.input,
+        "output_file": args.output,
+        "batch_size": args.batch_size,
+        "max_concurrent": args.concurrency,
+        "static_max_concurrent": args.static_concurrency,
+        "browser_pool_size": args.browser_pool,
+        "output_formats": tuple(args.formats.split(",")) if args.formats else None,
+        "dedup_mode": (None if args.dedup == "none" else args.dedup) if args.dedup else None,
+    }
+    overrides.update({name: value for name, value in flags.items() if value is not None})
+    for flag, name, value in (
+        (args.no_static, "enable_static_tier", False),
+        (args.no_browser, "enable_browser_tier", False),
+        (args.no_cache, "enable_cache", False),
+        (args.no_dns_prefetch, "enable_dns_prefetch", False),
+        (args.screenshots, "enable_screenshot", True),
+        (args.capture, "enable_capture", True),
+        (getattr(args, "retry_failed", False), "retry_failed", True),
+        (getattr(args, "merge_original", False), "merge_original", True),
+    ):
+        if flag:
+            overrides[name] = value
+    if getattr(args, "limit", None) is not None:
+        overrides["limit"] = args.limit or None
+    try:
+        settings = CrawlSettings(preset, **overrides)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    if not (settings.enable_static_tier or settings.enable_browser_tier):
+        raise SystemExit("❌ --no-static and --no-browser leave nothing to fetch with")
+    if getattr(args, "shard", None):
+        from sharding import parse_shard_spec
+        settings = settings.for_shard(*parse_shard_spec(args.shard))
+    return settings
+
+
+# ---------------- test ----------------
+def run_test(args):
+    from itertools import islice
+    from crawler import Crawler
+    from url_normalize import dedup_urls, fan_out
+    from url_reader import iter_url_rows
+    from work_queue import Job
+
+    settings = build_settings("test", args)
+    # 입력 CSV 를 앞에서부터 limit 개만 스트리밍으로 읽음 (원본 결합 시에는 모든 컬럼을 함께 가져옴)
+    rows = list(islice(iter_url_rows(settings.exec_file, passthrough=True if settings.merge_original else None), settings.limit))
+    urls = [row.url for row in rows]
+
+    # 중복 URL 은 한 번만 가져오고 결과를 복사
+    if settings.dedup_mode:
+        targets, mapping = dedup_urls(urls, settings.dedup_mode)
+        first = {}
+        for i, pos in enumerate(mapping):
+            first.setdefault(pos, i)
+    else:
+        targets, mapping, first = urls, list(range(len(urls))), {i: i for i in range(len(urls))}
+    jobs = [Job(1, pos, len(targets), url, rows[first[pos]].url_index) for pos, url in enumerate(targets)]
+
+    async def crawl():
+        fetched = [None] * len(jobs)
+        async with Crawler(settings) as crawler:
+            async for job, result in crawler.crawl(jobs):
+                fetched[job.index] = result
+        return fetched
+
+    fetched = asyncio.run(crawl())
+    results = [
+        fetched[pos] if first[pos] == i else fan_out(fetched[pos], urls[i], rows[first[pos]].url_index)
+        for i, pos in enumerate(mapping)
+    ]
+    if settings.dedup_mode:
+        print(f"🔁 Dedup ({settings.dedup_mode}): {len(targets)} unique targets, {len(urls) - len(targets)} fetches saved")
+    write_results_file(settings, rows, results)
+    print(f"🎉 Done! Results saved to '{settings.output_file}'")
+    return 0
+
+
+def write_results_file(settings, rows, results):
+    import pandas as pd
+    results_df = pd.DataFrame(results)
+    if settings.merge_original:
+        df = pd.DataFrame([row.extra for row in rows])
+        # 중복 컬럼은 원본 쪽을 남긴다
+        results_df = df.join(results_df.drop(columns=results_df.columns.intersection(df.columns)))
+    os.makedirs(os.path.dirname(settings.output_file) or ".", exist_ok=True)
+    results_df.to_csv(settings.output_file, index=False, na_rep=settings.none_data)
+
+
+# ---------------- batch / resume ----------------
+def run_batches(args, resume=False):
+    from crawler import BatchLog, Crawler, ShardSink
+    from journal import FetchJournal, print_gap_report
+    from merge_results import merge, print_merge_summary
+    from url_normalize import Deduplicator
+    from url_reader import count_urls, iter_url_rows
+    from work_queue import ShardWriter, plan_batch_jobs
+
+    settings = build_settings("resume" if resume else "batch", args)
+    if resume and args.report:
+        with FetchJournal(settings.journal_path) as journal:
+            print_gap_report(journal.gap_report())
+        return 0
+    os.makedirs(settings.result_dir, exist_ok=True)
+    os.makedirs(settings.log_dir, exist_ok=True)
+
+    journal = FetchJournal(settings.journal_path)
+    try:
+        # batch(20) 와 resume(1000) 은 기본 저널을 같이 쓰므로 배치 크기가 다르면 시작하지 않는다
+        journal.check_batch_size(settings.batch_size)
+    except ValueError as e:
+        journal.close()
+        raise SystemExit(f"❌ {e}")
+    known_total = count_urls(settings.exec_file)  # 전에 끝까지 읽은 적이 있으면 알고 있다
+    if known_total is not None:
+        journal.set_run_info(known_total, settings.batch_size)
+
+    start_batch = args.start if resume else 0
+    log = BatchLog(settings.log_dir)
+
+    def on_shard_done(batch_num, path):
+        print(f"💾 Batch {batch_num} saved: {path}")
+        log.close(batch_num)
+
+    dedup = Deduplicator(settings.dedup_mode) if settings.dedup_mode else None
+    rows = iter_url_rows(settings.exec_file, start_index=max(0, (start_batch - 1) * settings.batch_size))
+    writer = ShardWriter(settings.result_dir, journal, na_rep=settings.none_data, on_shard_done=on_shard_done,
+                         output_formats=settings.output_formats, parquet_dir=settings.parquet_dir, dedup=dedup)
+    jobs = plan_batch_jobs(rows, writer, journal, settings.batch_size, dedup=dedup, shard=settings.shard,
+                           retry_failed=settings.retry_failed, skip_existing=resume)
+
+    async def crawl():
+        async with Crawler(settings, sinks=[ShardSink(writer)], log=log) as crawler:
+            async for _ in crawler.crawl(jobs):
+                pass
+
+    try:
+        asyncio.run(crawl())
+    finally:
+        if dedup is not None:
+            print(f"🔁 Dedup ({settings.dedup_mode}): {dedup.unique} unique targets, {dedup.saved} fetches saved")
+        if writer.pending_shards:
+            print(f"⚠️ Unfinished batches: {writer.pending_shards}")
+        if settings.shard is None and journal.run_info()["total_urls"] is not None:
+            print_gap_report(journal.gap_report())
+        journal.close()
+    if settings.shard is not None:
+        index, count = settings.shard
+        print(f"🎉 Shard {index}/{count} done. Merge with: python launch_shards.py --total {count} --merge-only")
+        return 0
+
+    if "parquet" in settings.output_formats:
+        from parquet_store import compact
+        print("\n🧩 Compacting Parquet batches...")
+        compact(settings.parquet_dir, settings.merged_parquet_dir)
+        print(f"🎉 Parquet: '{settings.merged_parquet_dir}'")
+    # 새로 생기거나 바뀐 batch 만 통합 (manifest: '{output_file}.manifest.json')
+    if "csv" in settings.output_formats:
+        print("\n🧩 Merging batch results...")
+        print_merge_summary(merge(settings.result_dir, settings.output_file, na_rep=settings.none_data, pool="thread"),
+                            settings.output_file)
+        print(f"🎉 All batches done! Results saved to '{settings.output_file}'")
+    return 0
+
+
+# ---------------- merge / report / stats ----------------
+def run_merge(args):
+    from merge_results import merge, print_merge_summary
+    summary = merge(args.batch_dir, args.output, workers=args.workers, full=args.full, na_rep=args.na_rep)
+    print_merge_summary(summary, args.output)
+    if args.parquet:
+        from parquet_store import compact
+        compact(args.parquet_dir, args.merged_parquet_dir)
+        print(f"🎉 Parquet: '{args.merged_parquet_dir}'")
+    return 0
+
+
+def run_report(args):
+    from merge_results import load_manifest, report, scan_shards
+    # merge 의 manifest 가 있으면 바뀌지 않은 batch 파일은 다시 읽지 않는다 (통합 파일은 만들지 않음)
+    _, _, _, _, known = scan_shards(args.batch_dir, load_manifest(args.output), args.workers)
+    report(known, args.total_urls, args.batch_size, args.journal)
+    return 0
+
+
+def run_stats(args):
+    if os.path.exists(args.journal):
+        from journal import FetchJournal
+        with FetchJournal(args.journal) as journal:
+            info = journal.run_info()
+            (recorded, failed), = journal.conn.execute("SELECT COUNT(*), COALESCE(SUM(failed), 0) FROM fetch_log")
+            batches = len(journal.batch_counts())
+        print(f"📒 Journal {args.journal}: {recorded} URLs recorded ({failed} failed) in {batches} batches, "
+              f"input {info['total_urls']} URLs / batch size {info['batch_size']}")
+    else:
+        print(f"📒 No journal at {args.journal}")
+    if os.path.exists(args.cache):
+        from result_cache import ResultCache
+        with ResultCache(args.cache) as cache:
+            print(f"💾 Cache {args.cache}: {cache.stats()['entries']} entries")
+    for root in args.archive:
+        if os.path.exists(os.path.join(root, "index.sqlite")):
+            from capture_archive import archive_stats
+            print(f"📦 Archive {root}: {archive_stats(root)}")
+    if os.path.exists(args.stats_file):
+        with open(args.stats_file, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        print(f"📈 Last metrics ({args.stats_file}): {snapshot['completed']} completed, "
+              f"{snapshot['urls_per_sec']} URLs/sec, {snapshot['in_flight']} in flight")
+        for name, labels in snapshot["counters"].items():
+            print(f"   {name}: {labels}")
+        for name, stage in sorted(snapshot["stages"].items(), key=lambda item: -item[1]["total_sec"]):
+            print(f"   {name:<16} n={stage['count']:<8} mean {stage['mean_sec']}s  p50 {stage['p50_sec']}s  p95 {stage['p95_sec']}s")
+    return 0
+
+
+def add_crawl_options(parser):
+    parser.add_argument('--input', default=None, help='Input CSV with an original_url column')
+    parser.add_argument('--output', default=None, help='Result file (merged CSV)')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--concurrency', type=int, default=None, help='Browser pages at a time (MAX_CONCURRENT)')
+    parser.add_argument('--static-concurrency', type=int, default=None, help='HTTP fetches at a time / queue workers')
+    parser.add_argument('--browser-pool', type=int, default=None, help='Chromium processes')
+    parser.add_argument('--formats', default=None, help="Batch outputs, e.g. 'csv' or 'csv,parquet'")
+    parser.add_argument('--dedup', choices=('canonical', 'host_path', 'none'), default=None)
+    parser.add_argument('--no-static', action='store_true', help='Skip the HTTP tier (browser only)')
+    parser.add_argument('--no-browser', action='store_true', help='Skip the browser tier (HTTP only, no Chromium needed)')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--no-dns-prefetch', action='store_true')
+    parser.add_argument('--screenshots', action='store_true')
+    parser.add_argument('--capture', action='store_true', help='Archive responses (capture_archive.py replay)')
+    parser.add_argument('--set', action='append', metavar='NAME=VALUE',
+                        help='Any crawler.DEFAULT_SETTINGS entry, e.g. --set host_rate_per_sec=2 (repeatable)')
+
+
+def build_parser():
+    from merge_results import BATCH_DIR, JOURNAL_PATH, NONE_DATA, OUTPUT_FILE
+    parser = argparse.ArgumentParser(description="Fetch <head> elements and redirect chains for URL lists.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_test = sub.add_parser("test", help="Fetch the first --limit URLs into one CSV (was main.py)")
+    add_crawl_options(p_test)
+    p_test.add_argument('--limit', type=int, default=None, help='First N URLs (0: all)')
+    p_test.add_argument('--merge-original', action='store_true', help='Join the input CSV columns to the results')
+
+    p_batch = sub.add_parser("batch", help="Fetch everything in batches with a journal (was batch_fetch.py)")
+    add_crawl_options(p_batch)
+    p_batch.add_argument('--shard', default=None, help="Process only shard i of N (by URL host hash), e.g. '0/4'")
+    p_batch.add_argument('--retry-failed', action='store_true', help='Also refetch URLs recorded as failed in the journal')
+
+    p_resume = sub.add_parser("resume", help="Continue from a batch, skipping finished batches (was restart_batch_fetch.py)")
+    add_crawl_options(p_resume)
+    p_resume.add_argument('--start', type=int, default=0, help='Start from batch number (default: 0)')
+    p_resume.add_argument('--shard', default=None, help="Process only shard i of N (by URL host hash), e.g. '0/4'")
+    p_resume.add_argument('--retry-failed', action='store_true', help='Also refetch URLs recorded as failed in the journal')
+    p_resume.add_argument('--report', action='store_true', help='Print missing/failed URL ranges from the journal and exit')
+
+    p_merge = sub.add_parser("merge", help="Merge batch_{n}.csv files into one CSV (incremental)")
+    p_merge.add_argument('--batch-dir', default=BATCH_DIR)
+    p_merge.add_argument('--output', default=OUTPUT_FILE)
+    p_merge.add_argument('--workers', type=int, default=None, help='Processes used to scan shards (default: CPU count)')
+    p_merge.add_argument('--full', action='store_true', help='Rescan every shard and rebuild the output')
+    p_merge.add_argument('--na-rep', default=NONE_DATA)
+    p_merge.add_argument('--parquet', action='store_true', help='Also compact the Parquet batches')
+    p_merge.add_argument('--parquet-dir', default='data/results/parquet')
+    p_merge.add_argument('--merged-parquet-dir', default='data/results/merged_parquet')
+
+    p_report = sub.add_parser("report", help="Report missing batches and URL ranges (was batch_counter.py)")
+    p_report.add_argument('--batch-dir', default=BATCH_DIR)
+    p_report.add_argument('--output', default=OUTPUT_FILE, help='Merged CSV whose manifest caches shard scans')
+    p_report.add_argument('--journal', default=JOURNAL_PATH)
+    p_report.add_argument('--total-urls', type=int, default=None)
+    p_report.add_argument('--batch-size', type=int, default=None)
+    p_report.add_argument('--workers', type=int, default=None)
+
+    p_stats = sub.add_parser("stats", help="Show journal, cache, archive and last metrics snapshot")
+    p_stats.add_argument('--journal', default=JOURNAL_PATH)
+    p_stats.add_argument('--cache', default='data/cache/fetch_cache.sqlite')
+    p_stats.add_argument('--archive', nargs='*', default=['data/archive'])
+    p_stats.add_argument('--stats-file', default='data/log/stats.json')
+    return parser
+
+
+COMMANDS = {
+    "test": run_test,
+    "batch": run_batches,
+    "resume": lambda args: run_batches(args, resume=True),
+    "merge": run_merge,
+    "report": run_report,
+    "stats": run_stats,
+}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
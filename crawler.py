@@ -0,0 +1,729 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from host_scheduler import DNS_NONAME, DNS_NXDOMAIN, DnsResolver, HostLimiter, dns_failed_result
+from html_analysis import HEAD_HTML_JS, HEAD_SCAN_BYTES, HtmlAnalyzer
+from metrics import Metrics, MetricsServer, StatsFileWriter, WorkerProfiler
+from result_cache import CACHE_MISS, ResultCache
+from sharding import host_of, shard_dir, shard_journal_path
+from static_fetch import TIER_BROWSER, TIER_STATIC, create_session, fetch_static
+from timeout_policy import AdaptiveTimeouts
+from url_normalize import with_scheme
+from work_queue import RESULT_COLUMNS, Job, run_queue
+
+# 수집 라이브러리 API (main.py / batch_fetch.py / restart_batch_fetch.py 에 세 번 복사되어 있던 수집 로직)
+#
+#   settings = CrawlSettings("batch", batch_size=100)
+#   async with Crawler(settings) as crawler:
+#       async for job, result in crawler.crawl(["example.com", ...]):
+#           ...
+#
+# - CrawlSettings: 예전 모듈 상수(BATCH_SIZE, MAX_CONCURRENT ...)를 소문자 이름으로 모은 설정
+#   PRESETS 의 test / batch / resume 은 각 스크립트에 있던 값 그대로
+# - 수집 단계(tier): 앞에서부터 시도하고 reason 을 돌려주면 다음 단계로 (기본: StaticTier → BrowserTier)
+#   fetch(crawler, job, url, retry, capture, shot) -> (result, reason) 만 있으면 직접 만든 단계도 끼울 수 있다
+# - 출력(sink): 결과마다 write(job, result) (ShardSink: 저널 + batch_{n}.csv / CsvFileSink: CSV 한 파일)
+# - playwright 는 BrowserTier 를 시작할 때, pandas 는 결과 파일을 쓸 때에만 import 한다
+# 명령행은 cli.py
+
+DEFAULT_SETTINGS = {
+    # 입력 / 출력
+    "exec_file": "urls_data.csv",                   # 입력 CSV (original_url 컬럼)
+    "result_dir": "data/results/batch_results",     # batch_{n}.csv
+    "output_file": "data/results/head_extraction_results.csv",  # 통합 결과 (test 모드는 결과 파일)
+    "log_dir": "data/log",
+    "journal_path": "data/results/fetch_journal.sqlite",  # URL 단위 체크포인트 (지우면 처음부터)
+    "output_formats": ("csv",),                     # 'csv' / 'parquet' 조합
+    "parquet_dir": "data/results/parquet",          # 배치별 Parquet (batch_num=N/ 파티션)
+    "merged_parquet_dir": "data/results/merged_parquet",
+    "none_data": "null",                            # 값이 없을 때 쓰는 문자
+    "batch_size": 1000,                             # 배치 하나의 URL 수
+    "limit": None,                                  # test 모드: 앞에서부터 몇 개만 (None 이면 전부)
+    "merge_original": False,                        # test 모드: 입력 CSV 의 컬럼과 결합
+    "retry_failed": False,                          # 저널에 실패로 기록된 URL 도 다시 수집
+    "shard": None,                                  # (i, N): 호스트 해시로 나눈 N 개 중 i 번째만
+    # 동시성 / 브라우저
+    "max_concurrent": 50,                           # 브라우저 단계 동시 페이지 수
+    "queue_size": 400,                              # 작업 큐 상한 (입력을 너무 앞서 읽지 않도록)
+    "browser_pool_size": 4,                         # 상주 Chromium 프로세스 수
+    "max_pages_per_browser": 200,                   # 이 페이지 수를 처리하면 브라우저 재시작
+    "max_browser_memory_mb": 1500,                  # 이 메모리를 넘으면 브라우저 재시작
+    "head_extraction_mode": "single_pass",          # 'single_pass' / 'per_element'
+    "block_resource_types": ("image", "media", "font", "stylesheet"),  # 브라우저 단계에서 받지 않을 리소스
+    "block_trackers": True,                         # 알려진 트래커 호스트 차단
+    "verify_tls": True,                             # False 면 두 단계 모두 잘못된 / 자체 서명 인증서를 받아들인다
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    # 정적 단계
+    "enable_static_tier": True,                     # 먼저 HTTP 로 가져오고 필요한 경우에만 브라우저로
+    "static_max_concurrent": 200,                   # HTTP 단계 동시 접속 수 (= 큐 워커 수)
+    "static_timeout_sec": 10,
+    "enable_browser_tier": True,                    # False 면 정적 단계만 (escalation 대상도 정적 결과 그대로 기록)
+    # 캐시 / 중복
+    "enable_cache": True,                           # 실행 간 결과 캐시
+    "cache_path": "data/cache/fetch_cache.sqlite",  # shard 끼리 공유 가능
+    "cache_ttl_sec": 7 * 24 * 3600,
+    "cache_negative_ttl_sec": 24 * 3600,            # 실패 결과(DNS 실패, 타임아웃) 유효 기간
+    "cache_max_entries": 1_000_000,
+    "dedup_mode": "canonical",                      # 'canonical' / 'host_path' / None
+    # DNS / 호스트
+    "enable_dns_prefetch": True,                    # 큐에 넣을 때 DNS 를 먼저 해석, NXDOMAIN 은 페이지를 열지 않음
+    "dns_nameservers": None,                        # None 이면 OS resolver / 예: ['8.8.8.8', '127.0.0.1:5353']
+    "dns_timeout_sec": 2,
+    "dns_max_concurrent": 100,
+    "max_per_host": 2,                              # 같은 호스트 동시 접속 수
+    "host_rate_per_sec": 1.0,                       # 같은 호스트 초당 요청 수 (토큰 버킷)
+    "host_burst": 3,
+    # 타임아웃
+    "adaptive_timeout": True,                       # 최근 소요 시간 분포로 단계별 타임아웃 결정
+    "timeout_quantile": 0.95,
+    "timeout_multiplier": 2.0,
+    "retry_timeouts": True,                         # 타임아웃 난 URL 을 재시도 레인에서 상한 마감 시간으로 한 번 더
+    "retry_timeout_factor": 1.0,                    # 재시도 마감 시간 = 상한(예전 고정 10s) x 이 값
+    "retry_workers": None,                          # 재시도 레인 워커 수 (None 이면 큐 워커 수의 1/4)
+    # HTML 분석
+    "html_analysis_pool": "process",                # 'process' / 'thread' (re 가 GIL 을 잡으므로 이벤트 루프가 같이 멈출 수 있다) / None
+    "html_analysis_workers": 4,
+    "head_scan_bytes": HEAD_SCAN_BYTES,
+    # 스크린샷
+    "enable_screenshot": False,
+    "screenshot_dir": "data/screenshots",
+    "screenshot_format": "jpeg",                    # 'jpeg' / 'webp' (Pillow 필요)
+    "screenshot_quality": 70,
+    "screenshot_clip": (1280, 720),
+    "screenshot_phash": True,
+    "screenshot_workers": 2,
+    "screenshot_queue": 64,
+    # 원본 보관
+    "enable_capture": False,                        # 최종 HTML / 응답 헤더 / 리다이렉트 체인 저장 (zstandard 필요)
+    "capture_dir": "data/archive",
+    # 관측
+    "metrics_port": None,                           # 예: 9464 → /metrics, /stats.json (shard 마다 +i)
+    "stats_file": "stats.json",                     # log_dir 안 (None 이면 저장 안 함)
+    "stats_interval_sec": 10,
+    "profiler": None,                               # 'cprofile' / 'yappi' → log_dir/profile.prof
+    "profile_sample_every": 100,
+    # 알림
+    "notify_sinks": (),                             # 'webhook'(SLACK_WEBHOOK_URL) / 'file' / 'stdout'
+    "notify_file": "notifications.log",             # log_dir 안
+    "notify_window_sec": 60,
+    "notify_max_per_minute": 20,
+}
+
+PRESETS = {
+    # main.py: 앞의 몇 개만 한 파일로
+    "test": {
+        "exec_file": "data/test/test_url_data.csv",
+        "limit": 20,
+        "batch_size": 20,
+        "max_concurrent": 5,
+        "browser_pool_size": 2,
+    },
+    # batch_fetch.py
+    "batch": {
+        "batch_size": 20,
+        "max_concurrent": 5,
+        "browser_pool_size": 2,
+    },
+    # restart_batch_fetch.py
+    "resume": {
+        "notify_sinks": ("webhook", "file"),
+    },
+}
+
+BROWSER_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class CrawlSettings:
+    """
+    CrawlSettings(preset=None, **overrides): DEFAULT_SETTINGS ← PRESETS[preset] ← overrides 순서로 덮어쓴다.
+    모르는 이름은 ValueError (오타가 조용히 무시되지 않도록)
+    """
+
+    def __init__(self, preset=None, **overrides):
+        if preset is not None and preset not in PRESETS:
+            raise ValueError(f"Unknown preset: {preset!r} (choose from {sorted(PRESETS)})")
+        unknown = set(overrides) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {sorted(unknown)}")
+        self.preset = preset
+        self.__dict__.update({**DEFAULT_SETTINGS, **PRESETS.get(preset, {}), **overrides})
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in DEFAULT_SETTINGS}
+
+    def replace(self, **changes):
+        return CrawlSettings(self.preset, **{**self.as_dict(), **changes})
+
+    def for_shard(self, index, count):
+        # shard 실행은 결과 / 로그 / 저널 / 캡처를 shard 마다 나눈다 (캐시와 스크린샷은 공유)
+        return self.replace(
+            shard=(index, count),
+            result_dir=shard_dir(self.result_dir, index, count),
+            log_dir=shard_dir(self.log_dir, index, count),
+            journal_path=shard_journal_path(self.journal_path, index, count),
+            parquet_dir=shard_dir(self.parquet_dir, index, count),
+            capture_dir=shard_dir(self.capture_dir, index, count),
+        )
+
+    def __repr__(self):
+        changed = {k: v for k, v in self.as_dict().items() if v != DEFAULT_SETTINGS[k]}
+        return f"CrawlSettings({self.preset!r}, {changed})"
+
+
+# ---------------- 로그 ----------------
+def console_log(job, level, message):
+    print(f"[{job.index + 1}/{job.batch_total or '?'}] {message}")
+
+
+def quiet_log(job, level, message):
+    if level >= logging.ERROR:
+        console_log(job, level, message)
+
+
+class BatchLog:
+    # 배치마다 {log_dir}/batch_{n}.log 파일 + 콘솔 (배치가 끝나면 close(batch_num))
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+
+    def logger(self, batch_num):
+        logger = logging.getLogger(f"batch_{batch_num}")
+        logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+            handler = logging.FileHandler(f"{self.log_dir}/batch_{batch_num}.log", encoding='utf-8')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+            console = logging.StreamHandler()
+            console.setFormatter(formatter)
+            logger.addHandler(console)
+        return logger
+
+    def __call__(self, job, level, message):
+        self.logger(job.batch_num).log(level, f"[BATCH {job.batch_num}][{job.index}/{job.batch_total}] {message}")
+
+    def close(self, batch_num):
+        logger = logging.getLogger(f"batch_{batch_num}")
+        for handler in list(logger.handlers):
+            handler.close()
+            logger.removeHandler(handler)
+
+
+# ---------------- 수집 단계 ----------------
+class StaticTier:
+    # aiohttp 로 HTML 과 리다이렉트 체인을 가져온다 (static_fetch.fetch_static)
+    name = TIER_STATIC
+
+    def __init__(self):
+        self.session = None
+        self._sem = None
+
+    async def start(self, crawler):
+        settings = crawler.settings
+        self._sem = asyncio.Semaphore(settings.static_max_concurrent)
+        self.session = create_session(
+            max_connections=settings.static_max_concurrent,
+            user_agent=settings.user_agent,
+            timeout_sec=settings.static_timeout_sec,
+            verify_tls=settings.verify_tls,
+        )
+
+    async def fetch(self, crawler, job, url, retry=False, capture=None, shot=None):
+        async with self._sem:
+            with crawler.metrics.stage("static_fetch"):
+                result, reason = await fetch_static(
+                    self.session, url, timeouts=crawler.timeouts, retry=retry,
+                    analyzer=crawler.html_analyzer, capture=capture,
+                )
+        if reason is None:
+            crawler.log(job, logging.INFO, f"⚡ Static: {url} ({result['duration_sec']}s)")
+        return result, reason
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def stats(self):
+        return None
+
+
+class BrowserTier:
+    # Playwright (browser_pool.BrowserPool) 로 페이지를 띄우고 head 를 추출한다
+    name = TIER_BROWSER
+
+    def __init__(self):
+        self.pool = None
+        self.resource_policy = None
+        self._sem = None
+
+    async def start(self, crawler):
+        from browser_pool import BrowserPool   # playwright 는 브라우저 단계를 쓸 때만
+        from resource_policy import TRACKER_HOSTS, ResourcePolicy
+        settings = crawler.settings
+        self._sem = asyncio.Semaphore(settings.max_concurrent)
+        self.resource_policy = ResourcePolicy(
+            settings.block_resource_types, TRACKER_HOSTS if settings.block_trackers else ()
+        )
+        self.pool = BrowserPool(
+            size=settings.browser_pool_size,
+            max_pages_per_browser=settings.max_pages_per_browser,
+            max_memory_mb=settings.max_browser_memory_mb,
+        )
+        await self.pool.start()
+        crawler.metrics.gauge_sources["browser_memory_mb"] = self.pool.memory_mb
+
+    async def fetch(self, crawler, job, url, retry=False, capture=None, shot=None):
+        async with self._sem:
+            with crawler.metrics.stage("browser_total"):
+                return await self._extract(crawler, job, url, retry, capture, shot), None
+
+    async def _extract(self, crawler, job, url, retry, capture, shot):
+        from head_extract import extract_head
+        from timeout_policy import goto_with_deadlines
+        metrics, timeouts, analyzer = crawler.metrics, crawler.timeouts, crawler.html_analyzer
+        result = {
+            "original_url": url,
+            "final_url": None,
+            "redirect_chain": None,
+            "redirect_count": 0,
+            "head_elements": None,
+            "timeout": False,
+            "has_meta_refresh": False,
+            "meta_refresh_url": None,
+            "duration_sec": None,
+            "fetch_tier": TIER_BROWSER,
+            "timeout_sec": timeouts.deadline("dom_loaded", retry),
+        }
+
+        crawler.log(job, logging.INFO, f"▶️ Start: {url}")
+        start_time = time.time()
+
+        try:
+            context_started = time.perf_counter()
+            async with self.pool.new_context(user_agent=crawler.settings.user_agent,
+                                             ignore_https_errors=not crawler.settings.verify_tls) as context:
+                await self.resource_policy.install(context)
+                page = await context.new_page()
+                metrics.observe("browser_context", time.perf_counter() - context_started)
+
+                redirect_chain = []
+                page.on("response", lambda response: (
+                    redirect_chain.append({
+                        "url": response.url,
+                        "status": response.status,
+                        "location": response.headers.get("location", "")
+                    }) if response.status in BROWSER_REDIRECT_STATUSES else None
+                ))
+
+                try:
+                    with metrics.stage("navigation"):
+                        response = await goto_with_deadlines(page, url, timeouts, retry)
+                    result["final_url"] = page.url
+                    result["redirect_chain"] = None if not redirect_chain else json.dumps(redirect_chain, ensure_ascii=False)
+                    result["redirect_count"] = len(redirect_chain)
+
+                    with metrics.stage("page_content"):
+                        html = await page.evaluate(HEAD_HTML_JS, analyzer.max_bytes)
+                    with metrics.stage("html_analysis"):
+                        refresh_url = await analyzer.meta_refresh(html)
+                    if refresh_url:
+                        result["has_meta_refresh"] = True
+                        result["meta_refresh_url"] = refresh_url
+                    if capture is not None:
+                        # 정적 단계의 본문보다 JS 실행 후의 DOM 을 우선해서 저장
+                        with metrics.stage("capture_dom"):
+                            capture.update(
+                                body=(await page.content()).encode("utf-8"),
+                                status=response.status if response is not None else None,
+                                headers=[[h["name"], h["value"]] for h in await response.headers_array()] if response is not None else [],
+                                charset="utf-8",
+                                kind="dom",
+                                tier=TIER_BROWSER,
+                            )
+
+                    with metrics.stage("head_extract"):
+                        elements = await extract_head(page, crawler.settings.head_extraction_mode)
+
+                    if elements:
+                        result["head_elements"] = elements
+                    elif shot is not None:
+                        shot["image"] = await crawler.screenshots.capture(page)
+
+                except Exception as e:
+                    crawler.log(job, logging.WARNING, f"⚠️ Error loading {url}: {e}")
+                    metrics.record_error(e)
+                    if "Timeout" in str(e):
+                        result["timeout"] = True
+                    if shot is not None:
+                        shot["image"] = await crawler.screenshots.capture(page)
+        except Exception as e:
+            crawler.log(job, logging.ERROR, f"❌ Critical error for {url}: {e}")
+            metrics.record_error(e)
+            result["timeout"] = True
+            result["error_message"] = str(e)[:200]
+            if crawler.notifier is not None:
+                crawler.notifier.notify(
+                    "critical errors", f"[{job.index}/{job.batch_total}] {url}: {str(e)[:150]}",
+                    scope=f"batch {job.batch_num}",
+                )
+
+        result["duration_sec"] = round(time.time() - start_time, 2)
+        crawler.log(job, logging.INFO, f"✅ Done in {result['duration_sec']}s")
+        return result
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def stats(self):
+        return self.resource_policy.stats() if self.resource_policy is not None else None
+
+
+def default_tiers(settings):
+    tiers = ([StaticTier()] if settings.enable_static_tier else []) + ([BrowserTier()] if settings.enable_browser_tier else [])
+    if not tiers:
+        raise ValueError("enable_static_tier and enable_browser_tier are both False")
+    return tiers
+
+
+# ---------------- 출력 ----------------
+class ShardSink:
+    # work_queue.ShardWriter: 저널에 기록하고 배치가 다 모이면 batch_{n}.csv / parquet 로 확정
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, job, result):
+        self.writer.write(job, result)
+
+    def close(self):
+        pass
+
+
+class CsvFileSink:
+    # 끝나는 순서대로 CSV 한 파일에 한 행씩 추가 (pandas 불필요, 리스트 / dict 는 pandas 처럼 repr 로)
+    def __init__(self, path, na_rep="null", columns=RESULT_COLUMNS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.na_rep = na_rep
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=list(columns), restval=na_rep, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, job, result):
+        row = {"url_index": job.url_index}
+        for name, value in result.items():
+            row[name] = self.na_rep if value is None else value
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+# ---------------- 수집기 ----------------
+class Crawler:
+    """
+    async with Crawler(settings) as crawler:
+        async for job, result in crawler.crawl(jobs):      # URL 문자열 또는 work_queue.Job
+            ...
+        result = await crawler.fetch("example.com")         # URL 하나
+    tiers: 수집 단계 목록 (None 이면 default_tiers)
+    sinks: 결과마다 write(job, result) 를 부르는 출력 목록 (close() 는 Crawler 가 닫을 때)
+    log:   def log(job, level, message) (기본: 콘솔)
+    """
+
+    def __init__(self, settings=None, tiers=None, sinks=(), log=None):
+        self.settings = settings or CrawlSettings()
+        self.tiers = list(tiers) if tiers is not None else default_tiers(self.settings)
+        self.sinks = list(sinks)
+        self.log = log or console_log
+        self.metrics = Metrics()
+        self.timeouts = None
+        self.html_analyzer = None
+        self.cache = None
+        self.resolver = None
+        self.limiter = None
+        self.screenshots = None
+        self.archive = None
+        self.notifier = None
+        self.profiler = None
+        self.deferred = []      # 재시도 레인에서 기다리거나 재시도 중인 Job
+        self._retry_lane = None
+        self._reporters = []
+        self._started = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        s = self.settings
+        os.makedirs(s.log_dir, exist_ok=True)
+        self.timeouts = AdaptiveTimeouts(
+            quantile=s.timeout_quantile,
+            multiplier=s.timeout_multiplier,
+            retry_factor=s.retry_timeout_factor,
+            adaptive=s.adaptive_timeout,
+        )
+        self.html_analyzer = HtmlAnalyzer(s.html_analysis_pool, s.html_analysis_workers, s.head_scan_bytes)
+        self.limiter = HostLimiter(max_per_host=s.max_per_host, rate_per_sec=s.host_rate_per_sec, burst=s.host_burst)
+        if s.enable_cache:
+            os.makedirs(os.path.dirname(s.cache_path) or ".", exist_ok=True)
+            self.cache = ResultCache(
+                s.cache_path,
+                ttl_sec=s.cache_ttl_sec,
+                negative_ttl_sec=s.cache_negative_ttl_sec,
+                max_entries=s.cache_max_entries,
+            )
+        if s.enable_dns_prefetch:
+            self.resolver = DnsResolver(
+                nameservers=s.dns_nameservers,
+                timeout_sec=s.dns_timeout_sec,
+                max_concurrent=s.dns_max_concurrent,
+            )
+        if s.enable_screenshot:
+            from screenshot_pipeline import ScreenshotPipeline
+            os.makedirs(s.screenshot_dir, exist_ok=True)
+            self.screenshots = ScreenshotPipeline(
+                s.screenshot_dir,
+                fmt=s.screenshot_format,
+                quality=s.screenshot_quality,
+                clip=s.screenshot_clip,
+                with_phash=s.screenshot_phash,
+                workers=s.screenshot_workers,
+                queue_size=s.screenshot_queue,
+            )
+        if s.enable_capture:
+            from capture_archive import CaptureArchive  # zstandard 는 캡처할 때만 필요
+            self.archive = CaptureArchive(s.capture_dir)
+        if s.notify_sinks:
+            from notifier import Notifier, build_sinks
+            self.notifier = Notifier(
+                build_sinks(s.notify_sinks, file_path=f"{s.log_dir}/{s.notify_file}"),
+                window_sec=s.notify_window_sec,
+                max_per_minute=s.notify_max_per_minute,
+            )
+            await self.notifier.start()
+        if s.profiler:
+            self.profiler = WorkerProfiler(s.profiler, s.profile_sample_every, f"{s.log_dir}/profile.prof")
+
+        self.metrics.gauge_sources["dom_loaded_deadline_sec"] = lambda: self.timeouts.deadline("dom_loaded")
+        self.metrics.gauge_sources["deferred_retries"] = lambda: len(self.deferred)
+        for tier in self.tiers:
+            await tier.start(self)
+            self._started.append(tier)
+        if s.metrics_port:
+            self._reporters.append(MetricsServer(self.metrics, port=s.metrics_port + (s.shard[0] if s.shard else 0)))
+        if s.stats_file:
+            self._reporters.append(StatsFileWriter(self.metrics, f"{s.log_dir}/{s.stats_file}", s.stats_interval_sec))
+        for reporter in self._reporters:
+            await reporter.start()
+
+    async def close(self):
+        try:
+            for tier in reversed(self._started):
+                await tier.close()
+            self._started = []
+            for reporter in self._reporters:
+                await reporter.close()
+            self._reporters = []
+            if self.notifier is not None:
+                await self.notifier.close()
+                print(f"🔔 Notifications: {self.notifier.stats()}")
+            if self.profiler is not None:
+                self.profiler.dump()
+        finally:
+            if self.timeouts is not None:
+                print(f"⏱️ Timeouts: {self.timeouts.stats()}")
+            for tier in self.tiers:
+                stats = tier.stats()
+                if stats is not None:
+                    print(f"🚧 {tier.name} tier: {stats}")
+            if self.html_analyzer is not None:
+                print(f"🧮 HTML analysis: {self.html_analyzer.stats()}")
+                self.html_analyzer.close()
+            if self.screenshots is not None:
+                self.screenshots.close()
+                print(f"📸 Screenshots: {self.screenshots.stats()}")
+            if self.archive is not None:
+                print(f"📦 Capture archive: {self.archive.stats()}")
+                self.archive.close()
+            if self.resolver is not None:
+                print(f"🌐 DNS: {self.resolver.stats()}")
+                await self.resolver.close()
+            if self.cache is not None:
+                print(f"💾 Cache: {self.cache.stats()}")
+                self.cache.close()
+            for sink in self.sinks:
+                sink.close()
+
+    # ---------- URL 하나 ----------
+    def host_key(self, job):
+        # HostLimiter / run_queue(limiter=...) 가 쓰는 호스트 키
+        return host_of(with_scheme(as_job(job).url))
+
+    async def fetch(self, job, retry=False, defer=False, slot_held=False):
+        """
+        캐시 → DNS → 호스트 제한 → 수집 단계 → 스크린샷 / 캡처 저장 → 캐시 순서로 URL 하나를 처리한다.
+        defer=True 이고 타임아웃이 나면 self.deferred 에 넣고 None 을 돌려준다 (run_jobs 의 재시도 레인에서 다시)
+        slot_held=True: 호출한 쪽(run_queue(limiter=self.limiter))이 이미 호스트 슬롯을 잡았다
+        """
+        job = as_job(job)
+        url = with_scheme(job.url)
+        result = None
+        if self.cache is not None and not retry:
+            with self.metrics.stage("cache_lookup"):
+                result = self.cache.get(url)
+            if result is not None:
+                self.log(job, logging.INFO, f"💾 Cache hit: {url}")
+                if slot_held:
+                    self.limiter.refund(host_of(url))
+                return result
+        unconfirmed = False     # OS resolver 의 "이름 없음": resolver 장애일 수도 있으므로 캐시하지 않고 재시도 레인으로
+        if self.resolver is not None:
+            with self.metrics.stage("dns"):
+                status, _ = await self.resolver.resolve_url(url, refresh=retry)
+            if status in (DNS_NXDOMAIN, DNS_NONAME):
+                unconfirmed = status == DNS_NONAME
+                self.log(job, logging.INFO, f"🚫 {status.upper()}, skipped: {url}")
+                self.metrics.record_error(status.upper())
+                result = dns_failed_result(url, status)
+                if slot_held:
+                    self.limiter.refund(host_of(url))
+        capture = {} if self.archive is not None else None
+        shot = {} if self.screenshots is not None else None
+        if result is None and slot_held:
+            result = await self._fetch_tiers(job, url, retry, capture, shot)
+        elif result is None:
+            wait_started = time.perf_counter()
+            async with self.limiter.slot(host_of(url)):
+                self.metrics.observe("host_wait", time.perf_counter() - wait_started)
+                result = await self._fetch_tiers(job, url, retry, capture, shot)
+        if (result["timeout"] or unconfirmed) and defer and not retry:
+            # 재시도 레인에서 한 번 더 (결과 기록도 그때까지 미룬다)
+            reason = "DNS lookup failed" if unconfirmed else f"Timed out after {result['timeout_sec']}s"
+            self.log(job, logging.INFO, f"⏳ {reason}, queued for retry: {url}")
+            self.metrics.inc("deferred_total")
+            self.deferred.append(job)
+            if self._retry_lane is not None:
+                self._retry_lane.put_nowait(job)
+            return None
+        if shot and shot.get("image"):
+            # 촬영은 브라우저 슬롯 안에서, 인코딩 / 저장은 슬롯을 돌려준 뒤 워커에서
+            with self.metrics.stage("screenshot"):
+                result.update(await self.screenshots.submit(job.url_index, shot["image"]))
+        if capture:
+            with self.metrics.stage("capture_write"):
+                await self.archive.put_async(job.url_index, result, capture)
+        if self.cache is not None and not unconfirmed:
+            result["cache_status"] = CACHE_MISS
+            self.cache.put(url, result)
+        return result
+
+    async def _fetch_tiers(self, job, url, retry, capture, shot):
+        for i, tier in enumerate(self.tiers):
+            result, reason = await tier.fetch(self, job, url, retry, capture, shot)
+            if reason is None or i == len(self.tiers) - 1:
+                return result
+            self.log(job, logging.INFO, f"↗️ Escalate to {self.tiers[i + 1].name} ({reason}): {url}")
+            self.metrics.inc("escalations_total", reason)
+
+    # ---------- 여러 URL ----------
+    async def run_jobs(self, jobs, handler, workers, queue_size=None, on_enqueue=None):
+        """
+        run_queue(limiter=self.limiter) + 재시도 레인.
+        handler(job, retry=False) 는 fetch(job, retry, defer=..., slot_held=not retry) 를 부른다.
+        fetch 가 미룬 Job 은 본 큐와 나란히 도는 재시도 레인 워커(retry_workers)가 바로 다시 가져온다
+        (입력을 다 읽을 때까지 기다리지 않으므로 그 배치도 실행 중에 확정된다).
+        """
+        retry_workers = self.settings.retry_workers or max(1, workers // 4)
+        self._retry_lane = lane = asyncio.Queue()
+
+        async def retry_worker():
+            while True:
+                job = await lane.get()
+                if job is None:
+                    return
+                try:
+                    # 재시도는 드물고 워커도 따로이므로 호스트 슬롯은 fetch 안에서 기다린다
+                    await handler(job, retry=True)
+                except Exception as e:
+                    self.log(job, logging.ERROR, f"❌ Unhandled error while retrying {job.url}: {e}")
+                finally:
+                    self.deferred.remove(job)
+
+        retriers = [asyncio.ensure_future(retry_worker()) for _ in range(retry_workers)]
+        try:
+            await run_queue(jobs, handler, workers=workers, queue_size=queue_size, on_enqueue=on_enqueue,
+                            limiter=self.limiter, key=self.host_key)
+            for _ in retriers:
+                lane.put_nowait(None)
+            await asyncio.gather(*retriers)
+        finally:
+            self._retry_lane = None
+            for task in retriers:
+                task.cancel()
+            await asyncio.gather(*retriers, return_exceptions=True)
+
+    async def crawl(self, jobs, workers=None):
+        """
+        async for job, result in crawler.crawl(jobs): 끝나는 순서대로 (입력 순서가 아님)
+        jobs: URL 문자열 / Job 의 이터러블 (제너레이터 가능, 큐가 차면 읽기를 멈춘다)
+        타임아웃 난 URL 은 retry_timeouts 가 켜져 있으면 재시도 레인에서 한 번 더 가져와서 내보낸다.
+        """
+        s = self.settings
+        workers = workers or (s.static_max_concurrent if s.enable_static_tier else s.max_concurrent)
+        done = asyncio.Queue(maxsize=s.queue_size)
+        finished = object()
+
+        async def handle(job, retry=False):
+            with self.metrics.track():
+                result = await self.fetch(job, retry, defer=s.retry_timeouts, slot_held=not retry)
+            if result is None:
+                return
+            self.metrics.record_result(result)
+            for sink in self.sinks:
+                sink.write(job, result)
+            await done.put((job, result))
+
+        handler = self.profiler.wrap(handle) if self.profiler is not None else handle
+        prefetch = (lambda job: self.resolver.prefetch(with_scheme(job.url))) if self.resolver is not None else None
+
+        async def run():
+            try:
+                await self.run_jobs(to_jobs(jobs), handler, workers, queue_size=s.queue_size, on_enqueue=prefetch)
+            finally:
+                await done.put(finished)
+
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                item = await done.get()
+                if item is finished:
+                    break
+                yield item
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+
+def as_job(item, index=0, total=None):
+    return item if isinstance(item, Job) else Job(1, index, total, item, index)
+
+
+def to_jobs(items):
+    # URL 문자열이면 입력 순서대로 url_index 를 붙인다
+    total = len(items) if hasattr(items, "__len__") else None
+    for i, item in enumerate(items):
+        yield as_job(item, i, total)
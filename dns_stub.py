@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import socket
+import struct
+
+# 로컬 DNS stub resolver (host_scheduler.DnsResolver 확인용)
+# records 에 있는 이름은 A 레코드로, 없는 이름은 NXDOMAIN 으로 답한다.
+# 사용 예
+#   python dns_stub.py --port 5353 --records '{"example.test": "127.0.0.1"}'
+#   DNS_NAMESERVERS = ['127.0.0.1:5353']
+
+
+def _read_name(data, pos):
+    labels = []
+    while data[pos]:
+        length = data[pos]
+        labels.append(data[pos + 1:pos + 1 + length].decode("ascii", errors="replace"))
+        pos += 1 + length
+    return ".".join(labels).lower(), pos + 1
+
+
+class StubDnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, records, ttl=60):
+        self.records = {name.lower().rstrip("."): ip for name, ip in records.items()}
+        self.ttl = ttl
+        self.queries = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        try:
+            qid, _, _, _, _, _ = struct.unpack(">HHHHHH", data[:12])
+            name, end = _read_name(data, 12)
+            qtype, _ = struct.unpack(">HH", data[end:end + 4])
+        except (struct.error, IndexError):
+            return
+        question = data[12:end + 4]
+        ip = self.records.get(name)
+        if ip is None:
+            flags, answers = 0x8183, b""          # QR RD RA + NXDOMAIN
+        elif qtype != 1:
+            flags, answers = 0x8180, b""          # 이름은 있지만 A 이외의 레코드 없음
+        else:
+            flags = 0x8180
+            answers = b"\xc0\x0c" + struct.pack(">HHIH", 1, 1, self.ttl, 4) + socket.inet_aton(ip)
+        header = struct.pack(">HHHHHH", qid, flags, 1, 1 if answers else 0, 0, 0)
+        self.transport.sendto(header + question + answers, addr)
+
+
+async def start_stub(records, host="127.0.0.1", port=0, ttl=60):
+    # (transport, protocol, 실제 포트) — port=0 이면 빈 포트를 잡는다
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: StubDnsProtocol(records, ttl), local_addr=(host, port)
+    )
+    return transport, protocol, transport.get_extra_info("sockname")[1]
+
+
+async def _serve(records, host, port):
+    transport, protocol, port = await start_stub(records, host, port)
+    print(f"🧪 Stub DNS listening on {host}:{port} ({len(records)} records)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        transport.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub DNS server for testing the resolver stage.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5353)
+    parser.add_argument('--records', default='{}', help='JSON object of hostname -> IPv4')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(json.loads(args.records), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import random
+import socket
+import struct
+from aiohttp import web
+
+# 벤치마크용 로컬 fixture 서버 (실제 수집 대상과 비슷한 응답 종류를 흉내 낸다)
+# 사용법: python fixture_server.py --port 8740 --hosts 32
+#   → http://127.0.0.1:8740/ok/1 , http://127.0.0.2:8740/redirect/301/3/1 ...
+# 호스트별 제한(HostLimiter)이 실제처럼 걸리도록 127.0.0.1 ~ 127.0.0.{hosts} 각각에서 같은 포트로 받는다
+# (127.0.0.0/8 전체가 루프백인 Linux 기준, 다른 OS 에서는 --hosts 1)
+# 모든 응답은 경로만으로 정해진다 (같은 URL 목록이면 같은 부하 → 실행 간 비교 가능)
+
+REDIRECT_CODES = (301, 302, 307, 308)
+KINDS = (
+    "ok", "redirect", "meta_refresh", "js_redirect", "slow", "slow_body",
+    "hang", "huge_head", "empty_head", "reset", "status",
+)
+DEFAULT_MIX = {
+    "ok": 40, "redirect": 15, "meta_refresh": 5, "js_redirect": 4, "slow": 10, "slow_body": 3,
+    "hang": 2, "huge_head": 4, "empty_head": 6, "reset": 3, "status": 8,
+}
+READY_LINE = "FIXTURE READY"
+
+
+def parse_mix(text):
+    # "ok=40,redirect=15,hang=2" → {"ok": 40, ...} (적지 않은 종류는 0)
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown fixture kind: {kind!r} (choose from {KINDS})")
+        mix[kind] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError(f"Traffic mix has no weight: {text!r}")
+    return mix
+
+
+def host_for(i):
+    return f"127.0.0.{1 + i}"
+
+
+def traffic(count, port, mix=None, hosts=1, seed=0):
+    """
+    (kind, url, expect) 목록을 만든다. seed 가 같으면 같은 목록.
+    expect: 결과를 검사할 때 쓰는 값 (redirect 횟수, 최종 경로 등)
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds = [k for k in KINDS if mix.get(k)]
+    weights = [mix[k] for k in kinds]
+    items = []
+    for n in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        base = f"http://{host_for(rng.randrange(hosts))}:{port}"
+        expect = {"final_path": f"/ok/{n}"}
+        if kind == "redirect":
+            hops = rng.randint(1, 5)
+            code = rng.choice(REDIRECT_CODES + ("mix",))
+            path = f"/redirect/{code}/{hops}/{n}"
+            expect["redirects"] = hops
+        elif kind == "slow":
+            path = f"/slow/{rng.randint(200, 3000)}/{n}"
+        elif kind == "slow_body":
+            path = f"/slow_body/{rng.randint(500, 3000)}/{n}"
+        elif kind == "huge_head":
+            path = f"/huge_head/{rng.choice((256, 1024, 4096))}/{n}"
+        elif kind == "status":
+            path = f"/status/{rng.choice((403, 404, 500, 503))}/{n}"
+        else:
+            path = f"/{kind}/{n}"
+        if kind not in ("redirect", "meta_refresh", "js_redirect"):
+            expect["final_path"] = path
+        items.append((kind, base + path, expect))
+    return items
+
+
+def _head(n, extra=""):
+    return (
+        f"<title>Account verification {n}</title>"
+        '<meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<meta name="description" content="Please confirm your account details ({n})">'
+        '<meta property="og:title" content="Sign in">'
+        '<link rel="icon" href="/favicon.ico">'
+        '<link rel="stylesheet" href="/static/app.css">'
+        '<script src="/static/app.js"></script>'
+        f"{extra}"
+    )
+
+
+def page(n, body_kb, head_extra="", body_extra="", head=None):
+    paragraph = "<div class=row><p>Lorem ipsum dolor sit amet, consectetur adipiscing.</p></div>"
+    body = paragraph * max(1, body_kb * 1024 // len(paragraph))
+    head = _head(n, head_extra) if head is None else head
+    return f"<!DOCTYPE html><html><head>{head}</head><body>{body_extra}{body}</body></html>"
+
+
+def build_app(body_kb=20, hang_sec=60):
+    def html(text, status=200):
+        return web.Response(text=text, status=status, content_type="text/html")
+
+    async def ok(request):
+        return html(page(request.match_info["n"], body_kb))
+
+    async def redirect(request):
+        code, hops, n = request.match_info["code"], int(request.match_info["hops"]), request.match_info["n"]
+        if hops <= 0:
+            raise web.HTTPFound(f"/ok/{n}")
+        status = REDIRECT_CODES[hops % len(REDIRECT_CODES)] if code == "mix" else int(code)
+        location = f"/ok/{n}" if hops == 1 else f"/redirect/{code}/{hops - 1}/{n}"
+        return web.Response(status=status, headers={"Location": location})
+
+    async def meta_refresh(request):
+        n = request.match_info["n"]
+        return html(page(n, body_kb, head_extra=f'<meta http-equiv="refresh" content="0; url=/ok/{n}">'))
+
+    async def js_redirect(request):
+        n = request.match_info["n"]
+        return html(page(n, 1, body_extra=f"<script>window.location.href = '/ok/{n}';</script>"))
+
+    async def slow(request):
+        await asyncio.sleep(int(request.match_info["ms"]) / 1000)
+        return html(page(request.match_info["n"], body_kb))
+
+    async def slow_body(request):
+        # 헤더는 바로 보내고 본문을 10 조각으로 나눠 천천히 보낸다
+        body = page(request.match_info["n"], body_kb).encode()
+        pause = int(request.match_info["ms"]) / 1000 / 10
+        response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        await response.prepare(request)
+        step = len(body) // 10 + 1
+        try:
+            for start in range(0, len(body), step):
+                await response.write(body[start:start + step])
+                await asyncio.sleep(pause)
+            await response.write_eof()
+        except ConnectionResetError:
+            pass    # 클라이언트가 타임아웃으로 먼저 끊은 경우
+        return response
+
+    async def hang(request):
+        # 응답 헤더를 보내지 않는 멈춘 연결
+        await asyncio.sleep(hang_sec)
+        return html(page(request.match_info["n"], body_kb))
+
+    async def huge_head(request):
+        # meta 가 아주 많고 큰 인라인 스크립트가 있는 head (HEAD_SCAN_BYTES 를 넘기는 크기 포함)
+        n, kb = request.match_info["n"], int(request.match_info["kb"])
+        metas = "".join(f'<meta name="k{i}" content="{"x" * 40}">' for i in range(kb * 4))
+        script = "<script>var data = '" + "a" * max(0, kb * 1024 - len(metas)) + "';</script>"
+        return html(page(n, body_kb, head_extra=metas + script))
+
+    async def empty_head(request):
+        return html(page(request.match_info["n"], body_kb, head=""))
+
+    async def reset(request):
+        # SO_LINGER 0 으로 닫아 RST 를 보낸다 (응답 없이 연결 재설정)
+        sock = request.transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        request.transport.abort()
+        return web.Response(status=500)   # 이미 끊긴 연결이라 보내지지 않는다
+
+    async def status(request):
+        return html(page(request.match_info["n"], body_kb), status=int(request.match_info["code"]))
+
+    async def static_asset(request):
+        return web.Response(body=b"", content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/ok/{n}", ok)
+    app.router.add_get("/redirect/{code}/{hops}/{n}", redirect)
+    app.router.add_get("/meta_refresh/{n}", meta_refresh)
+    app.router.add_get("/js_redirect/{n}", js_redirect)
+    app.router.add_get("/slow/{ms}/{n}", slow)
+    app.router.add_get("/slow_body/{ms}/{n}", slow_body)
+    app.router.add_get("/hang/{n}", hang)
+    app.router.add_get("/huge_head/{kb}/{n}", huge_head)
+    app.router.add_get("/empty_head/{n}", empty_head)
+    app.router.add_get("/reset/{n}", reset)
+    app.router.add_get("/status/{code}/{n}", status)
+    app.router.add_get("/static/{name}", static_asset)
+    app.router.add_get("/favicon.ico", static_asset)
+    return app
+
+
+async def start_server(port, hosts=1, body_kb=20, hang_sec=60):
+    # 반환: AppRunner (끝낼 때 await runner.cleanup())
+    runner = web.AppRunner(build_app(body_kb, hang_sec), access_log=None, handle_signals=False)
+    await runner.setup()
+    for i in range(hosts):
+        await web.TCPSite(runner, host_for(i), port, backlog=1024).start()
+    return runner
+
+
+async def serve(args):
+    runner = await start_server(args.port, args.hosts, args.body_kb, args.hang_sec)
+    # bench_pipeline.py 가 이 줄을 기다린다
+    print(f"{READY_LINE} http://{host_for(0)}:{args.port} ({args.hosts} hosts)", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8740)
+    parser.add_argument("--hosts", type=int, default=1, help="Serve on 127.0.0.1 .. 127.0.0.N (Linux loopback)")
+    parser.add_argument("--body-kb", type=int, default=20, help="Body size of ordinary pages")
+    parser.add_argument("--hang-sec", type=float, default=60, help="How long /hang keeps the connection silent")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
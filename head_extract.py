@@ -0,0 +1,58 @@
+# <head> 의 자식 요소(script/style 제외)를 추출하는 모듈
+# 결과 구조는 기존 CSV 와 동일: [{"tag": ..., "attributes": {...}, "text": ...}, ...]
+
+SKIP_TAGS = ("style", "script")
+
+# 한 번의 evaluate 로 head 전체를 수집 (요소 수와 관계없이 IPC 왕복 1회)
+HEAD_ELEMENTS_JS = """
+(skipTags) => {
+    const head = document.head;
+    if (!head) return [];
+    const out = [];
+    for (const el of head.children) {
+        const tag = el.tagName.toLowerCase();
+        if (skipTags.includes(tag)) continue;
+        const attributes = {};
+        for (const attr of el.attributes) attributes[attr.name] = attr.value;
+        const text = el.innerText;
+        out.push({tag: tag, attributes: attributes, text: text ? text.trim() : ""});
+    }
+    return out;
+}
+"""
+
+
+async def extract_head_single_pass(page):
+    return await page.evaluate(HEAD_ELEMENTS_JS, list(SKIP_TAGS))
+
+
+async def extract_head_per_element(page):
+    # 기존 방식: 요소마다 tagName / attributes / inner_text 로 3회 왕복
+    elements = []
+    head_children = await page.query_selector_all("head > *")
+    for tag in head_children:
+        tag_name = await tag.evaluate("(el) => el.tagName.toLowerCase()")
+        if tag_name in SKIP_TAGS:
+            continue
+        attributes = await tag.evaluate("(el) => Object.fromEntries([...el.attributes].map(attr => [attr.name, attr.value]))")
+        text = await tag.inner_text()
+        elements.append({
+            "tag": tag_name,
+            "attributes": attributes,
+            "text": text.strip() if text else ""
+        })
+    return elements
+
+
+EXTRACTION_MODES = {
+    "single_pass": extract_head_single_pass,
+    "per_element": extract_head_per_element,
+}
+
+
+async def extract_head(page, mode="single_pass"):
+    try:
+        extractor = EXTRACTION_MODES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown head extraction mode: {mode!r} (choose from {list(EXTRACTION_MODES)})")
+    return await extractor(page)
@@ -0,0 +1,359 @@
+import asyncio
+import ipaddress
+import math
+import random
+import socket
+import struct
+import time
+from contextlib import asynccontextmanager
+from sharding import host_of
+
+# 호스트 단위 스케줄링
+# - HostLimiter: 호스트별 동시 접속 수 + 토큰 버킷(초당 요청 수) 제한
+#   run_queue(limiter=...) 는 토큰이 있는 호스트의 Job 만 워커에 넘긴다 (막힌 호스트가 워커를 붙잡지 않도록)
+# - DnsResolver: 호스트 이름을 미리 한꺼번에 비동기로 해석하고 결과를 캐시
+#   NXDOMAIN 인 호스트는 페이지를 띄우지 않고 바로 실패 처리한다
+#   OS resolver 의 EAI_NONAME 은 resolver 가 없거나 죽었을 때도 나오므로 NXDOMAIN 이 아니라 DNS_NONAME
+#   (잠깐만 캐시하고, 수집기는 결과 캐시에 넣지 않고 재시도 레인으로 보낸다)
+#   nameservers 를 주면 내장 UDP 클라이언트로 직접 질의 (로컬 stub resolver 로 테스트 가능, dns_stub.py)
+#   주지 않으면 OS resolver(getaddrinfo) 사용
+
+DNS_OK = "ok"
+DNS_NXDOMAIN = "nxdomain"     # 네임서버의 RCODE 3 (내장 UDP 클라이언트만)
+DNS_NONAME = "noname"         # OS resolver 가 "그런 이름 없음" 이라고 한 경우 (확인되지 않은 실패)
+DNS_NODATA = "nodata"
+DNS_ERROR = "error"
+
+# getaddrinfo 가 "그런 이름 없음" 으로 답할 때의 에러 코드 (Linux / macOS / Windows)
+_GAI_NONAME = {getattr(socket, "EAI_NONAME", -2), 11001}
+_GAI_NODATA = {getattr(socket, "EAI_NODATA", -5), 11004}
+
+
+class _HostState:
+    __slots__ = ("running", "waiting", "tokens", "updated", "waiters")
+
+    def __init__(self, burst):
+        self.running = 0        # 슬롯을 잡고 실행 중인 수
+        self.waiting = 0        # slot() 에서 기다리는 수
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waiters = []       # release 때 깨울 slot() 대기자
+
+
+class HostLimiter:
+    """
+    호스트별 동시 접속 수(max_per_host) + 토큰 버킷(rate_per_sec, burst)
+    - try_acquire / release: 기다리지 않는 버전 (work_queue.run_queue 가 막힌 호스트의 Job 을 따로 세워 두는 데 쓴다)
+    - slot(): 잡을 수 있을 때까지 기다리는 async context manager (URL 하나씩 가져올 때)
+    """
+
+    def __init__(self, max_per_host=2, rate_per_sec=1.0, burst=3, cleanup_every=1000):
+        self.max_per_host = max_per_host
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.cleanup_every = cleanup_every
+        self._hosts = {}
+        self._releases = 0
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.burst)
+        return state
+
+    def try_acquire(self, host):
+        # 슬롯과 토큰을 바로 잡을 수 있으면 잡고 0, 아니면 다시 시도할 때까지의 초 (동시 접속이 꽉 찼으면 inf)
+        state = self._state(host)
+        if state.running >= self.max_per_host:
+            return math.inf
+        if self.rate_per_sec:
+            now = time.monotonic()
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate_per_sec)
+            state.updated = now
+            if state.tokens < 1:
+                return (1 - state.tokens) / self.rate_per_sec
+            state.tokens -= 1
+        state.running += 1
+        return 0
+
+    def release(self, host):
+        state = self._hosts[host]
+        state.running -= 1
+        waiters, state.waiters = state.waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._releases += 1
+        if self._releases % self.cleanup_every == 0:
+            self._cleanup()
+
+    def refund(self, host):
+        # 잡은 토큰을 돌려준다 (캐시 적중 / NXDOMAIN 처럼 실제로 접속하지 않은 경우)
+        state = self._hosts.get(host)
+        if state is not None and self.rate_per_sec:
+            state.tokens = min(self.burst, state.tokens + 1)
+
+    @asynccontextmanager
+    async def slot(self, host):
+        state = self._state(host)
+        state.waiting += 1
+        try:
+            while True:
+                wait = self.try_acquire(host)
+                if not wait:
+                    break
+                waiter = asyncio.get_running_loop().create_future()
+                state.waiters.append(waiter)
+                await asyncio.wait({waiter}, timeout=None if wait == math.inf else wait)
+        finally:
+            state.waiting -= 1
+        try:
+            yield
+        finally:
+            self.release(host)
+
+    def _cleanup(self):
+        # 아무도 쓰지 않고 토큰이 가득 찬 호스트는 지워서 메모리를 일정하게 유지
+        now = time.monotonic()
+        full_after = self.burst / self.rate_per_sec if self.rate_per_sec else 0
+        idle = [
+            host for host, state in self._hosts.items()
+            if state.running == 0 and state.waiting == 0 and now - state.updated >= full_after
+        ]
+        for host in idle:
+            del self._hosts[host]
+
+
+# ---------------- DNS ----------------
+def _encode_name(name):
+    out = b""
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("idna")
+        if not 0 < len(raw) < 64:
+            raise ValueError(f"Invalid DNS label in {name!r}")
+        out += bytes([len(raw)]) + raw
+    return out + b"\x00"
+
+
+def build_query(qid, name, qtype=1):
+    header = struct.pack(">HHHHHH", qid, 0x0100, 1, 0, 0, 0)  # RD=1, QDCOUNT=1
+    return header + _encode_name(name) + struct.pack(">HH", qtype, 1)
+
+
+def _skip_name(data, pos):
+    while True:
+        length = data[pos]
+        if length & 0xC0 == 0xC0:
+            return pos + 2
+        if length == 0:
+            return pos + 1
+        pos += 1 + length
+
+
+def parse_response(data):
+    # (rcode, [IPv4 주소, ...], 최소 TTL)
+    _, flags, qdcount, ancount, _, _ = struct.unpack(">HHHHHH", data[:12])
+    rcode = flags & 0x000F
+    pos = 12
+    for _ in range(qdcount):
+        pos = _skip_name(data, pos) + 4
+    addresses, ttl_min = [], None
+    for _ in range(ancount):
+        pos = _skip_name(data, pos)
+        rtype, _, ttl, rdlen = struct.unpack(">HHIH", data[pos:pos + 10])
+        pos += 10
+        if rtype == 1 and rdlen == 4:
+            addresses.append(socket.inet_ntoa(data[pos:pos + 4]))
+            ttl_min = ttl if ttl_min is None else min(ttl_min, ttl)
+        pos += rdlen
+    return rcode, addresses, ttl_min
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.pending = {}
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < 12:
+            return
+        qid = int.from_bytes(data[:2], "big")
+        future = self.pending.pop(qid, None)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        pass
+
+
+def _parse_nameserver(spec):
+    # "8.8.8.8" / "127.0.0.1:5353"
+    host, _, port = spec.partition(":")
+    return host, int(port) if port else 53
+
+
+class DnsResolver:
+    def __init__(self, nameservers=None, timeout_sec=2.0, retries=2, max_concurrent=100,
+                 ttl_sec=3600, negative_ttl_sec=3600, noname_ttl_sec=30, max_entries=200_000):
+        self.nameservers = [_parse_nameserver(ns) for ns in nameservers] if nameservers else None
+        self.timeout_sec = timeout_sec
+        self.retries = retries
+        self.ttl_sec = ttl_sec
+        self.negative_ttl_sec = negative_ttl_sec
+        self.noname_ttl_sec = noname_ttl_sec
+        self.max_entries = max_entries
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self._cache = {}      # host -> (status, addresses, expires_at)
+        self._inflight = {}   # host -> Future
+        self._protocols = {}
+        self.lookups = 0
+        self.cache_hits = 0
+
+    async def close(self):
+        for protocol in self._protocols.values():
+            if protocol.transport is not None:
+                protocol.transport.close()
+        self._protocols.clear()
+        for task in list(self._inflight.values()):
+            task.cancel()
+
+    def prefetch(self, url):
+        # 결과를 기다리지 않고 해석만 시작해 둔다 (큐에 넣을 때 호출)
+        host = host_of(url)
+        if self._cached(host) is None and host not in self._inflight:
+            self._start(host)
+
+    async def resolve_url(self, url, refresh=False):
+        return await self.resolve(host_of(url), refresh)
+
+    async def resolve(self, host, refresh=False):
+        # refresh=True: 확인되지 않은 실패(DNS_NONAME)는 캐시를 무시하고 다시 묻는다 (재시도 레인)
+        if refresh and self._cache.get(host, (None,))[0] == DNS_NONAME:
+            del self._cache[host]
+        cached = self._cached(host)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        task = self._inflight.get(host) or self._start(host)
+        return await asyncio.shield(task)
+
+    def _cached(self, host):
+        entry = self._cache.get(host)
+        if entry is None:
+            return None
+        status, addresses, expires_at = entry
+        if time.monotonic() > expires_at:
+            del self._cache[host]
+            return None
+        return status, addresses
+
+    def _start(self, host):
+        task = asyncio.ensure_future(self._lookup(host))
+        self._inflight[host] = task
+        task.add_done_callback(lambda _t, host=host: self._inflight.pop(host, None))
+        return task
+
+    async def _lookup(self, host):
+        try:
+            ipaddress.ip_address(host)
+            return DNS_OK, [host]  # IP 리터럴은 해석할 필요 없음
+        except ValueError:
+            pass
+        async with self._sem:
+            self.lookups += 1
+            if self.nameservers:
+                status, addresses, ttl = await self._query_nameservers(host)
+            else:
+                status, addresses, ttl = await self._query_system(host)
+        if status != DNS_ERROR:
+            if status == DNS_NONAME:
+                ttl = self.noname_ttl_sec
+            elif ttl is None:
+                ttl = self.ttl_sec if status == DNS_OK else self.negative_ttl_sec
+            if len(self._cache) >= self.max_entries:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[host] = (status, addresses, time.monotonic() + min(ttl, self.ttl_sec))
+        return status, addresses
+
+    async def _query_system(self, host):
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await asyncio.wait_for(
+                loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM),
+                timeout=self.timeout_sec * (self.retries + 1),
+            )
+        except socket.gaierror as e:
+            if e.errno in _GAI_NONAME:
+                return DNS_NONAME, [], None
+            if e.errno in _GAI_NODATA:
+                return DNS_NODATA, [], None
+            return DNS_ERROR, [], None
+        except (asyncio.TimeoutError, OSError, UnicodeError):
+            return DNS_ERROR, [], None
+        return DNS_OK, sorted({info[4][0] for info in infos}), None
+
+    async def _protocol_for(self, server):
+        protocol = self._protocols.get(server)
+        if protocol is None:
+            loop = asyncio.get_running_loop()
+            _, protocol = await loop.create_datagram_endpoint(_DnsProtocol, remote_addr=server)
+            self._protocols[server] = protocol
+        return protocol
+
+    async def _query_nameservers(self, host):
+        try:
+            _encode_name(host)
+        except (ValueError, UnicodeError):
+            return DNS_NXDOMAIN, [], None
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            server = self.nameservers[attempt % len(self.nameservers)]
+            protocol = await self._protocol_for(server)
+            qid = random.randrange(1 << 16)
+            while qid in protocol.pending:
+                qid = random.randrange(1 << 16)
+            future = loop.create_future()
+            protocol.pending[qid] = future
+            try:
+                protocol.transport.sendto(build_query(qid, host))
+                data = await asyncio.wait_for(future, timeout=self.timeout_sec)
+            except (asyncio.TimeoutError, OSError):
+                continue
+            finally:
+                protocol.pending.pop(qid, None)
+            try:
+                rcode, addresses, ttl = parse_response(data)
+            except (struct.error, IndexError):
+                continue
+            if rcode == 3:
+                return DNS_NXDOMAIN, [], None
+            if rcode != 0:
+                continue  # SERVFAIL 등은 다른 서버로 재시도
+            return (DNS_OK if addresses else DNS_NODATA), addresses, ttl
+        return DNS_ERROR, [], None
+
+    def stats(self):
+        counts = {}
+        for status, _, _ in self._cache.values():
+            counts[status] = counts.get(status, 0) + 1
+        return {"lookups": self.lookups, "cache_hits": self.cache_hits, "cached": counts}
+
+
+def dns_failed_result(url, status):
+    # 페이지를 띄우지 않고 만드는 실패 행 (다른 단계와 같은 스키마)
+    return {
+        "original_url": url,
+        "final_url": None,
+        "redirect_chain": None,
+        "redirect_count": 0,
+        "head_elements": None,
+        "timeout": False,
+        "has_meta_refresh": False,
+        "meta_refresh_url": None,
+        "duration_sec": 0.0,
+        "fetch_tier": "dns",
+        "error_message": status.upper(),
+    }
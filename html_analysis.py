@@ -0,0 +1,194 @@
+import asyncio
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from head_extract import SKIP_TAGS
+
+# HTML 분석 단계
+# - head 영역만 html.parser 토크나이저로 조금씩(FEED_CHUNK) 읽다가 <body> / </html> 를 만나면 멈춘다
+# - max_bytes 이상은 읽지 않는다 (수 MB 짜리 페이지, 끝나지 않는 속성 나열 등)
+# - meta refresh 는 속성 순서 / 따옴표 유무 / 대소문자와 관계없이 http-equiv 와 content 로 판정
+# - HtmlAnalyzer 가 프로세스 풀(기본) / 스레드 풀에서 실행해 이벤트 루프(동시에 도는 fetch 들)를 막지 않는다
+#   re / html.parser 는 GIL 을 잡은 채로 돌기 때문에 스레드 풀은 오래 걸리는 페이지 하나에 루프가 같이 멈춘다
+#   (신뢰할 수 없는 HTML 은 process, thread 는 fork 비용을 피하고 싶은 짧은 테스트용)
+
+HEAD_SCAN_BYTES = 512 * 1024
+FEED_CHUNK = 64 * 1024
+INLINE_BELOW = 8 * 1024   # 이보다 작은 HTML 은 풀로 보내지 않고 바로 처리 (전달 비용이 더 크다)
+
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr", "basefont", "bgsound", "frame", "keygen",
+))
+# BeautifulSoup 처럼 공백으로 나눠 다시 합치는 속성 (class="a  b" -> "a b")
+MULTI_VALUED_ATTRS = frozenset(("class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"))
+
+# 브라우저 단계: page.content() 대신 직렬화한 HTML 의 앞부분만 가져온다 (IPC 로 수 MB 를 넘기지 않도록)
+HEAD_HTML_JS = "(maxChars) => document.documentElement ? document.documentElement.outerHTML.slice(0, maxChars) : ''"
+
+# "5", "0;url=...", "0; URL='...'", "0,url=...", "0;http://..." (HTML 표준의 refresh 파싱과 같은 범위)
+REFRESH_CONTENT_RE = re.compile(r"^\s*[\d.]+\s*[;,]?\s*(?:url\s*=\s*)?(.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def parse_refresh_content(content):
+    # content 속성에서 이동할 URL 을 꺼낸다 (URL 이 없으면 None)
+    match = REFRESH_CONTENT_RE.match(content or "")
+    if not match:
+        return None
+    url = match.group(1).strip()
+    if url[:1] in ("'", '"'):
+        quote = url[0]
+        url = url[1:].split(quote, 1)[0]
+    url = url.strip()
+    return url or None
+
+
+class _StopScan(Exception):
+    # head 를 다 읽으면 feed() 중간이라도 바로 빠져나온다
+    pass
+
+
+class _HeadScanner(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.elements = []
+        self.meta_refresh_url = None
+        self.done = False
+        self._in_head = False
+        self._depth = 0         # head 의 자식 요소 안에서의 깊이
+        self._current = None    # 텍스트를 모으는 중인 head 자식 요소
+        self._text = []
+
+    def _open_child(self, tag, attrs, void):
+        attributes = {}
+        for name, value in attrs:
+            value = "" if value is None else value
+            if name in MULTI_VALUED_ATTRS:
+                value = " ".join(value.split())
+            attributes[name] = value
+        if tag not in SKIP_TAGS:
+            self._current = {"tag": tag, "attributes": attributes, "text": ""}
+            self._text = []
+            self.elements.append(self._current)
+        if void:
+            self._close_child()
+        else:
+            self._depth = 1
+
+    def _close_child(self):
+        if self._current is not None:
+            self._current["text"] = "".join(self._text).strip()
+        self._current = None
+        self._depth = 0
+
+    def _check_refresh(self, attrs):
+        values = {name: value or "" for name, value in attrs}
+        if values.get("http-equiv", "").strip().lower() == "refresh" and self.meta_refresh_url is None:
+            self.meta_refresh_url = parse_refresh_content(values.get("content"))
+
+    def _start(self, tag, attrs, void):
+        if self.done:
+            return
+        if tag == "meta":
+            self._check_refresh(attrs)
+        if tag == "body":
+            self._finish()
+        elif tag == "head" and self._depth == 0:
+            self._in_head = True
+        elif self._in_head:
+            if self._depth == 0:
+                self._open_child(tag, attrs, void)
+            elif not void:
+                self._depth += 1
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, True)
+
+    def handle_endtag(self, tag):
+        if self.done or not self._in_head:
+            if tag == "html":
+                self._finish()
+            return
+        if self._depth:
+            self._depth -= 1
+            if self._depth == 0:
+                self._close_child()
+        elif tag in ("head", "html"):
+            self._finish()
+
+    def handle_data(self, data):
+        if self._current is not None and self._depth:
+            self._text.append(data)
+
+    def _finish(self):
+        if self._depth:
+            self._close_child()
+        self._in_head = False
+        self.done = True
+        raise _StopScan
+
+
+def scan_head(html, max_bytes=HEAD_SCAN_BYTES):
+    """
+    반환: (head_elements, meta_refresh_url)
+    head_elements 는 head_extract 와 같은 구조: [{"tag", "attributes", "text"}, ...]
+    """
+    scanner = _HeadScanner()
+    limit = min(len(html), max_bytes)
+    try:
+        for start in range(0, limit, FEED_CHUNK):
+            scanner.feed(html[start:min(start + FEED_CHUNK, limit)])
+        scanner._finish()
+    except _StopScan:
+        pass
+    return scanner.elements, scanner.meta_refresh_url
+
+
+def find_meta_refresh(html, max_bytes=HEAD_SCAN_BYTES):
+    return scan_head(html, max_bytes)[1]
+
+
+class HtmlAnalyzer:
+    """
+    kind: "process" / "thread" / None(이벤트 루프에서 바로 실행)
+    run() 에 넘기는 함수는 process 풀에서도 쓸 수 있게 모듈 최상위 함수여야 한다.
+    """
+
+    def __init__(self, kind="process", workers=4, max_bytes=HEAD_SCAN_BYTES, inline_below=INLINE_BELOW):
+        if kind not in ("thread", "process", None):
+            raise ValueError(f"Unknown HTML analysis pool: {kind!r} (choose 'thread', 'process' or None)")
+        self.kind = kind
+        self.max_bytes = max_bytes
+        self.inline_below = inline_below
+        self.inline = 0
+        self.offloaded = 0
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="html-analysis")
+        elif kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = None
+
+    async def run(self, func, html, *args):
+        if self._executor is None or len(html) < self.inline_below:
+            self.inline += 1
+            return func(html, *args)
+        self.offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, html, *args)
+
+    async def meta_refresh(self, html):
+        # head 영역만 필요하므로 풀로 넘기기 전에 자른다
+        return await self.run(find_meta_refresh, html[:self.max_bytes], self.max_bytes)
+
+    async def head(self, html):
+        return await self.run(scan_head, html[:self.max_bytes], self.max_bytes)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        return {"pool": self.kind, "inline": self.inline, "offloaded": self.offloaded}
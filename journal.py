@@ -0,0 +1,206 @@
+import json
+import sqlite3
+import sys
+import time
+
+# URL 단위 체크포인트 저널 (SQLite WAL)
+# - URL 인덱스(입력 CSV 에서 dropna 후의 순번)를 키로 결과를 append 하고 매 행마다 commit(fsync)
+# - 재시작 시 완료된 URL 만 정확히 건너뛰고 나머지만 다시 처리
+# - 빠진 / 실패한 구간 리포트 (batch_counter.py 를 대체)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetch_log (
+    url_index   INTEGER PRIMARY KEY,
+    batch_num   INTEGER NOT NULL,
+    url         TEXT,
+    failed      INTEGER NOT NULL,
+    result      TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fetch_log_batch ON fetch_log (batch_num, url_index);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def is_failed(result):
+    # 페이지에 도달하지 못한 행 (DNS 실패, 타임아웃, 크래시 등)
+    return result.get("final_url") is None
+
+
+def to_ranges(indexes):
+    # [1, 2, 3, 7, 9, 10] -> [(1, 3), (7, 7), (9, 10)]
+    ranges = []
+    for i in sorted(indexes):
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return [tuple(r) for r in ranges]
+
+
+def format_ranges(ranges):
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+class FetchJournal:
+    def __init__(self, path, synchronous="FULL"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- 메타 정보 ----------------
+    def check_batch_size(self, batch_size):
+        # 기록된 행의 batch_num 은 저장된 배치 크기로 나눈 번호라서 다른 크기로 이어 쓰면 batch_{n} 이 섞인다
+        stored = self.run_info()["batch_size"]
+        if stored is not None and stored != batch_size and self.conn.execute("SELECT 1 FROM fetch_log LIMIT 1").fetchone():
+            raise ValueError(
+                f"Journal {self.path} was written with batch size {stored}, not {batch_size} "
+                f"(rerun with --batch-size {stored}, or use another journal_path / result_dir)"
+            )
+
+    def set_run_info(self, total_urls, batch_size):
+        self.check_batch_size(batch_size)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("total_urls", str(total_urls)), ("batch_size", str(batch_size))],
+        )
+        self.conn.commit()
+
+    def run_info(self):
+        rows = dict(self.conn.execute("SELECT key, value FROM meta"))
+        return {
+            "total_urls": int(rows["total_urls"]) if "total_urls" in rows else None,
+            "batch_size": int(rows["batch_size"]) if "batch_size" in rows else None,
+        }
+
+    # ---------------- 기록 / 조회 ----------------
+    def record(self, url_index, batch_num, result):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fetch_log (url_index, batch_num, url, failed, result, recorded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                url_index,
+                batch_num,
+                result.get("original_url"),
+                int(is_failed(result)),
+                json.dumps(result, ensure_ascii=False),
+                time.time(),
+            ),
+        )
+        self.conn.commit()
+
+    def completed_indexes(self, include_failed=True, start=None, end=None):
+        # start <= url_index < end 범위만 조회 가능 (배치 단위로 읽으면 메모리가 일정)
+        conditions, params = [], []
+        if not include_failed:
+            conditions.append("failed = 0")
+        if start is not None:
+            conditions.append("url_index >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("url_index < ?")
+            params.append(end)
+        query = "SELECT url_index FROM fetch_log"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return {row[0] for row in self.conn.execute(query, params)}
+
+    def is_completed(self, url_index, include_failed=True):
+        query = "SELECT failed FROM fetch_log WHERE url_index = ?"
+        row = self.conn.execute(query, (url_index,)).fetchone()
+        return row is not None and (include_failed or not row[0])
+
+    def result_for(self, url_index):
+        row = self.conn.execute("SELECT result FROM fetch_log WHERE url_index = ?", (url_index,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def batch_results(self, batch_num, with_index=False):
+        # 입력 순서대로 결과 dict 를 반환 (with_index=True 면 (url_index, result))
+        cursor = self.conn.execute(
+            "SELECT url_index, result FROM fetch_log WHERE batch_num = ? ORDER BY url_index",
+            (batch_num,),
+        )
+        if with_index:
+            return [(row[0], json.loads(row[1])) for row in cursor]
+        return [json.loads(row[1]) for row in cursor]
+
+    def batch_counts(self):
+        # {batch_num: 기록된 URL 수}
+        return dict(self.conn.execute("SELECT batch_num, COUNT(*) FROM fetch_log GROUP BY batch_num"))
+
+    # ---------------- 리포트 ----------------
+    def gap_report(self, total_urls=None, batch_size=None):
+        info = self.run_info()
+        total_urls = total_urls if total_urls is not None else info["total_urls"]
+        batch_size = batch_size if batch_size is not None else info["batch_size"]
+        if total_urls is None or batch_size is None:
+            raise ValueError("total_urls / batch_size unknown: run the fetcher once or pass them explicitly")
+
+        recorded = set()
+        failed = []
+        for url_index, is_fail in self.conn.execute("SELECT url_index, failed FROM fetch_log"):
+            recorded.add(url_index)
+            if is_fail:
+                failed.append(url_index)
+        missing = [i for i in range(total_urls) if i not in recorded]
+
+        batch_count = (total_urls + batch_size - 1) // batch_size
+        missing_by_batch = {}
+        for i in missing:
+            batch_num = i // batch_size + 1
+            missing_by_batch[batch_num] = missing_by_batch.get(batch_num, 0) + 1
+        untouched_batches = [
+            b for b, n in missing_by_batch.items()
+            if n == min(batch_size, total_urls - (b - 1) * batch_size)
+        ]
+        partial_batches = {b: n for b, n in missing_by_batch.items() if b not in untouched_batches}
+
+        return {
+            "total_urls": total_urls,
+            "batch_size": batch_size,
+            "batch_count": batch_count,
+            "recorded": len(recorded),
+            "missing_ranges": to_ranges(missing),
+            "failed_ranges": to_ranges(failed),
+            "missing_count": len(missing),
+            "failed_count": len(failed),
+            "untouched_batches": sorted(untouched_batches),
+            "partial_batches": dict(sorted(partial_batches.items())),
+        }
+
+
+def print_gap_report(report):
+    print(f"📒 {report['recorded']}/{report['total_urls']} URLs recorded "
+          f"({report['batch_count']} batches of {report['batch_size']})")
+    print(f"빠진 URL: {report['missing_count']}")
+    if report["missing_ranges"]:
+        print(f"  ranges: {format_ranges(report['missing_ranges'])}")
+    print(f"빠진 batch 번호 목록: {report['untouched_batches']}")
+    if report["partial_batches"]:
+        print("중간에 끊긴 batch (batch: 빠진 URL 수):")
+        print(f"  {report['partial_batches']}")
+    print(f"실패한 URL: {report['failed_count']}")
+    if report["failed_ranges"]:
+        print(f"  ranges: {format_ranges(report['failed_ranges'])}")
+
+
+if __name__ == "__main__":
+    # 사용법: python journal.py data/results/fetch_journal.sqlite
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/results/fetch_journal.sqlite"
+    with FetchJournal(path) as journal:
+        print_gap_report(journal.gap_report())
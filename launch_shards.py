@@ -0,0 +1,150 @@
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import time
+from cli import build_parser, build_settings
+from journal import FetchJournal, print_gap_report
+from sharding import merge_shard_journals, shard_journal_path
+from work_queue import ShardWriter
+from merge_results import merge as merge_results, print_merge_summary
+
+# 경로 / 형식은 워커에 넘기는 인자(--set result_dir=..., --formats ... 등)를 워커와 같은 방식(cli.build_settings)으로
+# 해석해서 쓴다 (shard 경로는 여기에 shardIofN 을 붙인 것, 통합 결과는 붙이지 않은 경로)
+SCRIPT_COMMANDS = {"batch_fetch.py": "batch", "restart_batch_fetch.py": "resume"}
+
+# 사용 예
+#   한 대에서 4 프로세스:      python launch_shards.py --total 4
+#   두 대로 나눠서 8 shard:    (A) python launch_shards.py --total 8 --shards 0-3 --no-merge
+#                              (B) python launch_shards.py --total 8 --shards 4-7 --no-merge
+#   shard 저널을 한 곳에 모은 뒤: python launch_shards.py --total 8 --merge-only
+#   경로를 바꿨으면 병합 때도 같은 인자를: python launch_shards.py --total 8 --merge-only --set result_dir=out/batches
+
+
+def parse_shard_list(spec, total):
+    # "0-3,6" -> [0, 1, 2, 3, 6]
+    if not spec:
+        return list(range(total))
+    shards = set()
+    for part in spec.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            shards.update(range(int(start), int(end) + 1))
+        else:
+            shards.add(int(part))
+    invalid = [i for i in shards if not 0 <= i < total]
+    if invalid:
+        raise ValueError(f"Shard indexes out of range for --total {total}: {invalid}")
+    return sorted(shards)
+
+
+def launcher_settings(script, extra_args):
+    # 워커가 받는 인자로 만든 CrawlSettings (shard 를 붙이기 전)
+    command = SCRIPT_COMMANDS.get(os.path.basename(script), "resume")
+    args, _ = build_parser().parse_known_args([command, *extra_args])
+    return build_settings(command, args)
+
+
+def run_workers(script, shards, total, extra_args):
+    procs = {}
+    for i in shards:
+        cmd = [sys.executable, script, "--shard", f"{i}/{total}", *extra_args]
+        print(f"🚀 Starting shard {i}/{total}: {' '.join(cmd)}")
+        procs[i] = subprocess.Popen(cmd)
+
+    failed = []
+    while procs:
+        for i, proc in list(procs.items()):
+            code = proc.poll()
+            if code is None:
+                continue
+            del procs[i]
+            if code == 0:
+                print(f"✅ Shard {i}/{total} finished")
+            else:
+                print(f"❌ Shard {i}/{total} exited with code {code}")
+                failed.append(i)
+        time.sleep(1)
+    return failed
+
+
+def shard_run_info(shard_paths):
+    # 전체 URL 수 / 배치 크기는 모든 shard 가 같아야 한다 (다르면 다른 입력이나 설정으로 돌린 shard 가 섞인 것)
+    infos = {}
+    for path in shard_paths:
+        with FetchJournal(path) as shard:
+            infos[path] = shard.run_info()
+    for key in ("total_urls", "batch_size"):
+        values = {info[key] for info in infos.values() if info[key] is not None}
+        if len(values) > 1:
+            detail = ", ".join(f"{os.path.basename(path)}={info[key]}" for path, info in infos.items())
+            print(f"❌ Shard journals disagree on {key}: {detail} (rerun the odd shards with the same input and settings)")
+            return None
+    known = [info for info in infos.values() if info["total_urls"] is not None and info["batch_size"] is not None]
+    if not known:
+        print("⚠️ Shard journals do not know the total URL count yet (no shard reached the end of the input)")
+        return None
+    unknown = [os.path.basename(path) for path, info in infos.items() if info["total_urls"] is None]
+    if unknown:
+        print(f"⚠️ Not finished reading the input yet: {', '.join(unknown)}")
+    return known[0]
+
+
+def merge(total, settings):
+    shard_paths = sorted(glob.glob(shard_journal_path(settings.journal_path, "*", total)))
+    if not shard_paths:
+        print(f"⚠️ No shard journals found for --total {total}")
+        return
+
+    # 통합 저널에 섞기 전에 확인한다
+    info = shard_run_info(shard_paths)
+    if info is None:
+        return
+
+    os.makedirs(settings.result_dir, exist_ok=True)
+    with FetchJournal(settings.journal_path) as journal:
+        try:
+            journal.check_batch_size(info["batch_size"])
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        merged = merge_shard_journals(journal, shard_paths)
+        print(f"🧩 Merged {merged} rows from {len(shard_paths)} shard journals into {settings.journal_path}")
+        journal.set_run_info(info["total_urls"], info["batch_size"])
+
+        # 모든 URL 이 모인 배치만 batch_{n}.csv 로 확정
+        writer = ShardWriter(settings.result_dir, journal, na_rep=settings.none_data,
+                             output_formats=settings.output_formats, parquet_dir=settings.parquet_dir)
+        total_urls, batch_size = info["total_urls"], info["batch_size"]
+        for batch_num, count in sorted(journal.batch_counts().items()):
+            expected = min(batch_size, total_urls - (batch_num - 1) * batch_size)
+            if count >= expected:
+                writer.open_shard(batch_num, expected, already_done=count)
+        print(f"💾 {len(writer.completed_paths)} complete batches written ({', '.join(settings.output_formats)})")
+        print_gap_report(journal.gap_report())
+    if "parquet" in settings.output_formats:
+        from parquet_store import compact
+        compact(settings.parquet_dir, settings.merged_parquet_dir)
+        print(f"🎉 Parquet: '{settings.merged_parquet_dir}'")
+    if "csv" in settings.output_formats:
+        print_merge_summary(merge_results(settings.result_dir, settings.output_file, na_rep=settings.none_data),
+                            settings.output_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run batch_fetch.py as N host-sharded worker processes and merge their output.")
+    parser.add_argument('--total', type=int, default=os.cpu_count(), help='Total number of shards N (default: CPU count)')
+    parser.add_argument('--shards', type=str, default=None, help="Shard indexes to run on this machine, e.g. '0-3' (default: all)")
+    parser.add_argument('--script', type=str, default='restart_batch_fetch.py', help='Fetch script to launch per shard')
+    parser.add_argument('--no-merge', action='store_true', help='Do not merge shard journals after the workers finish')
+    parser.add_argument('--merge-only', action='store_true', help='Only merge existing shard journals')
+    args, extra = parser.parse_known_args()
+    settings = launcher_settings(args.script, extra)
+
+    if not args.merge_only:
+        failed = run_workers(args.script, parse_shard_list(args.shards, args.total), args.total, extra)
+        if failed:
+            print(f"⚠️ Failed shards: {failed} (rerun them; finished URLs are skipped via their journals)")
+    if not args.no_merge:
+        merge(args.total, settings)
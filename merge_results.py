@@ -0,0 +1,303 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from journal import FetchJournal, format_ranges, print_gap_report, to_ranges
+from url_reader import count_urls
+
+# 배치 결과 CSV(batch_{n}.csv) 통합 / 누락 검사
+# - {output}.manifest.json 에 shard 별 크기, mtime, 행 수, sha256 을 기록해 두고
+#   새로 생기거나 내용이 바뀐 shard 만 다시 읽는다 (검사는 프로세스 풀에서 병렬)
+# - 통합 파일은 항상 배치 번호 순서 (행마다 url_index 컬럼도 있다)
+#   새 shard 가 모두 통합된 마지막 배치 뒤라면 끝에 이어 쓰고, 중간의 빠진 배치를 채웠거나
+#   내용이 바뀌거나 지워진 shard 가 있거나 컬럼이 달라지면 스트리밍으로 다시 만든다
+#   (DataFrame 으로 올리지 않으므로 메모리는 shard 수와 무관)
+# - 컬럼이 다른 shard(error_message, dedup_of 등이 없는 예전 결과)는 컬럼 합집합에 맞춰 행 단위로 변환
+# - 입력 크기(total_urls / batch_size) 대비 빠진 배치 번호와 배치 안에서 빠진 행 수를 보고
+#
+# 사용 예
+#   python merge_results.py                      # 통합 + 누락 보고
+#   python merge_results.py --report-only        # 누락 보고만 (기존 batch_counter.py)
+#   python merge_results.py --total-urls 642000 --batch-size 1000
+
+# ------------------- 설정 -------------------
+BATCH_DIR = 'data/results/batch_results'
+OUTPUT_FILE = 'data/results/head_extraction_results.csv'
+JOURNAL_PATH = 'data/results/fetch_journal.sqlite'
+EXEC_FILE = 'urls_data.csv'
+NONE_DATA = 'null'
+# --------------------------------------------
+
+SHARD_RE = re.compile(r"^batch_(\d+)\.csv$")
+MANIFEST_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+def manifest_path(output):
+    return f"{output}.manifest.json"
+
+
+def list_shards(batch_dir):
+    # [(batch_num, file_name), ...] 배치 번호 순
+    shards = []
+    for name in os.listdir(batch_dir) if os.path.isdir(batch_dir) else []:
+        match = SHARD_RE.match(name)
+        if match:
+            shards.append((int(match.group(1)), name))
+    return sorted(shards)
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def scan_shard(path):
+    # 프로세스 풀에서 실행: 파일 해시, 헤더, 데이터 행 수 (따옴표 안 줄바꿈도 한 행으로 센다)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = sum(1 for record in reader if record)
+    return {**_signature(path), "sha256": digest.hexdigest(), "columns": header, "rows": rows}
+
+
+def load_manifest(output):
+    try:
+        with open(manifest_path(output), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "columns": [], "shards": {}, "output": None}
+
+
+def save_manifest(output, manifest):
+    tmp = manifest_path(output) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, manifest_path(output))
+
+
+def _copy_shard(path, columns, out, na_rep):
+    # 헤더가 같으면 바이트 복사, 다르면 컬럼 합집합에 맞춰 행 단위로 변환
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        header = next(csv.reader([f.readline()]), [])
+        if header == columns:
+            out.flush()
+            binary = out.buffer
+            with open(path, "rb") as raw:
+                raw.readline()
+                last = b""
+                for chunk in iter(lambda: raw.read(HASH_CHUNK), b""):
+                    binary.write(chunk)
+                    last = chunk[-1:]
+            if last and last not in (b"\n", b"\r"):
+                binary.write(b"\n")
+            return
+        writer = csv.DictWriter(out, fieldnames=columns, restval=na_rep, extrasaction="ignore", lineterminator="\n")
+        for row in csv.DictReader(f, fieldnames=header):
+            writer.writerow(row)
+
+
+def _write_output(output, columns, shard_paths, na_rep, append):
+    mode = "a" if append else "w"
+    target = output if append else output + ".tmp"
+    with open(target, mode, newline="", encoding="utf-8") as out:
+        if not append:
+            csv.writer(out, lineterminator="\n").writerow(columns)
+        for path in shard_paths:
+            _copy_shard(path, columns, out, na_rep)
+    if not append:
+        os.replace(target, output)
+
+
+def _executor(pool, workers):
+    # "process": CLI / 노트북용. __main__ 가드 없이 최상위에서 실행되는 스크립트(batch_fetch.py 등)는
+    # spawn 방식(Windows)에서 자식 프로세스가 스크립트 전체를 다시 실행하므로 "thread" 를 쓴다
+    if pool == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    if pool == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown pool: {pool!r} (choose 'process' or 'thread')")
+
+
+def scan_shards(batch_dir, manifest, workers=None, full=False, pool="process"):
+    """
+    manifest 의 shard 목록을 디스크와 맞춘다 (manifest 는 복사본을 만들어 돌려주고 원본은 건드리지 않는다).
+    크기 / mtime 이 그대로인 shard 는 다시 읽지 않고, 나머지는 pool 에서 병렬로 검사한다.
+    반환: (shards, new, changed, removed, known)
+    """
+    known = dict(manifest["shards"])
+    shards = list_shards(batch_dir)
+    on_disk = {name for _, name in shards}
+
+    to_scan = [
+        name for _, name in shards
+        if full or name not in known
+        or {k: known[name].get(k) for k in ("size", "mtime_ns")} != _signature(os.path.join(batch_dir, name))
+    ]
+    scanned = {}
+    if to_scan:
+        paths = [os.path.join(batch_dir, name) for name in to_scan]
+        with _executor(pool, workers) as executor:
+            for name, info in zip(to_scan, executor.map(scan_shard, paths, chunksize=8)):
+                scanned[name] = info
+
+    new = [name for name in to_scan if name not in known]
+    changed = [name for name in to_scan if name in known and known[name]["sha256"] != scanned[name]["sha256"]]
+    removed = sorted(set(known) - on_disk)
+    for name, info in scanned.items():
+        known[name] = {**info, "batch_num": int(SHARD_RE.match(name).group(1))}
+    for name in removed:
+        del known[name]
+    return shards, new, changed, removed, known
+
+
+def merge(batch_dir=BATCH_DIR, output=OUTPUT_FILE, workers=None, full=False, na_rep=NONE_DATA, pool="process"):
+    """
+    반환: {"mode": "up-to-date" | "append" | "rebuild", "shards", "new", "changed", "removed", "rows"}
+    """
+    manifest = load_manifest(output)
+    merged_until = max((info["batch_num"] for info in manifest["shards"].values()), default=0)
+    shards, new, changed, removed, known = scan_shards(batch_dir, manifest, workers, full, pool)
+
+    # 컬럼 합집합 (배치 순서대로 처음 나온 순서 유지)
+    columns = []
+    for _, name in shards:
+        for column in known[name]["columns"]:
+            if column not in columns:
+                columns.append(column)
+
+    output_ok = (
+        not full and manifest["output"] is not None and os.path.exists(output)
+        and _signature(output) == manifest["output"] and columns == manifest["columns"]
+    )
+    if output_ok and not (new or changed or removed):
+        mode = "up-to-date"
+    elif output_ok and not (changed or removed) and min(known[n]["batch_num"] for n in new) > merged_until:
+        # 새 배치가 모두 통합된 마지막 배치 뒤라면 순서가 유지되므로 이어 쓰기
+        mode = "append"
+        new.sort(key=lambda name: known[name]["batch_num"])
+        _write_output(output, columns, [os.path.join(batch_dir, name) for name in new], na_rep, append=True)
+    else:
+        mode = "rebuild"
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        _write_output(output, columns, [os.path.join(batch_dir, name) for _, name in shards], na_rep, append=False)
+
+    save_manifest(output, {
+        "version": MANIFEST_VERSION,
+        "columns": columns,
+        "shards": known,
+        "output": _signature(output),
+        "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    return {
+        "mode": mode,
+        "shards": len(shards),
+        "new": len(new),
+        "changed": len(changed),
+        "removed": len(removed),
+        "rows": sum(info["rows"] for info in known.values()),
+    }
+
+
+def shard_report(known, total_urls, batch_size):
+    # known: manifest 의 shard 정보. 배치별 행 수를 입력 크기와 비교
+    rows_by_batch = {info["batch_num"]: info["rows"] for info in known.values()}
+    batch_count = (total_urls + batch_size - 1) // batch_size
+    missing, short = [], {}
+    for batch_num in range(1, batch_count + 1):
+        expected = min(batch_size, total_urls - (batch_num - 1) * batch_size)
+        rows = rows_by_batch.get(batch_num)
+        if rows is None:
+            missing.append(batch_num)
+        elif rows != expected:
+            short[batch_num] = (rows, expected)
+    extra = sorted(b for b in rows_by_batch if b > batch_count)
+    return {
+        "total_urls": total_urls,
+        "batch_size": batch_size,
+        "batch_count": batch_count,
+        "rows": sum(rows_by_batch.values()),
+        "missing_batches": missing,
+        "row_mismatch": short,
+        "unexpected_batches": extra,
+    }
+
+
+def print_shard_report(report):
+    print(f"📋 {report['rows']}/{report['total_urls']} rows in {report['batch_count'] - len(report['missing_batches'])}"
+          f"/{report['batch_count']} batches (batch size {report['batch_size']})")
+    if report["missing_batches"]:
+        print(f"❌ Missing batches ({len(report['missing_batches'])}): {format_ranges(to_ranges(report['missing_batches']))}")
+    for batch_num, (rows, expected) in report["row_mismatch"].items():
+        print(f"⚠️ batch_{batch_num}.csv: {rows}/{expected} rows")
+    if report["unexpected_batches"]:
+        print(f"⚠️ Batches beyond the input size: {format_ranges(to_ranges(report['unexpected_batches']))}")
+    if not (report["missing_batches"] or report["row_mismatch"] or report["unexpected_batches"]):
+        print("✅ No gaps")
+
+
+def resolve_input_size(total_urls=None, batch_size=None, journal_path=JOURNAL_PATH, exec_file=EXEC_FILE):
+    # 명시값 > 저널의 run_info > 입력 CSV 오프셋 인덱스
+    if (total_urls is None or batch_size is None) and os.path.exists(journal_path):
+        with FetchJournal(journal_path) as journal:
+            info = journal.run_info()
+        total_urls = total_urls if total_urls is not None else info["total_urls"]
+        batch_size = batch_size if batch_size is not None else info["batch_size"]
+    if total_urls is None and os.path.exists(exec_file):
+        total_urls = count_urls(exec_file)
+    return total_urls, batch_size
+
+
+def report(known, total_urls=None, batch_size=None, journal_path=JOURNAL_PATH):
+    total_urls, batch_size = resolve_input_size(total_urls, batch_size, journal_path)
+    if total_urls is None or batch_size is None:
+        print("⚠️ Input size unknown: pass --total-urls and --batch-size (or run the fetcher once)")
+        return None
+    result = shard_report(known, total_urls, batch_size)
+    print_shard_report(result)
+    # URL 단위 누락 범위는 저널이 있을 때만 알 수 있다
+    if os.path.exists(journal_path):
+        with FetchJournal(journal_path) as journal:
+            print_gap_report(journal.gap_report(total_urls, batch_size))
+    return result
+
+
+def print_merge_summary(summary, output=OUTPUT_FILE):
+    print(f"🧩 Merge ({summary['mode']}): {summary['shards']} shards, {summary['new']} new, "
+          f"{summary['changed']} changed, {summary['removed']} removed → {summary['rows']} rows in '{output}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally merge batch_{n}.csv shards and report gaps.")
+    parser.add_argument('--batch-dir', default=BATCH_DIR)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--journal', default=JOURNAL_PATH)
+    parser.add_argument('--total-urls', type=int, default=None, help='Input size (default: from the journal or the input CSV index)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Batch size (default: from the journal)')
+    parser.add_argument('--workers', type=int, default=None, help='Processes used to scan shards (default: CPU count)')
+    parser.add_argument('--full', action='store_true', help='Rescan every shard and rebuild the output')
+    parser.add_argument('--report-only', action='store_true', help='Only scan shards and report gaps, do not write the output')
+    args = parser.parse_args()
+
+    if args.report_only:
+        # 통합 파일과 manifest 는 건드리지 않는다
+        _, _, _, _, known = scan_shards(args.batch_dir, load_manifest(args.output), args.workers, args.full)
+    else:
+        summary = merge(args.batch_dir, args.output, workers=args.workers, full=args.full)
+        print_merge_summary(summary, args.output)
+        known = load_manifest(args.output)["shards"]
+    report(known, args.total_urls, args.batch_size, args.journal)
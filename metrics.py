@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from timeout_policy import LatencyHistogram
+
+# 수집 파이프라인 메트릭
+# - 단계별 소요 시간 (context / navigation / content / head_extract / static_fetch / dns ...)
+# - 누적 카운터: 처리 URL 수(단계별), 에러 종류, 타임아웃
+# - 게이지: 처리 중인 URL 수, URLs/sec (최근 60초), 브라우저 메모리
+# 노출 방법
+# - MetricsServer: http://127.0.0.1:{port}/metrics (Prometheus text) , /stats.json
+# - StatsFileWriter: 주기적으로 JSON 파일에 스냅샷 저장
+# - WorkerProfiler: 일부 작업만 cProfile (또는 yappi) 로 프로파일
+
+RATE_WINDOW_SEC = 60
+
+
+class _StageStats:
+    __slots__ = ("count", "total_sec", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.total_sec = 0.0
+        self.hist = LatencyHistogram(decay_every=0)
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}      # (name, label) -> count
+        self.in_flight = 0
+        self.completed = 0
+        self._recent = deque()  # 최근 완료 시각
+        self.gauge_sources = {}  # name -> 값을 돌려주는 함수
+
+    # ---------- 기록 ----------
+    @contextmanager
+    def stage(self, name):
+        # with metrics.stage("navigation"): await page.goto(...)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = _StageStats()
+        stats.count += 1
+        stats.total_sec += seconds
+        stats.hist.add(seconds)
+
+    def inc(self, name, label="", value=1):
+        key = (name, label)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def track(self):
+        # URL 하나를 처리하는 동안 in_flight 에 잡힌다
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def record_result(self, result):
+        now = time.time()
+        self.completed += 1
+        self._recent.append(now)
+        self.inc("urls_total", result.get("fetch_tier") or "unknown")
+        if result.get("timeout"):
+            self.inc("timeouts_total", result.get("fetch_tier") or "unknown")
+
+    def record_error(self, error):
+        # 예외 또는 에러 메시지
+        self.inc("errors_total", error_class(error))
+
+    # ---------- 조회 ----------
+    def urls_per_sec(self):
+        cutoff = time.time() - RATE_WINDOW_SEC
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+        window = min(RATE_WINDOW_SEC, max(time.time() - self.started, 1e-6))
+        return len(self._recent) / window
+
+    def snapshot(self):
+        counters = {}
+        for (name, label), value in self.counters.items():
+            counters.setdefault(name, {})[label or "all"] = value
+        gauges = {}
+        for name, source in self.gauge_sources.items():
+            try:
+                gauges[name] = source()
+            except Exception:
+                gauges[name] = None
+        return {
+            "time": time.time(),
+            "uptime_sec": round(time.time() - self.started, 1),
+            "completed": self.completed,
+            "in_flight": self.in_flight,
+            "urls_per_sec": round(self.urls_per_sec(), 3),
+            "counters": counters,
+            "gauges": gauges,
+            "stages": {
+                name: {
+                    "count": s.count,
+                    "total_sec": round(s.total_sec, 3),
+                    "mean_sec": round(s.total_sec / s.count, 4) if s.count else None,
+                    "p50_sec": s.hist.quantile(0.5),
+                    "p95_sec": s.hist.quantile(0.95),
+                }
+                for name, s in self.stages.items()
+            },
+        }
+
+    def render_prometheus(self, prefix="headfetch"):
+        snap = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_completed_total counter",
+            f"{prefix}_completed_total {snap['completed']}",
+            f"# TYPE {prefix}_in_flight gauge",
+            f"{prefix}_in_flight {snap['in_flight']}",
+            f"# TYPE {prefix}_urls_per_second gauge",
+            f"{prefix}_urls_per_second {snap['urls_per_sec']}",
+        ]
+        for name, labels in snap["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for label, value in labels.items():
+                lines.append(f'{prefix}_{name}{{kind="{_escape(label)}"}} {value}')
+        for name, value in snap["gauges"].items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+        lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for name, s in snap["stages"].items():
+            for q, key in (("0.5", "p50_sec"), ("0.95", "p95_sec")):
+                if s[key] is not None:
+                    lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q}"}} {s[key]:.4f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["total_sec"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def error_class(error):
+    # 에러를 몇 가지 종류로 묶는다 (net::ERR_NAME_NOT_RESOLVED -> ERR_NAME_NOT_RESOLVED 등)
+    text = str(error)
+    if "net::" in text:
+        return text.split("net::", 1)[1].split()[0]
+    if "Timeout" in text:
+        return "Timeout"
+    if isinstance(error, BaseException):
+        return type(error).__name__
+    return text.split(":", 1)[0][:40] or "unknown"
+
+
+class MetricsServer:
+    # 로컬 전용 HTTP 엔드포인트 (aiohttp)
+    def __init__(self, metrics, host="127.0.0.1", port=9464):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        from aiohttp import web
+
+        async def prometheus(request):
+            return web.Response(text=self.metrics.render_prometheus(), content_type="text/plain")
+
+        async def stats(request):
+            return web.json_response(self.metrics.snapshot())
+
+        app = web.Application()
+        app.router.add_get("/metrics", prometheus)
+        app.router.add_get("/stats.json", stats)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📈 Metrics: http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class StatsFileWriter:
+    # interval_sec 마다 JSON 스냅샷을 파일에 덮어쓴다 (tmp 에 쓰고 교체)
+    def __init__(self, metrics, path, interval_sec=10):
+        self.metrics = metrics
+        self.path = path
+        self.interval_sec = interval_sec
+        self._task = None
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.metrics.snapshot(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            self.write()
+
+    async def start(self):
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.write()
+
+
+class WorkerProfiler:
+    """
+    sample_every 개 작업마다 하나를 프로파일한다.
+    cprofile: 한 번에 하나의 작업만 켜고 끈다 (같은 이벤트 루프라 그동안 돌던 다른 코루틴도 함께 잡힌다)
+    yappi:    코루틴 단위로 벽시계 시간을 잰다 (pip install yappi 필요, 실행 전체를 프로파일)
+    결과는 output_path (.prof, pstats 형식) 에 저장: python -m pstats {output_path}
+    """
+
+    def __init__(self, kind="cprofile", sample_every=100, output_path="data/log/profile.prof"):
+        if kind not in ("cprofile", "yappi"):
+            raise ValueError(f"Unknown profiler: {kind!r} (choose 'cprofile' or 'yappi')")
+        self.kind = kind
+        self.sample_every = sample_every
+        self.output_path = output_path
+        self.sampled = 0
+        self._jobs = 0
+        self._active = False
+        self._profile = None
+        if kind == "yappi":
+            import yappi
+            self._yappi = yappi
+            yappi.set_clock_type("wall")
+            yappi.start()
+        else:
+            import cProfile
+            self._profile = cProfile.Profile()
+
+    def wrap(self, handler):
+        if self.kind == "yappi":
+            return handler
+
+        async def profiled(*args, **kwargs):
+            self._jobs += 1
+            if self._active or self._jobs % self.sample_every:
+                return await handler(*args, **kwargs)
+            self._active = True
+            self.sampled += 1
+            self._profile.enable()
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                self._profile.disable()
+                self._active = False
+
+        return profiled
+
+    def dump(self):
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        if self.kind == "yappi":
+            self._yappi.stop()
+            self._yappi.get_func_stats().save(self.output_path, type="pstat")
+        else:
+            self._profile.dump_stats(self.output_path)
+        print(f"🔬 Profile ({self.kind}, {self.sampled or 'all'} sampled jobs): {self.output_path}")
@@ -1,17 +1,214 @@
-import requests
+import asyncio
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
 # .env 파일을 로드
 load_dotenv()
 
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+WEBHOOK_TIMEOUT_SEC = 10
 
-def send_slack_message(message: str):
-    payload = {"text": message}
-    try:
-        response = requests.post(SLACK_WEBHOOK_URL, json=payload)
-        if response.status_code != 200:
-            print(f"Slack 알림 실패: {response.text}")
-    except Exception as e:
-        print(f"Slack 전송 중 오류 발생: {e}")
+
+# ---------------- 비동기 알림 ----------------
+# notify() 는 큐에 넣기만 하고 바로 돌아온다. 백그라운드 태스크가
+#   - window_sec 동안 같은 (category, scope) 알림을 모아 한 건으로 합치고
+#     ("37 critical errors in batch 367 in the last 60s" + 샘플 몇 개)
+#   - max_per_minute 를 넘지 않도록 전송 속도를 제한하고
+#   - 각 sink(webhook / file / stdout)로 보낸다. sink 에러는 출력만 하고 수집은 계속한다.
+
+class WebhookSink:
+    # Slack 호환 webhook ({"text": ...}) — 로컬 HTTP 서버로 바꿔서 테스트 가능
+    name = "webhook"
+
+    def __init__(self, url, timeout_sec=WEBHOOK_TIMEOUT_SEC):
+        self.url = url
+        self.timeout_sec = timeout_sec
+        self._session = None
+
+    async def send(self, text):
+        import aiohttp
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout_sec))
+        async with self._session.post(self.url, json={"text": text}) as response:
+            if response.status >= 300:
+                body = await response.text()
+                raise RuntimeError(f"HTTP {response.status}: {body[:200]}")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class FileSink:
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+
+    def _append(self, text):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {text}\n")
+
+    async def send(self, text):
+        await asyncio.to_thread(self._append, text)
+
+    async def close(self):
+        pass
+
+
+class StdoutSink:
+    name = "stdout"
+
+    async def send(self, text):
+        print(f"🔔 {text}", flush=True)
+
+    async def close(self):
+        pass
+
+
+def build_sinks(names, webhook_url=None, file_path=None):
+    # names: ('webhook', 'file', 'stdout') 의 조합. webhook 은 URL 이 없으면 건너뛴다
+    sinks = []
+    for name in names or ():
+        if name == "webhook":
+            url = webhook_url or SLACK_WEBHOOK_URL
+            if url:
+                sinks.append(WebhookSink(url))
+        elif name == "file":
+            sinks.append(FileSink(file_path or "data/log/notifications.log"))
+        elif name == "stdout":
+            sinks.append(StdoutSink())
+        else:
+            raise ValueError(f"Unknown notification sink: {name!r}")
+    return sinks
+
+
+class _Bucket:
+    __slots__ = ("count", "samples", "first_at")
+
+    def __init__(self):
+        self.count = 0
+        self.samples = []
+        self.first_at = time.monotonic()
+
+
+class Notifier:
+    def __init__(self, sinks, window_sec=60, max_samples=3, max_per_minute=20, queue_size=10_000):
+        self.sinks = list(sinks)
+        self.window_sec = window_sec
+        self.max_samples = max_samples
+        self.max_per_minute = max_per_minute
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self._queue = None
+        self._buckets = {}   # (category, scope) -> _Bucket
+        self._task = None
+        self._closing = False
+        self._sent_at = []   # 최근 1분 동안 보낸 시각 (속도 제한용)
+
+    @property
+    def enabled(self):
+        return bool(self.sinks)
+
+    def notify(self, category, message, scope=""):
+        # 블로킹하지 않는다 (큐가 가득 차면 버리고 개수만 센다)
+        if not self.enabled:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        try:
+            self._queue.put_nowait((category, scope, message))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        # 남은 알림을 모두 보낸 뒤 종료 (cancel 대신 플래그 + 깨우기용 None)
+        self._closing = True
+        if self._task is not None:
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+            await self._task
+            self._task = None
+        self._drain_queue()
+        await self._flush(force=True)
+        for sink in self.sinks:
+            await sink.close()
+
+    def _drain_queue(self):
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                self._add(*item)
+
+    def _add(self, category, scope, message):
+        bucket = self._buckets.get((category, scope))
+        if bucket is None:
+            bucket = self._buckets[(category, scope)] = _Bucket()
+        bucket.count += 1
+        if len(bucket.samples) < self.max_samples:
+            bucket.samples.append(message)
+
+    async def _run(self):
+        tick = min(1.0, self.window_sec)
+        while not self._closing:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=tick)
+            except asyncio.TimeoutError:
+                item = None
+            if item is not None:
+                self._add(*item)
+            self._drain_queue()
+            await self._flush()
+
+    def format(self, category, scope, bucket):
+        where = f" in {scope}" if scope else ""
+        if bucket.count == 1:
+            return f"❌ {category}{where}: {bucket.samples[0]}"
+        lines = [f"❌ {bucket.count} {category}{where} in the last {self.window_sec}s"]
+        lines += [f"• {sample}" for sample in bucket.samples]
+        return "\n".join(lines)
+
+    async def _flush(self, force=False):
+        now = time.monotonic()
+        ready = [
+            key for key, bucket in self._buckets.items()
+            if force or now - bucket.first_at >= self.window_sec
+        ]
+        for key in ready:
+            bucket = self._buckets.pop(key)
+            await self._send(self.format(*key, bucket), wait=not force)
+
+    async def _send(self, text, wait=True):
+        # 1분당 max_per_minute 건까지 (넘으면 여유가 생길 때까지 대기, 종료 시에는 기다리지 않음)
+        if self.max_per_minute:
+            while True:
+                now = time.monotonic()
+                self._sent_at = [t for t in self._sent_at if now - t < 60]
+                if len(self._sent_at) < self.max_per_minute or not wait or self._closing:
+                    break
+                await asyncio.sleep(min(1.0, 60 - (now - self._sent_at[0])))
+            self._sent_at.append(time.monotonic())
+        for sink in self.sinks:
+            try:
+                await sink.send(text)
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Notification via {sink.name} failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def stats(self):
+        return {"sent": self.sent, "failed": self.failed, "dropped": self.dropped, "pending": len(self._buckets)}
@@ -0,0 +1,181 @@
+import argparse
+import ast
+import glob
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from work_queue import RESULT_COLUMNS
+
+# 결과를 Parquet 으로 저장하는 백엔드
+# - redirect_chain / head_elements 를 JSON 문자열이 아니라 중첩 list<struct> 컬럼으로 저장
+# - 배치마다 data/results/parquet/batch_num={n}/part-0.parquet (hive 파티션)
+# - compact: 작은 배치 파일들을 큰 파일로 스트리밍 병합 (메모리 사용량은 배치 수와 무관)
+#
+# 분석 예:
+#   pd.read_parquet("data/results/merged_parquet", columns=["original_url", "final_url"],
+#                   filters=[("has_meta_refresh", "=", True)])
+
+REDIRECT_TYPE = pa.list_(pa.struct([
+    ("url", pa.string()),
+    ("status", pa.int32()),
+    ("location", pa.string()),
+]))
+
+HEAD_ELEMENT_TYPE = pa.list_(pa.struct([
+    ("tag", pa.string()),
+    ("attributes", pa.map_(pa.string(), pa.string())),
+    ("text", pa.string()),
+]))
+
+COLUMN_TYPES = {
+    "url_index": pa.int64(),
+    "original_url": pa.string(),
+    "final_url": pa.string(),
+    "redirect_chain": REDIRECT_TYPE,
+    "redirect_count": pa.int32(),
+    "head_elements": HEAD_ELEMENT_TYPE,
+    "timeout": pa.bool_(),
+    "has_meta_refresh": pa.bool_(),
+    "meta_refresh_url": pa.string(),
+    "duration_sec": pa.float64(),
+    "fetch_tier": pa.string(),
+    "timeout_sec": pa.float64(),
+    "cache_status": pa.string(),
+    "error_message": pa.string(),
+    "screenshot_path": pa.string(),
+    "screenshot_phash": pa.string(),
+    "dedup_of": pa.int64(),
+}
+
+# batch_{n}.csv 와 같은 컬럼 / 순서
+RESULT_SCHEMA = pa.schema([(name, COLUMN_TYPES[name]) for name in RESULT_COLUMNS])
+
+PARTITIONING = ds.partitioning(pa.schema([("batch_num", pa.int32())]), flavor="hive")
+
+
+def _parse_nested(value, loader):
+    # CSV / 결과 dict 에서 온 값을 파이썬 객체로 (문자열이면 파싱)
+    if value is None or value == "null" or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, str):
+        return loader(value)
+    return value
+
+
+def _normalize_row(url_index, result):
+    redirect_chain = _parse_nested(result.get("redirect_chain"), json.loads)
+    head_elements = _parse_nested(result.get("head_elements"), ast.literal_eval)
+    if head_elements is not None:
+        head_elements = [
+            {
+                "tag": el.get("tag"),
+                "attributes": [(str(k), None if v is None else str(v)) for k, v in (el.get("attributes") or {}).items()],
+                "text": el.get("text"),
+            }
+            for el in head_elements
+        ]
+    row = {name: result.get(name) for name in RESULT_SCHEMA.names}
+    row["url_index"] = url_index
+    row["redirect_chain"] = redirect_chain
+    row["head_elements"] = head_elements
+    for name in ("final_url", "meta_refresh_url", "error_message", "fetch_tier", "cache_status"):
+        if _parse_nested(row[name], str) is None:
+            row[name] = None
+    dedup_of = _parse_nested(row["dedup_of"], float)
+    row["dedup_of"] = None if dedup_of is None else int(dedup_of)
+    return row
+
+
+def rows_to_table(indexed_results):
+    # indexed_results: [(url_index, result_dict), ...]
+    rows = [_normalize_row(i, r) for i, r in indexed_results]
+    return pa.Table.from_pylist(rows, schema=RESULT_SCHEMA)
+
+
+def batch_parquet_path(dataset_dir, batch_num):
+    return f"{dataset_dir}/batch_num={batch_num}/part-0.parquet"
+
+
+def write_batch_parquet(indexed_results, dataset_dir, batch_num):
+    path = batch_parquet_path(dataset_dir, batch_num)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    pq.write_table(rows_to_table(indexed_results), tmp, compression="zstd")
+    os.replace(tmp, path)
+    return path
+
+
+def import_csv_batches(csv_dir, dataset_dir, batch_size):
+    # 기존 batch_{n}.csv 결과를 Parquet 으로 변환 (url_index 컬럼이 없으면 배치 번호와 행 순서로 복원)
+    converted = 0
+    for path in glob.glob(f"{csv_dir}/batch_*.csv"):
+        name = os.path.basename(path)
+        try:
+            batch_num = int(name[len("batch_"):-len(".csv")])
+        except ValueError:
+            continue
+        df = pd.read_csv(path, keep_default_na=False, na_values=["null", ""])
+        df = df.astype(object).where(df.notna(), None)
+        if "url_index" in df.columns:
+            indexed = [(int(r["url_index"]), r) for r in df.to_dict("records")]
+        else:
+            offset = (batch_num - 1) * batch_size   # url_index 컬럼이 없던 예전 배치
+            indexed = [(offset + i, r) for i, r in enumerate(df.to_dict("records"))]
+        write_batch_parquet(indexed, dataset_dir, batch_num)
+        converted += 1
+    return converted
+
+
+def compact(dataset_dir, output_dir, max_rows_per_file=1_000_000, batches_per_group=100):
+    """
+    배치별 작은 파일을 batch_group=(batch_num // batches_per_group) 파티션의 큰 파일로 합친다.
+    pyarrow 가 스캔하면서 바로 쓰므로 전체를 메모리에 올리지 않는다.
+    """
+    source = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+    scanner = source.scanner()
+    group_schema = scanner.projected_schema.append(pa.field("batch_group", pa.int32()))
+
+    def with_group():
+        for batch in scanner.to_batches():
+            group = pc.cast(pc.divide(batch.column("batch_num"), batches_per_group), pa.int32())
+            yield pa.RecordBatch.from_arrays(batch.columns + [group], schema=group_schema)
+
+    ds.write_dataset(
+        with_group(),
+        output_dir,
+        schema=group_schema,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("batch_group", pa.int32())]), flavor="hive"),
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=min(max_rows_per_file, 128 * 1024),
+        existing_data_behavior="delete_matching",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+    )
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parquet result store utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_compact = sub.add_parser("compact", help="Merge per-batch Parquet files into large partitioned files")
+    p_compact.add_argument("--src", default="data/results/parquet")
+    p_compact.add_argument("--dst", default="data/results/merged_parquet")
+    p_compact.add_argument("--rows-per-file", type=int, default=1_000_000)
+
+    p_import = sub.add_parser("import-csv", help="Convert existing batch_{n}.csv results to Parquet")
+    p_import.add_argument("--src", default="data/results/batch_results")
+    p_import.add_argument("--dst", default="data/results/parquet")
+    p_import.add_argument("--batch-size", type=int, default=1000, help="BATCH_SIZE used when the CSVs were written")
+
+    args = parser.parse_args()
+    if args.command == "compact":
+        compact(args.src, args.dst, max_rows_per_file=args.rows_per_file)
+        print(f"🧩 Compacted {args.src} -> {args.dst}")
+    elif args.command == "import-csv":
+        n = import_csv_batches(args.src, args.dst, args.batch_size)
+        print(f"💾 Converted {n} CSV batches -> {args.dst}")
@@ -0,0 +1,85 @@
+from urllib.parse import urlsplit
+
+# 브라우저 단계 리소스 차단 정책
+# 필요한 것은 리다이렉트 체인, 최종 URL, HTML, <head> 뿐이므로
+# 이미지 / 미디어 / 폰트 / 스타일시트와 알려진 트래커 호스트 요청은 컨텍스트 route 에서 abort 한다.
+# 메인 문서(navigation) 요청은 절대 막지 않으므로 page.on("response") 의 리다이렉트 기록은 그대로 동작한다.
+# 스크립트는 JS 리다이렉트 / JS 로 만들어지는 head 때문에 막지 않는다 (트래커 호스트만 차단).
+
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font", "stylesheet")
+
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "analytics.twitter.com",
+    "ads-twitter.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "mixpanel.com",
+    "segment.io",
+    "segment.com",
+    "amplitude.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "adnxs.com",
+    "mc.yandex.ru",
+    "newrelic.com",
+    "nr-data.net",
+    "sentry.io",
+)
+
+
+def _host_matches(host, suffixes):
+    # 호스트 자체이거나 그 하위 도메인이면 True
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+
+class ResourcePolicy:
+    def __init__(self, blocked_types=DEFAULT_BLOCKED_TYPES, blocked_hosts=TRACKER_HOSTS):
+        self.blocked_types = frozenset(blocked_types or ())
+        self.blocked_hosts = tuple(h.lower() for h in (blocked_hosts or ()))
+        self.blocked = {}   # 차단 이유 -> 건수
+        self.allowed = 0
+
+    @property
+    def enabled(self):
+        return bool(self.blocked_types or self.blocked_hosts)
+
+    def block_reason(self, request):
+        if request.is_navigation_request():
+            return None
+        if request.resource_type in self.blocked_types:
+            return request.resource_type
+        if self.blocked_hosts:
+            host = (urlsplit(request.url).hostname or "").lower()
+            if _host_matches(host, self.blocked_hosts):
+                return "tracker"
+        return None
+
+    async def _route(self, route):
+        reason = self.block_reason(route.request)
+        if reason is None:
+            self.allowed += 1
+            await route.continue_()
+        else:
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+            await route.abort("blockedbyclient")
+
+    async def install(self, target):
+        # target: BrowserContext 또는 Page
+        if self.enabled:
+            await target.route("**/*", self._route)
+
+    def stats(self):
+        return {"allowed": self.allowed, "blocked": dict(self.blocked)}
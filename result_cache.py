@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import time
+from url_normalize import canonical_key
+
+# 실행 간에 공유되는 수집 결과 캐시 (SQLite)
+# - 키: 정규화된 URL (url_normalize.canonical_key)
+# - 성공 결과와 실패 결과(DNS 실패, 타임아웃 등)를 따로 TTL 관리
+# - max_entries 를 넘으면 마지막 접근 시간이 오래된 것부터 삭제 (LRU)
+# - 여러 shard 프로세스가 같은 파일을 써도 되도록 WAL + busy timeout
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+
+# 캐시에 저장하는 필드 (URL 마다 달라지는 original_url 등은 제외)
+# 스크린샷은 행(row id)마다 따로 저장하므로 넣지 않는다 (다른 행의 파일을 가리키게 된다)
+CACHED_FIELDS = (
+    "final_url",
+    "redirect_chain",
+    "redirect_count",
+    "head_elements",
+    "timeout",
+    "has_meta_refresh",
+    "meta_refresh_url",
+    "duration_sec",
+    "fetch_tier",
+    "timeout_sec",
+    "error_message",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetch_cache (
+    key         TEXT PRIMARY KEY,
+    result      TEXT NOT NULL,
+    negative    INTEGER NOT NULL,
+    stored_at   REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fetch_cache_lru ON fetch_cache (last_access);
+"""
+
+
+class ResultCache:
+    def __init__(self, path, ttl_sec=7 * 24 * 3600, negative_ttl_sec=24 * 3600,
+                 max_entries=1_000_000, evict_every=1000):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.negative_ttl_sec = negative_ttl_sec
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, url):
+        key = canonical_key(url)
+        row = self.conn.execute(
+            "SELECT result, negative, stored_at FROM fetch_cache WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is not None:
+            result, negative, stored_at = row
+            ttl = self.negative_ttl_sec if negative else self.ttl_sec
+            if now - stored_at <= ttl:
+                self.conn.execute("UPDATE fetch_cache SET last_access = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self.hits += 1
+                # 예전에 저장된 필드(screenshot_path 등)는 버린다
+                stored = json.loads(result)
+                cached = {field: stored.get(field) for field in CACHED_FIELDS}
+                cached["original_url"] = url
+                cached["cache_status"] = CACHE_HIT
+                return cached
+        self.misses += 1
+        return None
+
+    def put(self, url, result):
+        now = time.time()
+        payload = {field: result.get(field) for field in CACHED_FIELDS}
+        negative = result.get("final_url") is None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fetch_cache (key, result, negative, stored_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (canonical_key(url), json.dumps(payload, ensure_ascii=False), int(negative), now, now),
+        )
+        self.conn.commit()
+        self._puts += 1
+        if self.max_entries and self._puts % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        # TTL 이 지난 것 + 크기 상한을 넘는 오래된 것 삭제
+        now = time.time()
+        self.conn.execute(
+            "DELETE FROM fetch_cache WHERE (negative = 0 AND stored_at < ?) OR (negative = 1 AND stored_at < ?)",
+            (now - self.ttl_sec, now - self.negative_ttl_sec),
+        )
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM fetch_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM fetch_cache WHERE key IN "
+                "(SELECT key FROM fetch_cache ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+        self.conn.commit()
+
+    def stats(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM fetch_cache").fetchone()
+        return {"entries": count, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,138 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 스크린샷 단계
+# - 브라우저 슬롯 안에서는 캡처만 한다 (뷰포트 clip, JPEG 바이트로 받고 파일은 쓰지 않는다)
+# - 인코딩(WebP) / perceptual hash / 디스크 쓰기는 워커 풀에서 (대기열 크기 제한 = 메모리 상한)
+# - 파일 이름은 전역 행 번호(url_index): {dir}/{url_index // 10000}/{url_index}.jpg
+#   (배치마다 1.png, 2.png ... 로 덮어쓰던 문제 해결, 한 폴더에 수십만 개가 쌓이지 않도록 나눔)
+# - phash 는 결과 행(screenshot_phash)에 들어가므로 이미지를 다시 읽지 않고 비슷한 페이지끼리 묶을 수 있다
+# WebP 변환과 phash 에는 Pillow + numpy 가 필요 (JPEG 저장만 할 때는 필요 없음)
+
+FORMATS = ("jpeg", "webp")
+FILES_PER_DIR = 10_000
+HASH_SIZE = 8   # 8x8 = 64bit
+
+
+def screenshot_path(out_dir, row_id, fmt):
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return os.path.join(out_dir, str(row_id // FILES_PER_DIR), f"{row_id}.{ext}")
+
+
+def _dct_matrix(n):
+    import numpy as np
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = {}
+
+
+def phash(image, hash_size=HASH_SIZE, highfreq_factor=4):
+    """
+    DCT 기반 perceptual hash (imagehash.phash 와 같은 방식). 16 자리 hex 문자열.
+    비슷한 화면은 해밍 거리가 작다: bin(int(a, 16) ^ int(b, 16)).count("1")
+    """
+    import numpy as np
+    from PIL import Image
+    size = hash_size * highfreq_factor
+    if size not in _DCT:
+        _DCT[size] = _dct_matrix(size)
+    dct = _DCT[size]
+    pixels = np.asarray(image.convert("L").resize((size, size), Image.LANCZOS), dtype=np.float64)
+    low = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    bits = (low > np.median(low)).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):0{hash_size * hash_size // 4}x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def process_screenshot(jpeg_bytes, path, fmt="jpeg", quality=70, with_phash=True):
+    # 워커 풀에서 실행: (필요하면) 디코드 → phash / WebP 인코딩 → 저장
+    image = None
+    result = {"screenshot_path": path, "screenshot_phash": None}
+    if with_phash or fmt != "jpeg":
+        from PIL import Image
+        image = Image.open(io.BytesIO(jpeg_bytes))
+        image.load()
+    if with_phash:
+        result["screenshot_phash"] = phash(image)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    if fmt == "jpeg":
+        with open(tmp, "wb") as f:
+            f.write(jpeg_bytes)     # 브라우저가 이미 JPEG 로 인코딩했다
+    else:
+        image.save(tmp, format="WEBP", quality=quality, method=4)
+    os.replace(tmp, path)
+    return result
+
+
+class ScreenshotPipeline:
+    def __init__(self, out_dir, fmt="jpeg", quality=70, clip=(1280, 720), with_phash=True,
+                 workers=2, queue_size=64, timeout_ms=5000):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown screenshot format: {fmt!r} (choose from {FORMATS})")
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.quality = quality
+        self.clip = clip
+        self.with_phash = with_phash
+        self.timeout_ms = timeout_ms
+        self.captured = 0
+        self.saved = 0
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshot")
+        self._slots = asyncio.Semaphore(queue_size)   # 처리 대기 중인 이미지 수 상한
+        self._in_flight = 0
+
+    async def capture(self, page):
+        """
+        브라우저 슬롯 안에서 호출: JPEG 바이트만 받아 온다 (실패하면 None)
+        WebP 로 저장할 때도 JPEG 으로 받는다 (PNG 보다 훨씬 작고 빠르다)
+        """
+        options = {"type": "jpeg", "quality": self.quality if self.fmt == "jpeg" else 90,
+                   "timeout": self.timeout_ms, "animations": "disabled", "caret": "hide"}
+        if self.clip:
+            width, height = self.clip
+            options["clip"] = {"x": 0, "y": 0, "width": width, "height": height}
+        try:
+            image = await page.screenshot(**options)
+        except Exception:
+            self.failed += 1
+            return None
+        self.captured += 1
+        return image
+
+    async def submit(self, row_id, image):
+        """
+        브라우저 슬롯 밖에서 호출: 인코딩 / phash / 저장을 워커 풀에 넘기고 결과 행에 넣을 값을 돌려준다.
+        대기열이 가득 차면 자리가 날 때까지 기다린다 (역압).
+        """
+        path = screenshot_path(self.out_dir, row_id, self.fmt)
+        async with self._slots:
+            self._in_flight += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, process_screenshot, image, path, self.fmt, self.quality, self.with_phash
+                )
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Screenshot {row_id} not saved: {type(e).__name__}: {e}")
+                return {"screenshot_path": None, "screenshot_phash": None}
+            finally:
+                self._in_flight -= 1
+        self.saved += 1
+        return result
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {"captured": self.captured, "saved": self.saved, "failed": self.failed, "in_flight": self._in_flight}
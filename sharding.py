@@ -0,0 +1,72 @@
+import zlib
+from urllib.parse import urlsplit
+
+# --shard i/N 실행을 위한 도구
+# URL 의 호스트 해시로 나누므로 같은 도메인은 항상 같은 shard(프로세스/머신)에서 처리된다.
+# 좌표 서버 없이 각 shard 가 자기 저널을 쓰고, 끝나면 merge_shard_journals 로 합친다.
+
+
+def parse_shard_spec(spec):
+    # "2/8" -> (2, 8)   (0 <= i < N)
+    try:
+        index_str, count_str = spec.split("/")
+        index, count = int(index_str), int(count_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard spec {spec!r}: expected 'i/N', e.g. '0/4'")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec {spec!r}: need 0 <= i < N")
+    return index, count
+
+
+def host_of(url):
+    target = url if "://" in url else "http://" + url
+    try:
+        host = urlsplit(target).hostname
+    except ValueError:
+        host = None
+    return (host or url).lower()
+
+
+def shard_of(url, shard_count):
+    # hash() 는 프로세스마다 값이 달라지므로 crc32 를 사용
+    return zlib.crc32(host_of(url).encode("utf-8", errors="replace")) % shard_count
+
+
+def shard_suffix(index, count):
+    return f"shard{index}of{count}"
+
+
+def shard_dir(base_dir, index, count):
+    # data/results/batch_results -> data/results/batch_results/shard0of4
+    return f"{base_dir}/{shard_suffix(index, count)}"
+
+
+def shard_journal_path(journal_path, index, count):
+    # data/results/fetch_journal.sqlite -> data/results/fetch_journal.shard0of4.sqlite
+    stem, dot, ext = journal_path.rpartition(".")
+    if not dot:
+        return f"{journal_path}.{shard_suffix(index, count)}"
+    return f"{stem}.{shard_suffix(index, count)}.{ext}"
+
+
+def merge_shard_journals(journal, shard_journal_paths):
+    """
+    shard 저널들의 행을 통합 저널에 복사한다. 같은 url_index 는 나중에 기록된 쪽이 이긴다.
+    """
+    merged = 0
+    for path in shard_journal_paths:
+        journal.conn.execute("ATTACH DATABASE ? AS shard", (path,))
+        try:
+            cursor = journal.conn.execute(
+                "INSERT INTO main.fetch_log (url_index, batch_num, url, failed, result, recorded_at) "
+                "SELECT url_index, batch_num, url, failed, result, recorded_at FROM shard.fetch_log WHERE true "
+                "ON CONFLICT(url_index) DO UPDATE SET "
+                "batch_num = excluded.batch_num, url = excluded.url, failed = excluded.failed, "
+                "result = excluded.result, recorded_at = excluded.recorded_at "
+                "WHERE excluded.recorded_at >= fetch_log.recorded_at"
+            )
+            merged += cursor.rowcount
+            journal.conn.commit()
+        finally:
+            journal.conn.execute("DETACH DATABASE shard")
+    return merged
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import re
+import time
+import aiohttp
+from html_analysis import HEAD_SCAN_BYTES, scan_head
+
+# 1단계(정적) 수집기: aiohttp 로 HTML 과 리다이렉트 체인을 가져와 head 를 정적으로 파싱한다.
+# head 가 비었거나 JS 로 만들어지는 것 같은 페이지만 Playwright(2단계)로 넘긴다.
+
+TIER_STATIC = "static"
+TIER_BROWSER = "browser"
+
+MAX_HTML_BYTES = 2 * 1024 * 1024
+BODY_SCAN_CHARS = 64 * 1024   # js_rendered 판정에 보는 <body> 뒤 길이
+JS_RENDERED_MIN_WORDS = 5     # <body> 에 보이는 단어가 이보다 적고 <script> 가 있으면 JS 로 그리는 페이지
+
+JS_REDIRECT_RE = re.compile(
+    r'\b(?:window\.|document\.|top\.|self\.)?location(?:\.href)?\s*=[^=]|location\.(?:replace|assign)\s*\(',
+    re.IGNORECASE,
+)
+CHALLENGE_RE = re.compile(r'cf-chl|challenge-platform|captcha|just a moment', re.IGNORECASE)
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+async def _on_connection_create_start(session, ctx, params):
+    ctx.connect_started = time.monotonic()
+
+
+async def _on_connection_create_end(session, ctx, params):
+    # fetch_static 이 trace_request_ctx 로 넘긴 dict 에 연결 시간을 남긴다
+    if isinstance(ctx.trace_request_ctx, dict):
+        ctx.trace_request_ctx["connect_sec"] = time.monotonic() - ctx.connect_started
+
+
+def create_session(max_connections=200, max_per_host=4, user_agent=None, timeout_sec=10, verify_tls=True):
+    # verify_tls: 브라우저 단계(ignore_https_errors)와 같은 값을 써야 같은 URL 이 단계에 따라 성공 / 실패가 갈리지 않는다
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(_on_connection_create_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=max_per_host,
+        ttl_dns_cache=300,
+        ssl=verify_tls,
+    )
+    headers = {"User-Agent": user_agent} if user_agent else None
+    timeout = aiohttp.ClientTimeout(total=timeout_sec)
+    return aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout, trace_configs=[trace])
+
+
+async def read_body(response, limit):
+    # content.read(n) 는 도착해 있는 만큼만 돌려주므로 끝(또는 limit)까지 이어서 읽는다
+    raw = bytearray()
+    while len(raw) < limit:
+        chunk = await response.content.read(limit - len(raw))
+        if not chunk:
+            break
+        raw += chunk
+    return bytes(raw)
+
+
+def escalation_reason(html, head_elements, status):
+    # 브라우저로 다시 가져와야 하는 이유를 반환 (필요 없으면 None)
+    if status in (403, 429, 503) and CHALLENGE_RE.search(html):
+        return "challenge"
+    if not head_elements:
+        return "empty_head"
+    if JS_REDIRECT_RE.search(html):
+        return "js_redirect"
+    lower = html.lower()
+    if requires_javascript(lower):
+        return "js_required"
+    body_split = lower.split("<body", 1)
+    if len(body_split) == 2 and "<script" in body_split[1]:
+        if count_visible_words(body_split[1][:BODY_SCAN_CHARS], JS_RENDERED_MIN_WORDS) < JS_RENDERED_MIN_WORDS:
+            return "js_rendered"
+    return None
+
+
+def requires_javascript(lower):
+    # <noscript> 바로 안의 텍스트에 "enable" / "turn on" 뒤로 "javascript" 가 있는지 (소문자 html)
+    # 예전 정규식 <noscript[^>]*>[^<]*(?:enable|turn on)[^<]*javascript 와 같은 판정이지만
+    # 역추적이 없어 입력 길이에 선형 (닫히지 않은 <noscript> 뒤에 "enable" 이 많으면 정규식은 수 초씩 걸렸다)
+    pos = lower.find("<noscript")
+    while pos != -1:
+        start = lower.find(">", pos) + 1
+        if not start:
+            return False
+        end = lower.find("<", start)
+        text = lower[start:end] if end != -1 else lower[start:]
+        for word in ("enable", "turn on"):
+            found = text.find(word)
+            if found != -1 and "javascript" in text[found + len(word):]:
+                return True
+        if end == -1:
+            return False
+        pos = lower.find("<noscript", end)
+    return False
+
+
+def count_visible_words(body, stop_at):
+    # 태그와 <script> 내용을 빼고 보이는 단어 수를 센다 (stop_at 개가 되면 멈춤)
+    # 앞으로만 가는 find 한 번씩이라 입력 길이에 선형 (닫히지 않은 <script> 뒤는 모두 스크립트로 본다)
+    words = 0
+    pos = body.find(">") + 1    # <body ...> 의 끝
+    while pos:
+        lt = body.find("<", pos)
+        words += len(body[pos:lt if lt != -1 else len(body)].split())
+        if words >= stop_at or lt == -1:
+            break
+        if body.startswith("<script", lt):
+            end = body.find("</script", lt)
+            if end == -1:
+                break
+            lt = end
+        pos = body.find(">", lt) + 1
+    return words
+
+
+def analyze_static_html(html, status, max_bytes=HEAD_SCAN_BYTES):
+    # HtmlAnalyzer 의 풀에서 실행: (head_elements, meta_refresh_url, escalation reason)
+    # 판정도 앞의 max_bytes 만 본다 (호출하는 쪽도 잘라서 넘긴다: 풀로 보내는 양을 줄이기 위해)
+    html = html[:max_bytes]
+    elements, refresh_url = scan_head(html, max_bytes)
+    return elements, refresh_url, escalation_reason(html, elements, status)
+
+
+async def fetch_static(session, url, max_redirects=10, timeouts=None, retry=False, analyzer=None, capture=None):
+    """
+    반환값: (result, reason)
+    reason 이 None 이 아니면 브라우저 단계로 넘겨야 한다는 뜻.
+    timeouts: timeout_policy.AdaptiveTimeouts (None 이면 세션의 고정 타임아웃)
+    analyzer: html_analysis.HtmlAnalyzer (None 이면 이벤트 루프에서 바로 분석)
+    capture: dict 를 넘기면 응답 원본을 채운다 (capture_archive.CaptureArchive.put 용)
+    """
+    result = {
+        "original_url": url,
+        "final_url": None,
+        "redirect_chain": None,
+        "redirect_count": 0,
+        "head_elements": None,
+        "timeout": False,
+        "has_meta_refresh": False,
+        "meta_refresh_url": None,
+        "duration_sec": None,
+        "fetch_tier": TIER_STATIC,
+        "timeout_sec": session.timeout.total,
+    }
+    start_time = time.time()
+    reason = None
+    request_options = {}
+    trace_ctx = {}
+    if timeouts is not None:
+        request_options["timeout"] = timeouts.client_timeout(retry)
+        request_options["trace_request_ctx"] = trace_ctx
+        result["timeout_sec"] = request_options["timeout"].total
+
+    try:
+        async with session.get(url, allow_redirects=True, max_redirects=max_redirects, **request_options) as response:
+            if timeouts is not None:
+                timeouts.observe("first_byte", time.time() - start_time)
+                if "connect_sec" in trace_ctx:
+                    timeouts.observe("connect", trace_ctx["connect_sec"])
+            redirect_chain = [
+                {
+                    "url": str(r.url),
+                    "status": r.status,
+                    "location": r.headers.get("location", ""),
+                }
+                for r in response.history
+                if r.status in [301, 302, 303, 307, 308]
+            ]
+            result["final_url"] = str(response.url)
+            result["redirect_chain"] = None if not redirect_chain else json.dumps(redirect_chain, ensure_ascii=False)
+            result["redirect_count"] = len(redirect_chain)
+
+            content_type = response.headers.get("content-type", "").lower()
+            # HTML 이 아니면 브라우저로 봐도 head 가 없으므로 여기서 끝낸다
+            if not content_type or content_type.startswith(HTML_CONTENT_TYPES):
+                raw = await read_body(response, MAX_HTML_BYTES)
+                html = raw.decode(response.charset or "utf-8", errors="replace")
+                if capture is not None:
+                    capture.update(
+                        body=raw,
+                        status=response.status,
+                        headers=[[name, value] for name, value in response.headers.items()],
+                        charset=response.charset,
+                        kind="raw",
+                        tier=TIER_STATIC,
+                    )
+
+                if analyzer is not None:
+                    # 풀(특히 process)로 넘기기 전에 head 분석 범위만큼 자른다
+                    elements, refresh_url, reason = await analyzer.run(
+                        analyze_static_html, html[:analyzer.max_bytes], response.status, analyzer.max_bytes
+                    )
+                else:
+                    elements, refresh_url, reason = analyze_static_html(html, response.status)
+                if refresh_url:
+                    result["has_meta_refresh"] = True
+                    result["meta_refresh_url"] = refresh_url
+                if elements:
+                    result["head_elements"] = elements
+        if timeouts is not None:
+            timeouts.observe("html", time.time() - start_time)
+    except asyncio.TimeoutError:
+        result["timeout"] = True
+        if timeouts is not None:
+            timeouts.record_timeout("html")
+    except aiohttp.ClientConnectorError:
+        # DNS 실패 / 연결 거부: 브라우저로 가도 결과가 같으므로 여기서 끝낸다
+        pass
+    except (aiohttp.ClientError, UnicodeError, LookupError, ValueError) as e:
+        reason = f"static_error:{type(e).__name__}"
+
+    result["duration_sec"] = round(time.time() - start_time, 2)
+    return result, reason
@@ -0,0 +1,56 @@
+import pytest
+from html_analysis import find_meta_refresh, parse_refresh_content, scan_head
+
+
+@pytest.mark.parametrize("content, url", [
+    ("0; url=/next", "/next"),
+    ("0;URL='http://a/b'", "http://a/b"),
+    ('5, url="/q?x=1" trailing', "/q?x=1"),
+    ("0;http://a/", "http://a/"),
+    ("  3 ; Url = /spaced  ", "/spaced"),
+    ("5", None),
+    ("0; url=", None),
+    ("soon", None),
+    (None, None),
+])
+def test_parse_refresh_content(content, url):
+    assert parse_refresh_content(content) == url
+
+
+def test_scan_head_elements_and_refresh():
+    html = (
+        "<!DOCTYPE html><html><head>"
+        "<title>Sign <b>in</b></title>"
+        '<meta charset="utf-8">'
+        '<META HTTP-EQUIV="Refresh" CONTENT="0; url=/landing">'
+        "<script>var a = '</head><body>';</script>"
+        '<link rel=" icon  shortcut " href="/favicon.ico"/>'
+        "</head><body><meta http-equiv=refresh content='0;url=/body'></body></html>"
+    )
+    elements, refresh_url = scan_head(html)
+    assert refresh_url == "/landing"
+    # script / style 는 head_extract 처럼 빼고, 그 안의 문자열에서 head 가 끝나지도 않는다
+    assert [e["tag"] for e in elements] == ["title", "meta", "meta", "link"]
+    assert elements[0]["text"] == "Sign in"
+    assert elements[3]["attributes"] == {"rel": "icon shortcut", "href": "/favicon.ico"}
+
+
+def test_scan_head_stops_at_body():
+    html = "<html><head><title>t</title><body><meta http-equiv=refresh content='0;url=/late'>"
+    elements, refresh_url = scan_head(html)
+    assert [e["tag"] for e in elements] == ["title"]
+    assert refresh_url is None
+
+
+def test_scan_head_without_head():
+    assert scan_head("<html><body><p>hi</p></body></html>") == ([], None)
+    assert scan_head("") == ([], None)
+
+
+def test_scan_head_is_bounded():
+    padding = "<meta name=k content=v>" * 1000
+    html = f"<html><head>{padding}<meta http-equiv=refresh content='0;url=/far'></head></html>"
+    assert find_meta_refresh(html) == "/far"
+    assert find_meta_refresh(html, max_bytes=len(padding)) is None
+    elements, _ = scan_head(html, max_bytes=len(padding))
+    assert len(elements) < 1000
@@ -0,0 +1,65 @@
+import pytest
+from journal import FetchJournal, format_ranges, to_ranges
+
+
+def ok(url):
+    return {"original_url": url, "final_url": url}
+
+
+def failed(url):
+    return {"original_url": url, "final_url": None}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    with FetchJournal(str(tmp_path / "journal.sqlite")) as journal:
+        yield journal
+
+
+def test_to_ranges():
+    assert to_ranges([9, 1, 2, 3, 7, 10]) == [(1, 3), (7, 7), (9, 10)]
+    assert to_ranges([]) == []
+    assert format_ranges([(1, 3), (7, 7)]) == "1-3, 7"
+
+
+def test_gap_report_missing_failed_and_batches(journal):
+    # 10 URL, 배치 크기 4 → 배치 1: 0-3, 배치 2: 4-7, 배치 3: 8-9
+    journal.set_run_info(total_urls=10, batch_size=4)
+    for i in (0, 1, 2, 3, 5):
+        journal.record(i, i // 4 + 1, ok(f"http://h/{i}"))
+    journal.record(6, 2, failed("http://h/6"))
+
+    report = journal.gap_report()
+    assert report["batch_count"] == 3
+    assert report["recorded"] == 6
+    assert report["missing_ranges"] == [(4, 4), (7, 9)]
+    assert report["missing_count"] == 4
+    assert report["failed_ranges"] == [(6, 6)]
+    assert report["failed_count"] == 1
+    # 마지막 배치는 2 행뿐이라 2 개가 빠지면 통째로 빠진 배치
+    assert report["untouched_batches"] == [3]
+    assert report["partial_batches"] == {2: 2}
+
+
+def test_gap_report_rerecord_clears_failure(journal):
+    journal.set_run_info(total_urls=2, batch_size=2)
+    journal.record(0, 1, failed("http://h/0"))
+    journal.record(0, 1, ok("http://h/0"))
+    journal.record(1, 1, ok("http://h/1"))
+    report = journal.gap_report()
+    assert report["failed_count"] == 0
+    assert report["missing_count"] == 0
+    assert [r["final_url"] for r in journal.batch_results(1)] == ["http://h/0", "http://h/1"]
+
+
+def test_gap_report_needs_input_size(journal):
+    with pytest.raises(ValueError):
+        journal.gap_report()
+    assert journal.gap_report(total_urls=3, batch_size=2)["untouched_batches"] == [1, 2]
+
+
+def test_batch_size_cannot_change_after_recording(journal):
+    journal.set_run_info(total_urls=10, batch_size=4)
+    journal.record(0, 1, ok("http://h/0"))
+    with pytest.raises(ValueError):
+        journal.set_run_info(total_urls=10, batch_size=5)
@@ -0,0 +1,93 @@
+import csv
+import pytest
+from journal import FetchJournal
+from merge_results import merge
+from work_queue import RESULT_COLUMNS, Job, ShardWriter
+
+BATCH_SIZE = 2
+
+
+@pytest.fixture
+def store(tmp_path):
+    batch_dir = tmp_path / "batches"
+    batch_dir.mkdir()
+    with FetchJournal(str(tmp_path / "journal.sqlite")) as journal:
+        yield ShardWriter(str(batch_dir), journal), str(batch_dir), str(tmp_path / "merged.csv")
+
+
+def write_batch(writer, batch_num, failed_index=None):
+    # 배치의 URL 을 역순으로 끝내도 shard 는 입력 순서
+    first = (batch_num - 1) * BATCH_SIZE
+    writer.open_shard(batch_num, BATCH_SIZE)
+    for url_index in reversed(range(first, first + BATCH_SIZE)):
+        url = f"http://h/{url_index}"
+        result = {"original_url": url, "final_url": None if url_index == failed_index else url}
+        writer.write(Job(batch_num, url_index - first, BATCH_SIZE, url, url_index), result)
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def run_merge(batch_dir, output):
+    return merge(batch_dir, output, workers=2, pool="thread")
+
+
+def test_shards_have_fixed_columns(store):
+    writer, batch_dir, _ = store
+    write_batch(writer, 1, failed_index=0)
+    write_batch(writer, 2)
+    headers = [read_rows(writer.shard_path(n))[0].keys() for n in (1, 2)]
+    assert [list(h) for h in headers] == [list(RESULT_COLUMNS)] * 2
+    assert [r["url_index"] for r in read_rows(writer.shard_path(1))] == ["0", "1"]
+    assert read_rows(writer.shard_path(1))[0]["final_url"] == "null"
+
+
+def test_merge_appends_in_order_and_rebuilds_for_a_filled_hole(store):
+    writer, batch_dir, output = store
+    write_batch(writer, 1)
+    write_batch(writer, 2)
+    assert run_merge(batch_dir, output)["mode"] == "rebuild"
+    assert run_merge(batch_dir, output)["mode"] == "up-to-date"
+
+    write_batch(writer, 4)
+    summary = run_merge(batch_dir, output)
+    assert (summary["mode"], summary["new"], summary["rows"]) == ("append", 1, 6)
+    assert [r["url_index"] for r in read_rows(output)] == ["0", "1", "2", "3", "6", "7"]
+
+    # 빠져 있던 배치 3 은 끝에 붙이면 순서가 깨지므로 다시 만든다
+    write_batch(writer, 3)
+    assert run_merge(batch_dir, output)["mode"] == "rebuild"
+    assert [int(r["url_index"]) for r in read_rows(output)] == list(range(8))
+    assert list(read_rows(output)[0]) == list(RESULT_COLUMNS)
+
+
+def test_merge_rebuilds_when_a_shard_changes_or_disappears(store, tmp_path):
+    writer, batch_dir, output = store
+    for batch_num in (1, 2, 3):
+        write_batch(writer, batch_num)
+    run_merge(batch_dir, output)
+
+    write_batch(writer, 2, failed_index=2)
+    summary = run_merge(batch_dir, output)
+    assert (summary["mode"], summary["changed"]) == ("rebuild", 1)
+    assert read_rows(output)[2]["final_url"] == "null"
+
+    (tmp_path / "batches" / "batch_3.csv").unlink()
+    summary = run_merge(batch_dir, output)
+    assert (summary["mode"], summary["removed"], summary["rows"]) == ("rebuild", 1, 4)
+    assert [int(r["url_index"]) for r in read_rows(output)] == list(range(4))
+
+
+def test_merge_fills_columns_missing_from_old_shards(store, tmp_path):
+    writer, batch_dir, output = store
+    (tmp_path / "batches" / "batch_1.csv").write_text(
+        "original_url,final_url\nhttp://h/0,http://h/0\nhttp://h/1,http://h/1\n", encoding="utf-8"
+    )
+    write_batch(writer, 2)
+    assert run_merge(batch_dir, output)["rows"] == 4
+    rows = read_rows(output)
+    assert list(rows[0]) == ["original_url", "final_url"] + [c for c in RESULT_COLUMNS if c not in ("original_url", "final_url")]
+    assert rows[0]["url_index"] == "null"
+    assert [r["original_url"] for r in rows] == [f"http://h/{i}" for i in range(4)]
@@ -0,0 +1,110 @@
+import asyncio
+import random
+import re
+import socket
+import time
+import pytest
+from fixture_server import host_for, start_server
+from static_fetch import (
+    count_visible_words, create_session, escalation_reason, fetch_static, requires_javascript,
+)
+from timeout_policy import AdaptiveTimeouts
+
+# 예전 판정 (requires_javascript 는 같은 결과를 선형 시간에 낸다)
+OLD_NOSCRIPT_RE = re.compile(r'<noscript[^>]*>[^<]*(?:enable|turn on)[^<]*javascript')
+
+HEAD = "<html><head><title>t</title></head>"
+
+
+@pytest.mark.parametrize("html, expected", [
+    ("<noscript>Please enable JavaScript to continue</noscript>", True),
+    ("<noscript class=x>turn on javascript</noscript>", True),
+    ("<noscript>javascript must be enabled</noscript>", False),
+    ("<noscript><p>enable javascript</p></noscript>", False),
+    ("<noscript>enable <b>javascript</b></noscript>", False),
+    ("<p>enable javascript</p>", False),
+    ("<noscript>enable javascript", True),
+    ("<noscript", False),
+])
+def test_requires_javascript(html, expected):
+    lower = html.lower()
+    assert requires_javascript(lower) is expected
+    assert bool(OLD_NOSCRIPT_RE.search(lower)) is expected
+
+
+def test_requires_javascript_matches_old_regex():
+    rng = random.Random(0)
+    pieces = ["<noscript>", "<noscript a=1>", "</noscript>", "<p>", "enable ", "turn on ", "javascript", "x ", ">", "<"]
+    for _ in range(3000):
+        lower = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+        assert requires_javascript(lower) is bool(OLD_NOSCRIPT_RE.search(lower)), lower
+
+
+def test_requires_javascript_is_linear_on_unclosed_noscript():
+    lower = "<noscript>" + "enable " * 50_000
+    start = time.monotonic()
+    assert requires_javascript(lower) is False
+    assert time.monotonic() - start < 1.0
+
+
+def test_count_visible_words():
+    body = " class=x><div>one two</div><script>var a = 'three four five';</script><p>three</p>"
+    assert count_visible_words(body, 10) == 3
+    assert count_visible_words(body, 2) == 2
+    assert count_visible_words("><script>never closed words words words", 10) == 0
+    # 텍스트 조각 사이에서 멈춘다 (뒤의 조각은 보지 않는다)
+    assert count_visible_words(">a<i>b<i>c<i>d", 2) == 2
+
+
+@pytest.mark.parametrize("html, status, reason", [
+    (HEAD + "<body><p>plenty of visible words in this body</p><script></script></body>", 200, None),
+    ("<html><body>no head</body></html>", 200, "empty_head"),
+    (HEAD + "<body><script>window.location.href = '/x';</script></body>", 200, "js_redirect"),
+    (HEAD + "<body><noscript>Enable JavaScript</noscript>words words words words words</body>", 200, "js_required"),
+    (HEAD + "<body><div id=app></div><script src=app.js></script></body>", 200, "js_rendered"),
+    (HEAD + "<body>Just a moment...</body>", 503, "challenge"),
+])
+def test_escalation_reason(html, status, reason):
+    elements = [] if "<head>" not in html else [{"tag": "title", "attributes": {}, "text": "t"}]
+    assert escalation_reason(html, elements, status) == reason
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((host_for(0), 0))
+        return sock.getsockname()[1]
+
+
+def test_fetch_static_against_fixture_server():
+    async def run():
+        port = free_port()
+        runner = await start_server(port, hosts=1, body_kb=4, hang_sec=5)
+        base = f"http://{host_for(0)}:{port}"
+        timeouts = AdaptiveTimeouts()
+        try:
+            async with create_session() as session:
+                paths = ["/ok/1", "/meta_refresh/2", "/js_redirect/3", "/redirect/mix/3/4", "/empty_head/5"]
+                return base, timeouts, [
+                    await fetch_static(session, base + path, timeouts=timeouts) for path in paths
+                ]
+        finally:
+            await runner.cleanup()
+
+    base, timeouts, results = asyncio.run(run())
+    (ok, ok_reason), (refresh, refresh_reason), (js, js_reason), (redirect, _), (empty, empty_reason) = results
+
+    assert ok["final_url"] == base + "/ok/1"
+    assert ok_reason is None
+    assert ok["head_elements"][0] == {"tag": "title", "attributes": {}, "text": "Account verification 1"}
+    assert ok["timeout_sec"] == timeouts.deadline("html")
+
+    assert refresh["has_meta_refresh"] and refresh["meta_refresh_url"] == "/ok/2"
+    assert refresh_reason is None
+    assert js_reason == "js_redirect"
+
+    assert redirect["final_url"] == base + "/ok/4"
+    assert redirect["redirect_count"] == 3
+    assert empty_reason == "empty_head" and empty["head_elements"] is None
+
+    stats = timeouts.stats()
+    assert stats["html"]["observed"] == 5 and stats["html"]["timeouts"] == 0
@@ -0,0 +1,72 @@
+from timeout_policy import (
+    DEFAULT_INITIAL_SEC, DEFAULT_MIN_SEC, FIXED_TIMEOUT_SEC, STAGES, AdaptiveTimeouts, LatencyHistogram,
+)
+
+
+def test_initial_deadlines_before_warmup():
+    timeouts = AdaptiveTimeouts(warmup=10)
+    for _ in range(9):
+        timeouts.observe("first_byte", 0.05)
+    assert {stage: timeouts.deadline(stage) for stage in STAGES} == DEFAULT_INITIAL_SEC
+
+
+def test_fast_sites_hit_the_per_stage_floor():
+    timeouts = AdaptiveTimeouts(warmup=10)
+    for stage in STAGES:
+        for _ in range(100):
+            timeouts.observe(stage, 0.05)
+    assert {stage: timeouts.deadline(stage) for stage in STAGES} == DEFAULT_MIN_SEC
+    assert DEFAULT_MIN_SEC["connect"] < FIXED_TIMEOUT_SEC
+
+
+def test_connect_deadline_follows_the_distribution():
+    timeouts = AdaptiveTimeouts(warmup=10)
+    for _ in range(100):
+        timeouts.observe("connect", 1.5)
+    assert DEFAULT_MIN_SEC["connect"] < timeouts.deadline("connect") < FIXED_TIMEOUT_SEC
+
+
+def test_deadline_never_exceeds_the_old_fixed_timeout():
+    timeouts = AdaptiveTimeouts(warmup=10)
+    for _ in range(100):
+        timeouts.observe("html", 30.0)
+    assert timeouts.deadline("html") == FIXED_TIMEOUT_SEC
+
+
+def test_timeouts_do_not_raise_the_deadline():
+    # 잘린 값(censored)을 분포에 넣으면 타임아웃이 날 때마다 마감 시간이 올라간다
+    timeouts = AdaptiveTimeouts(warmup=10)
+    for _ in range(100):
+        timeouts.observe("first_byte", 0.2)
+    before = timeouts.deadline("first_byte")
+    for _ in range(1000):
+        timeouts.record_timeout("first_byte")
+    assert timeouts.deadline("first_byte") == before == DEFAULT_MIN_SEC["first_byte"]
+    assert timeouts.stats()["first_byte"]["timeouts"] == 1000
+
+
+def test_retry_uses_the_cap():
+    timeouts = AdaptiveTimeouts(warmup=10)
+    for _ in range(100):
+        timeouts.observe("html", 0.05)
+    assert timeouts.deadline("html", retry=True) == FIXED_TIMEOUT_SEC
+    assert AdaptiveTimeouts(retry_factor=1.5).deadline("dom_loaded", retry=True) == FIXED_TIMEOUT_SEC * 1.5
+
+
+def test_fixed_mode_ignores_observations():
+    timeouts = AdaptiveTimeouts(adaptive=False, warmup=1, initial_sec={"html": 7.0})
+    for _ in range(100):
+        timeouts.observe("html", 0.05)
+    assert timeouts.deadline("html") == 7.0
+
+
+def test_histogram_quantile_and_decay():
+    hist = LatencyHistogram(decay_every=100)
+    assert hist.quantile(0.5) is None
+    for _ in range(90):
+        hist.add(0.1)
+    for _ in range(10):
+        hist.add(5.0)
+    assert hist.total == 50
+    assert 0.1 <= hist.quantile(0.5) < 0.12
+    assert 4.5 < hist.quantile(0.99) < 5.8
@@ -0,0 +1,42 @@
+import pytest
+from url_normalize import Deduplicator, canonical_key, dedup_urls, fan_out
+
+
+@pytest.mark.parametrize("url, key", [
+    ("https://H/x/", "https://h/x"),
+    ("h/x", "http://h/x"),
+    ("HTTP://h:80/x?utm_source=a&b=1", "http://h/x?b=1"),
+    ("https://h:443/x?b=2&a=1#frag", "https://h/x?a=1&b=2"),
+    ("http://h:8080", "http://h:8080/"),
+    ("http://h./x?gclid=1", "http://h/x"),
+])
+def test_canonical_key(url, key):
+    assert canonical_key(url) == key
+
+
+def test_canonical_key_keeps_scheme():
+    # http / https 는 결과가 다를 수 있어 같은 키가 되면 안 된다
+    assert canonical_key("http://h/x") != canonical_key("https://h/x")
+    assert canonical_key("http://h/x", "host_path") == canonical_key("https://h/x/?q=1", "host_path") == "h/x"
+
+
+def test_canonical_key_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        canonical_key("http://h/x", "exact")
+
+
+def test_deduplicator_first_row_is_primary():
+    dedup = Deduplicator()
+    assert dedup.primary_for("http://h/x", 0) == 0
+    assert dedup.primary_for("https://h/x", 1) == 1
+    assert dedup.primary_for("h/x/", 2) == 0
+    dedup.wait_for(0, "job-2")
+    assert dedup.unique == 2 and dedup.saved == 1
+    assert dedup.pop_waiters(0) == ["job-2"]
+    assert dedup.pop_waiters(0) == []
+
+
+def test_fan_out_and_dedup_urls():
+    copied = fan_out({"original_url": "http://h/x", "final_url": "http://h/x"}, "h/x/", 0)
+    assert copied == {"original_url": "http://h/x/", "final_url": "http://h/x", "dedup_of": 0}
+    assert dedup_urls(["h/x", "http://H/x/", "https://h/x"]) == (["h/x", "https://h/x"], [0, 0, 1])
@@ -0,0 +1,61 @@
+import url_reader
+from url_reader import count_urls, iter_batches, iter_url_rows, load_offset_index
+
+
+def write_csv(path, urls):
+    lines = ["id,original_url,label"]
+    lines += [f"{n},{url},l{n}" for n, url in enumerate(urls)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_skips_na_values_like_dropna(tmp_path):
+    path = write_csv(tmp_path / "urls.csv", ["a.com", "", "NaN", "b.com", "null", "c.com"])
+    rows = list(iter_url_rows(path, passthrough=["label"]))
+    assert [(r.url_index, r.row_number, r.url) for r in rows] == [(0, 0, "a.com"), (1, 3, "b.com"), (2, 5, "c.com")]
+    assert rows[1].extra == {"label": "l3"}
+    assert count_urls(path) == 3
+
+
+def test_offsets_resume_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(url_reader, "CHECKPOINT_EVERY", 4)
+    urls = [f"h{n}.com" for n in range(10)]
+    path = write_csv(tmp_path / "urls.csv", urls)
+    assert count_urls(path) is None
+    assert [r.url for r in iter_url_rows(path)] == urls
+
+    index = load_offset_index(path, "original_url")
+    assert index["total_urls"] == 10
+    assert [cp[0] for cp in index["checkpoints"]] == [0, 4, 8]
+
+    # start_index 근처 체크포인트로 seek 해도 같은 행이 나온다
+    assert [(r.url_index, r.url) for r in iter_url_rows(path, start_index=6)] == list(enumerate(urls))[6:]
+    assert [r.url_index for r in iter_url_rows(path, start_index=8)] == [8, 9]
+
+
+def test_offsets_point_at_record_start(tmp_path, monkeypatch):
+    monkeypatch.setattr(url_reader, "CHECKPOINT_EVERY", 2)
+    urls = ["a.com", "", "b.com", "c.com", "d.com", "e.com"]
+    path = write_csv(tmp_path / "urls.csv", urls)
+    list(iter_url_rows(path))
+    checkpoints = load_offset_index(path, "original_url")["checkpoints"]
+    assert [cp[:2] for cp in checkpoints] == [[0, 0], [2, 3], [4, 5]]
+    # 체크포인트 오프셋에서 읽은 첫 줄이 그 url_index 의 행
+    raw = open(path, "rb").read()
+    present = [u for u in urls if u]
+    for url_index, _, offset in checkpoints[1:]:
+        assert raw[offset:].split(b"\n", 1)[0].split(b",")[1].decode() == present[url_index]
+
+
+def test_changed_input_discards_index(tmp_path):
+    path = write_csv(tmp_path / "urls.csv", ["a.com", "b.com"])
+    list(iter_url_rows(path))
+    write_csv(tmp_path / "urls.csv", ["a.com", "b.com", "c.com"])
+    assert load_offset_index(path, "original_url") is None
+    assert [r.url for r in iter_url_rows(path, start_index=2)] == ["c.com"]
+
+
+def test_iter_batches_groups_by_url_index(tmp_path):
+    path = write_csv(tmp_path / "urls.csv", [f"h{n}.com" for n in range(7)])
+    batches = [(n, [r.url_index for r in rows]) for n, rows in iter_batches(iter_url_rows(path, start_index=2), 3)]
+    assert batches == [(1, [2]), (2, [3, 4, 5]), (3, [6])]
@@ -0,0 +1,155 @@
+import asyncio
+import bisect
+import math
+import time
+
+# 적응형 타임아웃
+# 고정 timeout=10000 대신, 최근 요청의 단계별 소요 시간 분포(quantile)를 보고 마감 시간을 정한다.
+# - 예전 고정 타임아웃(10s)은 상한: 멈춘 연결은 단계별 하한(1~3s)까지 일찍 끊고, 예전보다 오래 붙잡지는 않는다
+# - 타임아웃 난 요청(censored)은 분포에 넣지 않는다 (마감 시간에서 잘린 값이라 넣으면 타임아웃마다 마감 시간이 올라간다)
+#   느리지만 살아 있는 사이트는 재시도 레인의 긴 마감 시간에서 받는다
+#   connect:    TCP 연결까지 (정적 단계)
+#   first_byte: 응답 헤더/첫 응답까지 — 이 시간 안에 아무것도 안 오면 멈춘 연결로 보고 바로 끊는다
+#   html:       정적 단계에서 HTML 전체를 받을 때까지
+#   dom_loaded: 브라우저 단계 DOMContentLoaded 까지
+# 타임아웃 난 URL 은 재시도 레인(Crawler.run_jobs)에서 상한 마감 시간(max * retry_factor, 기본 10s)으로 한 번 더 가져온다.
+
+STAGES = ("connect", "first_byte", "html", "dom_loaded")
+
+FIXED_TIMEOUT_SEC = 10.0  # 예전 timeout=10000
+
+DEFAULT_INITIAL_SEC = {"connect": 5.0, "first_byte": 8.0, "html": 10.0, "dom_loaded": 10.0}
+DEFAULT_MIN_SEC = {"connect": 1.0, "first_byte": 2.0, "html": 3.0, "dom_loaded": 3.0}
+DEFAULT_MAX_SEC = {stage: FIXED_TIMEOUT_SEC for stage in STAGES}
+
+# 10ms ~ 300s 를 로그 간격으로 나눈 히스토그램 경계
+_BUCKET_BOUNDS = [0.01 * (1.15 ** i) for i in range(int(math.log(300 / 0.01, 1.15)) + 2)]
+
+
+class LatencyHistogram:
+    # 고정 크기 히스토그램 (관측 수와 상관없이 메모리 일정)
+    # decay_every 마다 카운트를 반으로 줄여서 최근 분포를 더 반영한다
+    def __init__(self, decay_every=5000):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.total = 0
+        self.decay_every = decay_every
+        self._since_decay = 0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self.total += 1
+        self._since_decay += 1
+        if self.decay_every and self._since_decay >= self.decay_every:
+            self.counts = [c // 2 for c in self.counts]
+            self.total = sum(self.counts)
+            self._since_decay = 0
+
+    def quantile(self, q):
+        if self.total == 0:
+            return None
+        target = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return _BUCKET_BOUNDS[min(i, len(_BUCKET_BOUNDS) - 1)]
+        return _BUCKET_BOUNDS[-1]
+
+
+class AdaptiveTimeouts:
+    def __init__(self, quantile=0.95, multiplier=2.0, warmup=50, retry_factor=1.0,
+                 initial_sec=None, min_sec=None, max_sec=None, adaptive=True):
+        # adaptive=False 면 initial_sec 를 고정 마감 시간으로 쓴다 (재시도는 그대로)
+        self.adaptive = adaptive
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.warmup = warmup
+        self.retry_factor = retry_factor
+        self.initial_sec = {**DEFAULT_INITIAL_SEC, **(initial_sec or {})}
+        self.min_sec = {**DEFAULT_MIN_SEC, **(min_sec or {})}
+        self.max_sec = {**DEFAULT_MAX_SEC, **(max_sec or {})}
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.timeouts = {stage: 0 for stage in STAGES}
+
+    def observe(self, stage, seconds):
+        # 성공한 요청의 단계별 소요 시간
+        self.histograms[stage].add(seconds)
+
+    def record_timeout(self, stage):
+        # 횟수만 센다 (잘린 값은 quantile 에 넣지 않는다)
+        self.timeouts[stage] += 1
+
+    def deadline(self, stage, retry=False):
+        if retry:
+            return round(self.max_sec[stage] * self.retry_factor, 2)
+        hist = self.histograms[stage]
+        if not self.adaptive or hist.total < self.warmup:
+            return self.initial_sec[stage]
+        value = hist.quantile(self.quantile) * self.multiplier
+        return round(min(self.max_sec[stage], max(self.min_sec[stage], value)), 2)
+
+    def client_timeout(self, retry=False):
+        # 정적 단계(aiohttp)용: sock_read 는 읽기 사이의 공백 시간이라 멈춘 연결을 일찍 끊는다
+        import aiohttp
+        return aiohttp.ClientTimeout(
+            total=self.deadline("html", retry),
+            sock_connect=self.deadline("connect", retry),
+            sock_read=self.deadline("first_byte", retry),
+        )
+
+    def stats(self):
+        return {
+            stage: {
+                "deadline_sec": self.deadline(stage),
+                "p50_sec": self.histograms[stage].quantile(0.5),
+                "observed": self.histograms[stage].total,
+                "timeouts": self.timeouts[stage],
+            }
+            for stage in STAGES
+        }
+
+
+class StalledError(asyncio.TimeoutError):
+    pass
+
+
+async def goto_with_deadlines(page, url, timeouts, retry=False):
+    """
+    page.goto(wait_until='domcontentloaded') 를 적응형 마감 시간으로 실행한다.
+    first_byte 마감 안에 응답이 하나도 없으면 DOMContentLoaded 마감을 기다리지 않고 끊는다.
+    반환: page.goto 의 Response (최종 문서 응답, 없으면 None)
+    """
+    dom_deadline = timeouts.deadline("dom_loaded", retry)
+    first_byte_deadline = min(timeouts.deadline("first_byte", retry), dom_deadline)
+    first_response = asyncio.Event()
+    first_byte_at = []
+
+    def on_response(response):
+        if not first_byte_at:
+            first_byte_at.append(time.time())
+            first_response.set()
+
+    page.on("response", on_response)
+    start_time = time.time()
+    navigation = asyncio.ensure_future(page.goto(url, timeout=dom_deadline * 1000, wait_until='domcontentloaded'))
+    waiter = asyncio.ensure_future(first_response.wait())
+    try:
+        await asyncio.wait({navigation, waiter}, timeout=first_byte_deadline, return_when=asyncio.FIRST_COMPLETED)
+        if not navigation.done() and not first_response.is_set():
+            navigation.cancel()
+            timeouts.record_timeout("first_byte")
+            raise StalledError(f"Timeout {first_byte_deadline}s exceeded: no response (stalled connection)")
+        if first_byte_at:
+            timeouts.observe("first_byte", first_byte_at[0] - start_time)
+        try:
+            response = await navigation
+        except Exception as e:
+            if "Timeout" in str(e):
+                timeouts.record_timeout("dom_loaded")
+            raise
+        timeouts.observe("dom_loaded", time.time() - start_time)
+        return response
+    finally:
+        waiter.cancel()
+        if not navigation.done():
+            navigation.cancel()
@@ -0,0 +1,114 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# URL 정규화 / 중복 제거
+# 끝의 '/', 호스트 대소문자, 기본 포트, 추적 파라미터, fragment 만 다른 URL 은 한 번만 가져오고
+# 결과를 원래의 모든 행에 복사(fan-out)한다.
+#   canonical: scheme + host + port + path + (추적 파라미터를 뺀 정렬된 query)
+#              http / https 는 결과(인증서 오류, 리다이렉트)가 다를 수 있어 따로 가져온다 (result_cache 키도 이것)
+#   host_path: host + port + path (scheme 과 query 전체 무시)
+
+DEDUP_MODES = ("canonical", "host_path")
+
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "dclid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok",
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def with_scheme(url):
+    # 기존 스크립트와 같은 규칙: http 로 시작하지 않으면 http:// 를 붙인다
+    return "http://" + url if not url.startswith("http") else url
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name.startswith("utm_") or name in TRACKING_PARAMS
+
+
+def canonical_key(url, mode="canonical"):
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: {mode!r} (choose from {DEDUP_MODES})")
+    raw = url.strip()
+    target = raw if "://" in raw else "http://" + raw
+    try:
+        parts = urlsplit(target)
+        host = (parts.hostname or "").rstrip(".")
+        port = parts.port
+    except ValueError:
+        return raw.lower()
+    if not host:
+        return raw.lower()
+
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        netloc = f"{host}:{port}"
+    path = parts.path.rstrip("/") or "/"
+    if mode == "host_path":
+        return netloc + path
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    )
+    return f"{parts.scheme.lower()}://{netloc}{path}" + ("?" + urlencode(query) if query else "")
+
+
+def _digest(key):
+    # 64만 건을 메모리에 들고 있으므로 키 문자열 대신 8바이트 해시만 저장
+    return hashlib.blake2b(key.encode("utf-8", errors="replace"), digest_size=8).digest()
+
+
+class Deduplicator:
+    """
+    스트림 순서상 처음 나온 행(primary)만 가져오고, 나머지(duplicate)는 primary 의 결과를 기다렸다가 복사한다.
+    """
+
+    def __init__(self, mode="canonical"):
+        self.mode = mode
+        self._primary = {}   # key digest -> primary url_index
+        self._waiting = {}   # primary url_index -> [duplicate job, ...]
+        self.unique = 0
+        self.saved = 0
+
+    def primary_for(self, url, url_index):
+        # 이 URL 의 primary url_index (처음 보는 키면 자기 자신)
+        digest = _digest(canonical_key(url, self.mode))
+        primary = self._primary.setdefault(digest, url_index)
+        if primary == url_index:
+            self.unique += 1
+        return primary
+
+    def wait_for(self, primary_index, job):
+        self._waiting.setdefault(primary_index, []).append(job)
+        self.saved += 1
+
+    def count_saved(self):
+        self.saved += 1
+
+    def pop_waiters(self, primary_index):
+        return self._waiting.pop(primary_index, [])
+
+
+def fan_out(result, original_url, primary_index):
+    # primary 결과를 duplicate 행용으로 복사
+    copied = dict(result)
+    copied["original_url"] = with_scheme(original_url)
+    copied["dedup_of"] = primary_index
+    return copied
+
+
+def dedup_urls(urls, mode="canonical"):
+    """
+    리스트 버전 (main.py 용)
+    반환: (가져올 URL 리스트, 각 입력 URL 이 몇 번째 가져올 URL 을 쓰는지)
+    """
+    positions = {}
+    targets, mapping = [], []
+    for url in urls:
+        digest = _digest(canonical_key(url, mode))
+        if digest not in positions:
+            positions[digest] = len(targets)
+            targets.append(url)
+        mapping.append(positions[digest])
+    return targets, mapping
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+import sys
+from collections import namedtuple
+
+# 입력 URL CSV 스트리밍 리더
+# - pd.read_csv 로 전체를 메모리에 올리지 않고 한 행씩 읽어서 바로 작업 큐로 흘려보낸다
+# - url_index 는 original_url 이 비어 있지 않은 행의 순번 (기존 df["original_url"].dropna() 의 위치와 같음)
+# - 읽으면서 {EXEC_FILE}.offsets.json 에 url_index -> 바이트 오프셋 체크포인트를 남기므로
+#   다음 실행에서는 start_index 근처까지 seek 해서 앞부분을 다시 파싱하지 않는다
+
+InputRow = namedtuple("InputRow", ["url_index", "row_number", "url", "extra"])
+
+CHECKPOINT_EVERY = 10_000
+
+# pd.read_csv 가 기본으로 NaN 취급하는 값 (dropna 와 같은 결과를 내기 위해)
+NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+class _OffsetLines:
+    # csv.reader 에 한 줄씩 넘기면서 지금까지 읽은 바이트 위치를 기억한다
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode("utf-8", errors="replace")
+
+
+def _index_path(path):
+    return f"{path}.offsets.json"
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def load_offset_index(path, column):
+    try:
+        with open(_index_path(path), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("file") != _file_signature(path) or index.get("column") != column:
+        return None  # 입력 파일이 바뀌었으면 버린다
+    return index
+
+
+def _save_offset_index(path, index):
+    tmp = _index_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, _index_path(path))
+
+
+def count_urls(path, column="original_url"):
+    # 인덱스에 기록된 전체 URL 수 (한 번 끝까지 읽은 적이 없으면 None)
+    index = load_offset_index(path, column)
+    return index.get("total_urls") if index else None
+
+
+def iter_url_rows(path, column="original_url", passthrough=None, start_index=0):
+    """
+    passthrough: None(추가 컬럼 없음) / 컬럼 이름 리스트 / True(모든 컬럼)
+    start_index: 이 url_index 부터 yield
+    """
+    index = load_offset_index(path, column) or {
+        "file": _file_signature(path),
+        "column": column,
+        "every": CHECKPOINT_EVERY,
+        "checkpoints": [[0, 0, None]],
+        "total_urls": None,
+    }
+    every = index["every"]
+    checkpoints = index["checkpoints"]
+
+    with open(path, "rb") as f:
+        lines = _OffsetLines(f)
+        reader = csv.reader(lines)
+        header = next(reader)
+        if header:
+            header[0] = header[0].lstrip("\ufeff")
+        try:
+            url_col = header.index(column)
+        except ValueError:
+            raise ValueError(f"Column {column!r} not found in {path}")
+        if passthrough is True:
+            extra_cols = list(enumerate(header))
+        elif passthrough:
+            missing = [c for c in passthrough if c not in header]
+            if missing:
+                raise ValueError(f"Passthrough columns not found in {path}: {missing}")
+            extra_cols = [(header.index(c), c) for c in passthrough]
+        else:
+            extra_cols = []
+        checkpoints[0][2] = lines.offset
+
+        # start_index 이하에서 가장 가까운 체크포인트로 점프
+        url_index, row_number, offset = max(
+            (cp for cp in checkpoints if cp[0] <= start_index), key=lambda cp: cp[0]
+        )
+        f.seek(offset)
+        lines.offset = offset
+        known_until = checkpoints[-1][0]
+        dirty = False
+
+        while True:
+            record_start = lines.offset
+            try:
+                record = next(reader)
+            except StopIteration:
+                break
+            if not record:
+                continue  # 빈 줄은 pandas 도 건너뛴다
+            url = record[url_col] if url_col < len(record) else ""
+            if url not in NA_VALUES:
+                if url_index % every == 0 and url_index > known_until:
+                    checkpoints.append([url_index, row_number, record_start])
+                    known_until = url_index
+                    dirty = True
+                if url_index >= start_index:
+                    extra = {
+                        name: (record[i] if i < len(record) and record[i] not in NA_VALUES else None)
+                        for i, name in extra_cols
+                    }
+                    yield InputRow(url_index, row_number, url, extra)
+                url_index += 1
+            row_number += 1
+            if dirty and url_index % every == 0:
+                _save_offset_index(path, index)
+                dirty = False
+
+    if index["total_urls"] != url_index:
+        index["total_urls"] = url_index
+        dirty = True
+    if dirty:
+        _save_offset_index(path, index)
+
+
+def iter_batches(rows, batch_size):
+    # url_index // batch_size 가 같은 행끼리 묶는다 (배치 번호 = 몫 + 1)
+    batch, current = [], None
+    for row in rows:
+        key = row.url_index // batch_size
+        if batch and key != current:
+            yield current + 1, batch
+            batch = []
+        current = key
+        batch.append(row)
+    if batch:
+        yield current + 1, batch
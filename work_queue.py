@@ -0,0 +1,313 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from collections import deque, namedtuple
+from sharding import shard_of
+from url_normalize import fan_out
+from url_reader import iter_batches
+
+# 배치 경계에서 기다리지 않는 스트리밍 작업 큐
+# - 하나의 이벤트 루프에서 bounded queue 로 URL 을 흘려보내고 워커는 계속 바쁘게 유지
+# - limiter(host_scheduler.HostLimiter)를 주면 토큰이 없는 호스트의 Job 은 호스트별 대기열에 세워 두고
+#   워커는 그동안 다른 호스트의 Job 을 처리한다
+# - 결과는 끝나는 대로 저널(journal.FetchJournal)에 기록하고,
+#   배치의 모든 URL 이 끝나면 입력 순서대로 batch_{n}.csv 로 확정 (batch_counter.py 와 호환)
+
+Job = namedtuple("Job", ["batch_num", "index", "batch_total", "url", "url_index"])
+
+log = logging.getLogger(__name__)
+
+HOST_RECHECK_SEC = 1.0   # 동시 접속이 꽉 찬 호스트는 release 알림과 별도로 이 간격으로도 다시 확인
+
+
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# batch_{n}.csv / parquet / CsvFileSink 의 고정 컬럼 (배치마다 컬럼이 달라지면 merge 가 통합 파일을 다시 만든다)
+RESULT_COLUMNS = (
+    "url_index", "original_url", "final_url", "redirect_chain", "redirect_count", "head_elements",
+    "timeout", "has_meta_refresh", "meta_refresh_url", "duration_sec", "fetch_tier", "timeout_sec",
+    "cache_status", "error_message", "screenshot_path", "screenshot_phash", "dedup_of",
+)
+
+
+class ShardWriter:
+    def __init__(self, result_dir, journal, na_rep='null', on_shard_done=None,
+                 output_formats=("csv",), parquet_dir=None, dedup=None, columns=RESULT_COLUMNS):
+        unknown = set(output_formats) - set(OUTPUT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown output formats: {sorted(unknown)} (choose from {OUTPUT_FORMATS})")
+        if "parquet" in output_formats and not parquet_dir:
+            raise ValueError("parquet_dir is required for parquet output")
+        self.result_dir = result_dir
+        self.journal = journal
+        self.na_rep = na_rep
+        self.on_shard_done = on_shard_done
+        self.output_formats = tuple(output_formats)
+        self.parquet_dir = parquet_dir
+        self.dedup = dedup
+        self.columns = list(columns)
+        self._expected = {}
+        self._received = {}
+        self.completed_paths = []
+
+    def shard_path(self, batch_num):
+        return f"{self.result_dir}/batch_{batch_num}.csv"
+
+    def open_shard(self, batch_num, expected, already_done=0):
+        # already_done: 이전 실행에서 저널에 이미 기록된 URL 수
+        self._expected[batch_num] = expected
+        self._received[batch_num] = already_done
+        if already_done >= expected:
+            self._finalize(batch_num)
+
+    def write(self, job, result):
+        self._record(job, result)
+        # 이 결과를 기다리던 중복 URL 행에도 복사
+        if self.dedup is not None:
+            for waiting in self.dedup.pop_waiters(job.url_index):
+                self._record(waiting, fan_out(result, waiting.url, job.url_index))
+
+    def write_duplicate(self, job, primary_index):
+        # primary 가 이미 저널에 있는 경우 (이전 실행 등)
+        self._record(job, fan_out(self.journal.result_for(primary_index), job.url, primary_index))
+
+    def _record(self, job, result):
+        self.journal.record(job.url_index, job.batch_num, result)
+        self._received[job.batch_num] += 1
+        if self._received[job.batch_num] >= self._expected[job.batch_num]:
+            self._finalize(job.batch_num)
+
+    def _finalize(self, batch_num):
+        indexed = self.journal.batch_results(batch_num, with_index=True)
+        path = None
+        if "parquet" in self.output_formats:
+            from parquet_store import write_batch_parquet  # pyarrow 는 Parquet 출력 시에만 필요
+            path = write_batch_parquet(indexed, self.parquet_dir, batch_num)
+        if "csv" in self.output_formats:
+            import pandas as pd   # 배치를 확정할 때만 필요 (리포트 등 가벼운 명령은 pandas 없이 시작)
+            path = self.shard_path(batch_num)
+            tmp = path + ".tmp"
+            df = pd.DataFrame([{**result, "url_index": url_index} for url_index, result in indexed])
+            df = df.reindex(columns=self.columns)
+            if "dedup_of" in df.columns:
+                df["dedup_of"] = df["dedup_of"].astype("Int64")
+            df.to_csv(tmp, index=False, na_rep=self.na_rep)
+            os.replace(tmp, path)
+
+        del self._expected[batch_num], self._received[batch_num]
+        self.completed_paths.append(path)
+        if self.on_shard_done is not None:
+            self.on_shard_done(batch_num, path)
+
+    @property
+    def pending_shards(self):
+        return sorted(self._expected)
+
+
+async def run_queue(jobs, handler, workers, queue_size=None, on_enqueue=None, limiter=None, key=None):
+    """
+    jobs: Job 을 순서대로 내는 이터러블 (제너레이터 가능, 큐가 차면 생산자가 기다린다)
+    handler: async def handler(job)
+    on_enqueue: def on_enqueue(job) — 큐에 넣기 직전에 호출 (DNS 선행 해석 등)
+    limiter: host_scheduler.HostLimiter — 주면 key(job) 호스트의 슬롯 / 토큰을 잡은 Job 만 handler 에 넘기고
+             handler 가 끝나면 limiter.release(key(job)). 막힌 호스트의 Job 은 queue_size 개까지 세워 둔다
+    """
+    if limiter is not None:
+        await _HostDispatcher(jobs, limiter, key, queue_size or workers * 2, on_enqueue).run(handler, workers)
+        return
+    queue = asyncio.Queue(maxsize=queue_size or workers * 2)
+
+    async def producer():
+        for job in jobs:
+            if on_enqueue is not None:
+                on_enqueue(job)
+            await queue.put(job)
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def consumer():
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            try:
+                await handler(job)
+            except Exception:
+                log.exception("Unhandled error while processing %s", job)
+
+    await asyncio.gather(producer(), *(consumer() for _ in range(workers)))
+
+
+class _HostDispatcher:
+    # run_queue(limiter=...) 용: 호스트별 대기열 + 다시 확인할 시각(not before) 힙
+    def __init__(self, jobs, limiter, key, queue_size, on_enqueue):
+        self.jobs = iter(jobs)
+        self.limiter = limiter
+        self.key = key
+        self.queue_size = queue_size
+        self.on_enqueue = on_enqueue
+        self.incoming = deque()     # 읽어 둔 Job (on_enqueue 는 이미 불렀다)
+        self.parked = {}            # host -> deque[Job] (입력 순서 유지)
+        self.parked_count = 0
+        self.ready = deque()        # 대기열을 다시 확인할 호스트
+        self.timers = []            # (다시 확인할 시각, host)
+        self.timed = set()
+        self.exhausted = False
+        self.changed = asyncio.Event()
+
+    def _fill(self):
+        while not self.exhausted and len(self.incoming) < self.queue_size:
+            try:
+                job = next(self.jobs)
+            except StopIteration:
+                self.exhausted = True
+                break
+            if self.on_enqueue is not None:
+                self.on_enqueue(job)
+            self.incoming.append(job)
+
+    def _recheck_later(self, host, wait):
+        if host not in self.timed:
+            heapq.heappush(self.timers, (time.monotonic() + min(wait, HOST_RECHECK_SEC), host))
+            self.timed.add(host)
+
+    def _next(self):
+        # 지금 실행할 수 있는 (host, job), 없으면 None
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            _, host = heapq.heappop(self.timers)
+            self.timed.discard(host)
+            self.ready.append(host)
+        while self.ready:
+            host = self.ready.popleft()
+            waiting = self.parked.get(host)
+            if not waiting:
+                continue
+            wait = self.limiter.try_acquire(host)
+            if wait:
+                self._recheck_later(host, wait)
+                continue
+            job = waiting.popleft()
+            self.parked_count -= 1
+            if waiting:
+                self.ready.append(host)
+            else:
+                del self.parked[host]
+            return host, job
+        while self.parked_count < self.queue_size:
+            self._fill()
+            if not self.incoming:
+                break
+            job = self.incoming.popleft()
+            host = self.key(job)
+            if host in self.parked:
+                # 같은 호스트의 앞선 Job 이 기다리는 중이면 그 뒤에
+                self.parked[host].append(job)
+                self.parked_count += 1
+                continue
+            wait = self.limiter.try_acquire(host)
+            if not wait:
+                return host, job
+            self.parked[host] = deque([job])
+            self.parked_count += 1
+            self._recheck_later(host, wait)
+        return None
+
+    @property
+    def done(self):
+        return self.exhausted and not self.incoming and not self.parked_count
+
+    async def run(self, handler, workers):
+        free = asyncio.Semaphore(workers)
+        running = set()
+
+        async def work(host, job):
+            try:
+                await handler(job)
+            except Exception:
+                log.exception("Unhandled error while processing %s", job)
+            finally:
+                self.limiter.release(host)
+                if host in self.parked:
+                    self.ready.append(host)
+                free.release()
+                self.changed.set()
+
+        try:
+            while True:
+                await free.acquire()
+                item = self._next()
+                while item is None and not self.done:
+                    self.changed.clear()
+                    timeout = max(0.0, self.timers[0][0] - time.monotonic()) if self.timers else None
+                    try:
+                        await asyncio.wait_for(self.changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    item = self._next()
+                if item is None:
+                    break
+                task = asyncio.ensure_future(work(*item))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            if running:
+                await asyncio.gather(*running)
+        except BaseException:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+
+def plan_batch_jobs(rows, writer, journal, batch_size, dedup=None, shard=None, retry_failed=False,
+                    skip_existing=False):
+    """
+    입력 CSV 를 한 행씩 읽어 배치 단위로 shard 파일을 열고 아직 안 끝난 URL 의 Job 을 낸다.
+    shard: (i, N) 이면 호스트 해시가 i 인 URL 만
+    skip_existing: batch_{n}.csv 가 이미 있는 배치는 건너뛴다 (retry_failed 이고 남은 URL 이 있으면 제외)
+    """
+    total_urls = 0
+    for batch_num, batch in iter_batches(rows, batch_size):
+        batch_idx = (batch_num - 1) * batch_size
+        batch_total = len(batch)
+        total_urls = batch[-1].url_index + 1
+        members = [
+            row for row in batch
+            if shard is None or shard_of(row.url, shard[1]) == shard[0]
+        ]
+        if not members:
+            continue
+        done_indexes = journal.completed_indexes(
+            include_failed=not retry_failed, start=batch_idx, end=batch_idx + batch_size
+        )
+        pending = [row for row in members if row.url_index not in done_indexes]
+
+        if skip_existing and os.path.exists(writer.shard_path(batch_num)) and (not retry_failed or not pending):
+            print(f"⏩ Skipping Batch {batch_num} (already exists)")
+            continue
+
+        print(f"\n🚀 Batch {batch_num}: Queueing {len(pending)}/{batch_total} URLs...")
+        writer.open_shard(batch_num, len(members), already_done=len(members) - len(pending))
+        if dedup is not None:
+            # 완료된 행도 키를 등록해 둔다 (뒤의 중복 행이 그 결과를 쓸 수 있도록)
+            for row in members:
+                if row.url_index in done_indexes:
+                    dedup.primary_for(row.url, row.url_index)
+        for row in pending:
+            job = Job(batch_num, row.url_index - batch_idx, batch_total, row.url, row.url_index)
+            if dedup is not None:
+                primary = dedup.primary_for(row.url, row.url_index)
+                if primary != row.url_index:
+                    if journal.is_completed(primary, include_failed=not retry_failed):
+                        dedup.count_saved()
+                        writer.write_duplicate(job, primary)
+                    else:
+                        dedup.wait_for(primary, job)
+                    continue
+            yield job
+    # 끝까지 읽었으므로 전체 URL 수가 정해졌다
+    if total_urls:
+        journal.set_run_info(total_urls, batch_size)